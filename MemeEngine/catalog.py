@@ -0,0 +1,148 @@
+"""Provide persisted index of the source images.
+
+The catalog walks the image directory recursively with `os.scandir`, keeps
+only the files of the accepted formats and records their size, modification
+time, dimensions and format. Dimensions and format come from the image header,
+which is read only for the files that are new or changed since the previous
+scan, so rescanning tens of thousands of photos costs one stat per file.
+The index is saved as JSON and loaded again by the next process.
+"""
+import json
+import logging
+import os
+import random
+from collections import namedtuple
+
+ImageEntry = namedtuple('ImageEntry', ['path', 'size', 'mtime_ns', 'width', 'height', 'format'])
+
+EXTENSIONS = {'.jpg': 'JPEG',
+              '.jpeg': 'JPEG',
+              '.png': 'PNG',
+              '.gif': 'GIF',
+              '.bmp': 'BMP',
+              '.webp': 'WEBP'}
+
+
+class ImageCatalog:
+    """Incrementally updated index of the images under a directory."""
+
+    version = 1
+
+    def __init__(self, root, index_path=None, formats=None):
+        """Construct a new `ImageCatalog`, loading the saved index if there is one.
+
+        :param root: the directory of the source images.
+        :param index_path: the JSON file the index is saved to, None keeps it in memory only.
+        :param formats: the accepted Pillow format names, all of `EXTENSIONS` by default.
+        """
+        self.root = root
+        self.index_path = index_path
+        self.formats = frozenset(formats or EXTENSIONS.values())
+        self.probes = 0
+        self._entries = {}
+        self._paths = []
+        self._load()
+
+    def scan(self):
+        """Update the index from the directory and return the sorted image paths.
+
+        Only the headers of new or changed files are read.
+        """
+        previous = self._entries
+        entries = {}
+        for path, stat in self._walk(self.root):
+            entry = previous.get(path)
+            if entry is None or entry.size != stat.st_size or entry.mtime_ns != stat.st_mtime_ns:
+                entry = self._probe(path, stat)
+            entries[path] = entry
+        if entries != previous:
+            self._entries = entries
+            self._save()
+        self._paths = sorted(path for path, entry in entries.items() if entry.format in self.formats)
+        return self._paths
+
+    def images(self, formats=None):
+        """Return the indexed image paths, optionally of the given formats only."""
+        if formats is None:
+            return self._paths
+        return [path for path in self._paths if self._entries[path].format in formats]
+
+    def get(self, path):
+        """Return the `ImageEntry` of the path or None if it is not indexed."""
+        entry = self._entries.get(str(path))
+        if entry is None or entry.format not in self.formats:
+            return None
+        return entry
+
+    def __len__(self):
+        """Return the number of indexed images."""
+        return len(self._paths)
+
+    def _walk(self, directory, visited=None):
+        """Yield (path, stat) of the files with a known extension, descending into subdirectories.
+
+        Symlinked directories are followed, each directory is entered once so a link cycle ends the descent.
+        """
+        visited = set() if visited is None else visited
+        try:
+            stat = os.stat(directory)
+            if (stat.st_dev, stat.st_ino) in visited:
+                return
+            visited.add((stat.st_dev, stat.st_ino))
+            with os.scandir(directory) as it:
+                dirs = []
+                for item in it:
+                    if item.is_dir():
+                        dirs.append(item.path)
+                    elif item.is_file() and os.path.splitext(item.name)[1].lower() in EXTENSIONS:
+                        yield item.path, item.stat()
+        except FileNotFoundError:
+            return
+        for path in dirs:
+            yield from self._walk(path, visited)
+
+    def _probe(self, path, stat):
+        """Read the header of the image, a file Pillow cannot identify is kept without a format."""
+        from PIL import Image
+        self.probes += 1
+        try:
+            with Image.open(path) as image:
+                width, height = image.size
+                image_format = image.format
+        except (OSError, ValueError) as ex:
+            logging.error(f'Cannot read image {path}: {ex}')
+            return ImageEntry(path, stat.st_size, stat.st_mtime_ns, 0, 0, None)
+        return ImageEntry(path, stat.st_size, stat.st_mtime_ns, width, height, image_format)
+
+    def _load(self):
+        if self.index_path is None:
+            return
+        try:
+            with open(self.index_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') != self.version or data.get('root') != self.root:
+            return
+        self._entries = {row[0]: ImageEntry(*row) for row in data['entries']}
+        self._paths = sorted(path for path, entry in self._entries.items() if entry.format in self.formats)
+
+    def _save(self):
+        """Write the index to a temporary file and move it in place in one step."""
+        if self.index_path is None:
+            return
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.index_path}.{random.randint(0,100000000)}.tmp'
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump({'version': self.version,
+                           'root': self.root,
+                           'entries': [list(entry) for entry in self._entries.values()]}, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as ex:
+            logging.error(f'Cannot save image index {self.index_path}: {ex}')
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
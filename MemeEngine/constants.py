@@ -0,0 +1,32 @@
+"""Provide constant values that are used for MemeEngine."""
+FONT_PATH = './fonts/LilitaOne-Regular.ttf'
+FONT_SIZE = 15
+
+CAPTION_MIN_FONT_SIZE = 12
+CAPTION_MAX_FONT_SIZE = 40
+CAPTION_MARGIN = 20
+CAPTION_MAX_HEIGHT = 0.5
+CAPTION_LINE_SPACING = 1.15
+
+RESAMPLE = 'lanczos'
+REDUCING_GAP = 3.0
+JPEG_OPTIONS = {'quality': 85,
+                'progressive': False,
+                'optimize': False,
+                'subsampling': '4:2:0'}
+
+OUTPUT_CODEC = 'jpeg'
+CODEC_OPTIONS = {'jpeg': JPEG_OPTIONS,
+                 'pjpeg': {**JPEG_OPTIONS, 'progressive': True, 'optimize': True},
+                 'webp': {'quality': 80, 'method': 4},
+                 'avif': {'quality': 60, 'speed': 6}}
+ENCODE_PRESET = 'balanced'
+ENCODE_PRESETS = {'fast': {'webp': {'method': 0},
+                           'avif': {'speed': 10}},
+                  'balanced': {},
+                  'small': {'jpeg': {'quality': 75, 'optimize': True},
+                            'pjpeg': {'quality': 75},
+                            'webp': {'quality': 70, 'method': 6},
+                            'avif': {'quality': 50, 'speed': 4}}}
+
+VARIANT_WIDTHS = (250, 500, 1000)
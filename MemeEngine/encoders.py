@@ -0,0 +1,85 @@
+"""Provide registry of the output codecs of the memes.
+
+Every codec names the Pillow format it is saved in, the file extension and the
+media type it is served as. The encoder options of a codec come from
+`CODEC_OPTIONS` tuned by one of the `ENCODE_PRESETS`, so the same engine can
+trade encode time against bytes per meme.
+
+WebP needs Pillow built with libwebp, AVIF needs the optional `pillow-avif-plugin`
+package; `available` tells which codecs the running Pillow can write.
+`negotiate` picks the codec to serve from the media types a client accepts.
+"""
+import functools
+import importlib
+import logging
+import mimetypes
+from collections import namedtuple
+
+from .constants import CODEC_OPTIONS, ENCODE_PRESETS
+
+Codec = namedtuple('Codec', ['name', 'format', 'extension', 'mimetype', 'plugin'])
+
+CODECS = {'jpeg': Codec('jpeg', 'JPEG', 'jpg', 'image/jpeg', 'PIL.JpegImagePlugin'),
+          'pjpeg': Codec('pjpeg', 'JPEG', 'jpg', 'image/jpeg', 'PIL.JpegImagePlugin'),
+          'webp': Codec('webp', 'WEBP', 'webp', 'image/webp', 'PIL.WebPImagePlugin'),
+          'avif': Codec('avif', 'AVIF', 'avif', 'image/avif', 'pillow_avif')}
+
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+
+
+def get_codec(name) -> Codec:
+    """Return the codec registered under the name.
+
+    :raise ValueError: if the name is unknown.
+    """
+    codec = CODECS.get(name)
+    if codec is None:
+        logging.error(f'Unknown output codec {name}')
+        raise ValueError(f'Unknown output codec {name}')
+    return codec
+
+
+@functools.lru_cache(maxsize=None)
+def available(name) -> bool:
+    """Tell if the installed Pillow can write the codec, loading its plugin on the first call."""
+    from PIL import Image
+    codec = get_codec(name)
+    try:
+        importlib.import_module(codec.plugin)
+    except ImportError:
+        return False
+    return codec.format in Image.SAVE
+
+
+def codec_options(preset, overrides=None) -> dict:
+    """Return the encoder options of every codec tuned by the preset.
+
+    :param preset: the name of one of the `ENCODE_PRESETS`.
+    :param overrides: the options by codec name that take precedence over the preset.
+    :raise ValueError: if the preset or a codec of the overrides is unknown.
+    """
+    if preset not in ENCODE_PRESETS:
+        logging.error(f'Unknown encode preset {preset}')
+        raise ValueError(f'Unknown encode preset {preset}')
+    overrides = overrides or {}
+    for name in overrides:
+        get_codec(name)
+    return {name: {**CODEC_OPTIONS[name], **ENCODE_PRESETS[preset].get(name, {}), **overrides.get(name, {})}
+            for name in CODECS}
+
+
+def negotiate(accepted, names) -> str:
+    """Return the first of the codec names whose media type the client accepts by name, the last name otherwise.
+
+    Wildcards such as `*/*` or `image/*` do not count, a client that names no format gets the last,
+    most compatible codec. Codecs the installed Pillow cannot write are skipped.
+
+    :param accepted: the (media type, quality) pairs of the Accept header.
+    :param names: the codec names in order of preference.
+    """
+    types = {value.lower() for value, quality in accepted if quality > 0}
+    for name in names[:-1]:
+        if get_codec(name).mimetype in types and available(name):
+            return name
+    return names[-1]
@@ -0,0 +1,17 @@
+"""Custom exceptions."""
+class FetchError(Exception):
+    """Exception to handle source images that cannot be downloaded."""
+
+    pass
+
+
+class ImageTooLargeError(FetchError):
+    """Exception to handle source images over the download size limit."""
+
+    pass
+
+
+class QueueFullError(Exception):
+    """Exception to handle jobs submitted while the job queue is full."""
+
+    pass
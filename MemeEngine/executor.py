@@ -0,0 +1,380 @@
+"""Provide pluggable executors that run `MemeEngine` renders.
+
+InlineExecutor renders on the calling thread,
+ThreadExecutor renders on a thread pool and
+ProcessExecutor renders on a pool of warm worker processes that have
+the fonts and the source images loaded before the first job arrives.
+
+The render cache stays in the calling process: hits are answered
+without submitting a job, and the worker output is registered in the
+cache once the job is done.
+"""
+import io
+import os
+import threading
+import multiprocessing
+import concurrent.futures
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+
+from .image_cache import SourceImageCache
+from .constants import VARIANT_WIDTHS, OUTPUT_CODEC
+from .encoders import get_codec
+from .meme_engine import MemeEngine
+
+
+class RenderExecutor:
+    """A general superclass for the render executors.
+
+    Concrete subclasses override `submit` to decide where the render runs.
+    When `profiler` holds a `SamplingProfiler`, a render thread working for a
+    profiled thread is sampled into that thread's profile.
+    """
+
+    profiler = None
+
+    def __init__(self, engine: MemeEngine):
+        """Construct a new executor over the engine.
+
+        :param engine: the engine that owns the output directory and the render cache.
+        """
+        self.engine = engine
+
+    def submit(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> Future:
+        """Schedule a render and return the future of the output file path."""
+        raise NotImplementedError
+
+    def submit_bytes(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> Future:
+        """Schedule an in-memory render and return the future of the encoded image."""
+        raise NotImplementedError
+
+    def submit_variants(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> Future:
+        """Schedule a render in several widths and return the future of the file paths by width."""
+        raise NotImplementedError
+
+    def submit_variants_bytes(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> Future:
+        """Schedule an in-memory render in several widths and return the future of the encoded images by width."""
+        raise NotImplementedError
+
+    def render(self, img_path, text, author, width=500, timeout=None, codec=OUTPUT_CODEC) -> str:
+        """Render a meme and wait for the output file path.
+
+        :param timeout: the number of seconds to wait, None waits forever.
+        :param codec: the output codec name.
+        :raise concurrent.futures.TimeoutError: if the render did not finish in time.
+        """
+        return self._wait(self.submit(img_path, text, author, width, codec), timeout)
+
+    def render_bytes(self, img_path, text, author, width=500, timeout=None, codec=OUTPUT_CODEC) -> bytes:
+        """Render a meme in memory and wait for the encoded image.
+
+        :param timeout: the number of seconds to wait, None waits forever.
+        :param codec: the output codec name.
+        :raise concurrent.futures.TimeoutError: if the render did not finish in time.
+        """
+        return self._wait(self.submit_bytes(img_path, text, author, width, codec), timeout)
+
+    def render_variants(self, img_path, text, author, widths=VARIANT_WIDTHS, timeout=None,
+                        codec=OUTPUT_CODEC) -> dict:
+        """Render a meme in several widths from one decode and wait for the file paths by width.
+
+        :param timeout: the number of seconds to wait, None waits forever.
+        :param codec: the output codec name.
+        :raise concurrent.futures.TimeoutError: if the render did not finish in time.
+        """
+        return self._wait(self.submit_variants(img_path, text, author, widths, codec), timeout)
+
+    def render_variants_bytes(self, img_path, text, author, widths=VARIANT_WIDTHS, timeout=None,
+                              codec=OUTPUT_CODEC) -> dict:
+        """Render a meme in several widths in memory and wait for the encoded images by width.
+
+        :param timeout: the number of seconds to wait, None waits forever.
+        :param codec: the output codec name.
+        :raise concurrent.futures.TimeoutError: if the render did not finish in time.
+        """
+        return self._wait(self.submit_variants_bytes(img_path, text, author, widths, codec), timeout)
+
+    @staticmethod
+    def _wait(future, timeout):
+        try:
+            return future.result(timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def warm(self, sources, width=500):
+        """Decode the source images into the workers' own caches.
+
+        Only executors whose workers keep a separate source cache do anything,
+        the others share the engine's cache and fill it on the first render.
+        """
+        pass
+
+    def shutdown(self, wait=True):
+        """Release the workers."""
+        pass
+
+
+class InlineExecutor(RenderExecutor):
+    """Render on the calling thread."""
+
+    def submit(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> Future:
+        """Render right away and return the finished future."""
+        return self._call(self.engine.make_meme, img_path, text, author, width, codec)
+
+    def submit_bytes(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> Future:
+        """Render in memory right away and return the finished future."""
+        return self._call(self.engine.render_bytes, img_path, text, author, width, codec)
+
+    def submit_variants(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> Future:
+        """Render every width right away and return the finished future."""
+        return self._call(self.engine.make_variants, img_path, text, author, widths, codec)
+
+    def submit_variants_bytes(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> Future:
+        """Render every width in memory right away and return the finished future."""
+        return self._call(self.engine.render_variants_bytes, img_path, text, author, widths, codec)
+
+    @staticmethod
+    def _call(func, *args) -> Future:
+        future = Future()
+        try:
+            future.set_result(func(*args))
+        except Exception as ex:
+            future.set_exception(ex)
+        return future
+
+
+class ThreadExecutor(RenderExecutor):
+    """Render on a pool of threads sharing the engine caches."""
+
+    def __init__(self, engine: MemeEngine, workers=None):
+        """Construct a new `ThreadExecutor` with the number of worker threads."""
+        super().__init__(engine)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='render')
+
+    def submit(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> Future:
+        """Schedule the render on the thread pool."""
+        return self._pool.submit(self._profiled(self.engine.make_meme), img_path, text, author, width, codec)
+
+    def submit_bytes(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> Future:
+        """Schedule the in-memory render on the thread pool."""
+        return self._pool.submit(self._profiled(self.engine.render_bytes), img_path, text, author, width, codec)
+
+    def submit_variants(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> Future:
+        """Schedule the render of every width on the thread pool."""
+        return self._pool.submit(self._profiled(self.engine.make_variants), img_path, text, author, widths, codec)
+
+    def submit_variants_bytes(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> Future:
+        """Schedule the in-memory render of every width on the thread pool."""
+        return self._pool.submit(self._profiled(self.engine.render_variants_bytes), img_path, text, author,
+                                 widths, codec)
+
+    @classmethod
+    def _profiled(cls, func):
+        """Return the function sampled into the profile of the submitting thread when it is profiled."""
+        profiler = cls.profiler
+        samples = profiler.current() if profiler is not None else None
+        if samples is None:
+            return func
+
+        def run(*args):
+            with profiler.attach(samples):
+                return func(*args)
+        return run
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads."""
+        self._pool.shutdown(wait=wait)
+
+
+_worker_engine = None
+_worker_barrier = None
+
+
+def _init_worker(outputdir, sources, width, resample, preset, codec_options, barrier=None):
+    """Load the fonts and the source images once per worker process."""
+    global _worker_engine, _worker_barrier
+    _worker_engine = MemeEngine(outputdir, source_cache=SourceImageCache(), resample=resample,
+                                preset=preset, codec_options=codec_options)
+    _worker_barrier = barrier
+    _worker_engine.layout.warm()
+    _decode_sources(sources, width)
+
+
+def _decode_sources(sources, width):
+    """Decode the sources into the worker cache the way a render of the width loads them."""
+    for path in sources:
+        try:
+            _worker_engine._load_source(path, width)
+        except (OSError, ValueError):
+            pass
+
+
+def _warm_job(sources, width, timeout):
+    """Decode the sources, then hold the worker until every worker has taken one warm job."""
+    _decode_sources(sources, width)
+    try:
+        _worker_barrier.wait(timeout)
+    except threading.BrokenBarrierError:
+        pass
+    return os.getpid()
+
+
+def _render_job(img, text, author, width, file_name, codec):
+    if isinstance(img, bytes):
+        img = io.BytesIO(img)
+    return _worker_engine.render(img, text, author, width, file_name, codec)
+
+
+def _render_bytes_job(img, text, author, width, codec):
+    if isinstance(img, bytes):
+        img = io.BytesIO(img)
+    return _worker_engine.render_bytes(img, text, author, width, codec)
+
+
+def _render_variants_job(img, text, author, file_names, codec):
+    if isinstance(img, bytes):
+        img = io.BytesIO(img)
+    return _worker_engine.render_variants(img, text, author, file_names, codec)
+
+
+def _render_variants_bytes_job(img, text, author, widths, codec):
+    if isinstance(img, bytes):
+        img = io.BytesIO(img)
+    return _worker_engine.render_variants_bytes(img, text, author, widths, codec)
+
+
+def _noop():
+    return os.getpid()
+
+
+class ProcessExecutor(RenderExecutor):
+    """Render on a pool of warm worker processes."""
+
+    def __init__(self, engine: MemeEngine, workers=None, sources=(), width=500):
+        """Construct a new `ProcessExecutor` and start its workers.
+
+        :param workers: the number of worker processes, defaults to the number of cores.
+        :param sources: the source images every worker decodes up front.
+        :param width: the width the source images are decoded at.
+        """
+        super().__init__(engine)
+        self.workers = workers or os.cpu_count() or 1
+        self.width = width
+        self._warm_lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                         initializer=_init_worker,
+                                         initargs=(engine.out_path, list(sources), width, engine.resample,
+                                                   engine.preset, engine.codec_options,
+                                                   multiprocessing.Barrier(self.workers)))
+        for future in [self._pool.submit(_noop) for _ in range(self.workers)]:
+            future.result()
+
+    def warm(self, sources, width=None, timeout=60):
+        """Decode the source images in every worker process and wait until they are done.
+
+        Each worker takes exactly one warm job because the job waits on a barrier
+        shared by all the workers before it returns.
+
+        :param sources: the source image paths.
+        :param width: the width the sources are decoded at, defaults to the executor width.
+        :param timeout: the number of seconds a worker waits for the others.
+        :return: the process ids of the workers that were warmed.
+        """
+        sources = [str(path) for path in sources]
+        with self._warm_lock:
+            futures = [self._pool.submit(_warm_job, sources, width or self.width, timeout)
+                       for _ in range(self.workers)]
+            return {future.result() for future in futures}
+
+    def submit(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> Future:
+        """Answer from the render cache or schedule the render on a worker process."""
+        key = self.engine.cache_key(img_path, text, author, width, codec)
+        extension = get_codec(codec).extension
+        if key is not None:
+            cached = self.engine.cache.get(key, extension)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future
+        future = self._pool.submit(_render_job, self._picklable(img_path), text, author, width,
+                                   self.engine.output_path(key, codec), codec)
+        return self._registered(future, [key], extension)
+
+    def submit_variants(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> Future:
+        """Answer from the render cache or schedule the render of every width on a worker process."""
+        keys = self.engine.variant_keys(img_path, text, author, widths, codec)
+        cached = self.engine.cached_variants(keys, codec)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+        file_names = {width: self.engine.output_path(key, codec) for width, key in keys.items()}
+        future = self._pool.submit(_render_variants_job, self._picklable(img_path), text, author, file_names, codec)
+        return self._registered(future, keys.values(), get_codec(codec).extension)
+
+    def submit_bytes(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> Future:
+        """Schedule the in-memory render on a worker process."""
+        return self._pool.submit(_render_bytes_job, self._picklable(img_path), text, author, width, codec)
+
+    def submit_variants_bytes(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> Future:
+        """Schedule the in-memory render of every width on a worker process."""
+        return self._pool.submit(_render_variants_bytes_job, self._picklable(img_path), text, author,
+                                 tuple(widths), codec)
+
+    def _registered(self, future, keys, extension) -> Future:
+        """Return a future that completes once the files written by the worker are in the render cache.
+
+        Cancelling the returned future cancels the job if it has not started yet.
+        """
+        keys = [key for key in keys if key is not None]
+        if not keys:
+            return future
+        registered = Future()
+
+        def register(done):
+            if done.cancelled():
+                registered.cancel()
+                return
+            if done.exception() is None:
+                for key in keys:
+                    self.engine.cache.put(key, extension)
+            if registered.done():
+                return
+            if done.exception() is not None:
+                registered.set_exception(done.exception())
+            else:
+                registered.set_result(done.result())
+        registered.add_done_callback(lambda outer: outer.cancelled() and future.cancel())
+        future.add_done_callback(register)
+        return registered
+
+    @staticmethod
+    def _picklable(img_path):
+        if hasattr(img_path, 'read'):
+            return img_path.read()
+        return str(img_path)
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes."""
+        self._pool.shutdown(wait=wait)
+
+
+executors = {'inline': InlineExecutor, 'thread': ThreadExecutor, 'process': ProcessExecutor}
+
+
+def create_executor(backend, engine: MemeEngine, workers=None, sources=(), width=500) -> RenderExecutor:
+    """Build the executor registered under the backend name.
+
+    :param backend: one of 'inline', 'thread' or 'process'.
+    :param engine: the engine to render with.
+    :param workers: the number of worker threads or processes.
+    :param sources: the source images the worker processes decode up front.
+    :param width: the width the source images are decoded at.
+    """
+    if backend not in executors:
+        raise ValueError(f'Unknown render backend {backend}')
+    if backend == 'process':
+        return ProcessExecutor(engine, workers=workers, sources=sources, width=width)
+    if backend == 'thread':
+        return ThreadExecutor(engine, workers=workers)
+    return InlineExecutor(engine)
@@ -0,0 +1,365 @@
+"""Provide fetching of remote source images.
+
+Downloads share a pooled `requests.Session`, have connect and read timeouts,
+an overall deadline and a maximum size, so a slow or huge URL cannot tie up
+a worker. Fetched images are cached in memory and optionally on disk with
+LRU eviction. Cached responses are served while fresh according to
+Cache-Control and revalidated with If-None-Match / If-Modified-Since after that.
+`requests` is imported with the first download, not with the module.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+from .exceptions import FetchError, ImageTooLargeError
+
+_connections = {}
+
+
+def _tracking(pool_class):
+    """Return a subclass of the urllib3 pool class that records the connection every thread is using."""
+    class TrackingPool(pool_class):
+        def _get_conn(self, timeout=None):
+            conn = super()._get_conn(timeout)
+            _connections[threading.get_ident()] = conn
+            return conn
+    return TrackingPool
+
+
+class _Watchdog:
+    """Shut down the connection of the calling thread once the deadline has passed.
+
+    Closing a response does not wake up a thread blocked in recv(), shutting its
+    socket down does. After the deadline the connection in use is shut down every
+    `poll` seconds until `cancel`, which also covers redirects and a connection
+    that was still being opened.
+    """
+
+    def __init__(self, deadline, poll=0.05):
+        self.deadline = deadline
+        self.poll = poll
+        self.expired = threading.Event()
+        self.response = None
+        self._thread = threading.get_ident()
+        self._cancelled = False
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def start(self):
+        self._schedule(self.deadline)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            if self._timer is not None:
+                self._timer.cancel()
+        _connections.pop(self._thread, None)
+
+    def _schedule(self, delay):
+        with self._lock:
+            if self._cancelled:
+                return
+            self._timer = threading.Timer(delay, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _expire(self):
+        self.expired.set()
+        with self._lock:
+            if self._cancelled:
+                return
+            sock = getattr(_connections.get(self._thread), 'sock', None)
+            if sock is None and self.response is not None:
+                sock = ImageFetcher._socket_of(self.response)
+            try:
+                if sock is not None:
+                    sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self._schedule(self.poll)
+
+
+class ImageFetcher:
+    """Bounded and cached HTTP downloader of source images."""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, cache_dir=None, max_bytes=10 * 1024 * 1024, connect_timeout=3.05, read_timeout=10,
+                 deadline=20, pool_size=10, max_entries=256, max_cache_bytes=256 * 1024 * 1024,
+                 memory_bytes=32 * 1024 * 1024, default_ttl=60):
+        """Construct a new `ImageFetcher`.
+
+        :param cache_dir: the directory of the disk cache, None keeps the cache in memory only.
+        :param max_bytes: the maximum size of a downloaded image.
+        :param connect_timeout: the seconds to wait for a connection.
+        :param read_timeout: the seconds to wait between two received chunks.
+        :param deadline: the seconds a whole download may take, the connection is closed after that.
+        :param pool_size: the number of kept-alive connections per host.
+        :param max_entries: the maximum number of cached images.
+        :param max_cache_bytes: the maximum total size of the cached images.
+        :param memory_bytes: the maximum size of the images kept in memory.
+        :param default_ttl: the seconds a response without Cache-Control max-age is fresh.
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = (connect_timeout, read_timeout)
+        self.deadline = deadline
+        self.max_entries = max_entries
+        self.max_cache_bytes = max_cache_bytes
+        self.memory_bytes = memory_bytes
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+        self.pool_size = pool_size
+        self._session = None
+        self._entries = OrderedDict()
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._cache_size = 0
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load()
+
+    def fetch(self, url: str) -> bytes:
+        """Return the content of the image at the url.
+
+        :param url: the address of the image.
+        :raise ImageTooLargeError: if the image is bigger than `max_bytes`.
+        :raise FetchError: if the image cannot be downloaded in time.
+        """
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        with self._lock:
+            meta = self._entries.get(key)
+            if meta is not None:
+                self._entries.move_to_end(key)
+        data = self._read(key) if meta is not None else None
+        if data is not None and meta['expires'] > time.time():
+            self.hits += 1
+            return data
+
+        headers = {}
+        if data is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        watchdog = _Watchdog(self.deadline)
+        watchdog.start()
+        response = None
+        try:
+            response = watchdog.response = self._get(url, headers, watchdog)
+            if response.status_code == 304 and data is not None:
+                self.revalidations += 1
+                self._store(key, data, response, meta)
+                return data
+            if response.status_code != 200:
+                raise FetchError(f'Cannot fetch {url}: HTTP {response.status_code}')
+            self.misses += 1
+            data = self._download(url, response, watchdog)
+        finally:
+            watchdog.cancel()
+            if response is not None:
+                response.close()
+        self._store(key, data, response)
+        return data
+
+    def stats(self) -> dict:
+        """Return the cache counters."""
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'revalidations': self.revalidations,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries),
+                    'bytes': self._cache_size}
+
+    @property
+    def session(self):
+        """Return the pooled `requests.Session`, created on first use."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            with self._lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+                    manager = adapter.poolmanager
+                    manager.pool_classes_by_scheme = {scheme: _tracking(pool_class) for scheme, pool_class
+                                                      in manager.pool_classes_by_scheme.items()}
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def _get(self, url, headers, watchdog):
+        import requests
+        try:
+            response = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+        except requests.exceptions.RequestException as ex:
+            logging.error(f'Cannot fetch {url}: {ex}')
+            if watchdog.expired.is_set():
+                raise FetchError(f'Fetching {url} took longer than {self.deadline} seconds') from ex
+            raise FetchError(f'Cannot fetch {url}') from ex
+        if watchdog.expired.is_set():
+            response.close()
+            raise FetchError(f'Fetching {url} took longer than {self.deadline} seconds')
+        return response
+
+    def _download(self, url, response, watchdog) -> bytes:
+        """Read the body of the response, the watchdog interrupts it at the deadline."""
+        import requests
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > self.max_bytes:
+            raise ImageTooLargeError(f'Image at {url} is larger than {self.max_bytes} bytes')
+        expired = watchdog.expired
+        chunks = []
+        size = 0
+        try:
+            for chunk in response.iter_content(self.chunk_size):
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise ImageTooLargeError(f'Image at {url} is larger than {self.max_bytes} bytes')
+                chunks.append(chunk)
+        except ImageTooLargeError:
+            raise
+        except Exception as ex:
+            if not expired.is_set() and not isinstance(ex, requests.exceptions.RequestException):
+                raise
+            logging.error(f'Cannot fetch {url}: {ex}')
+            raise FetchError(f'Cannot fetch {url}') from ex
+        if expired.is_set():
+            raise FetchError(f'Fetching {url} took longer than {self.deadline} seconds')
+        return b''.join(chunks)
+
+    @staticmethod
+    def _socket_of(response):
+        """Return the socket a streamed response is read from, for `_Watchdog` to shut down."""
+        sock = getattr(getattr(response.raw, '_connection', None), 'sock', None)
+        if sock is None:
+            fp = getattr(getattr(response.raw, '_fp', None), 'fp', None)
+            sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+        return sock
+
+    def _freshness(self, response):
+        cache_control = response.headers.get('Cache-Control', '').lower()
+        if 'no-store' in cache_control:
+            return None
+        if 'no-cache' in cache_control:
+            return 0
+        max_age = re.search(r'max-age=(\d+)', cache_control)
+        return int(max_age.group(1)) if max_age else self.default_ttl
+
+    def _store(self, key, data, response, meta=None):
+        ttl = self._freshness(response)
+        if ttl is None or len(data) > self.max_cache_bytes:
+            return
+        meta = dict(meta or {})
+        meta['expires'] = time.time() + ttl
+        meta['size'] = len(data)
+        meta['etag'] = response.headers.get('ETag', meta.get('etag'))
+        meta['last_modified'] = response.headers.get('Last-Modified', meta.get('last_modified'))
+        if self.cache_dir:
+            self._write(key, data, meta)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._cache_size -= old['size']
+            self._entries[key] = meta
+            self._cache_size += meta['size']
+            self._remember(key, data)
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                              or self._cache_size > self.max_cache_bytes):
+                self._evict()
+
+    def _write(self, key, data, meta):
+        """Write the image and its metadata to the disk cache, a failure only logs an error.
+
+        Every write goes through its own temporary files, so concurrent fetches of the
+        same url do not truncate each other.
+        """
+        path = os.path.join(self.cache_dir, key)
+        suffix = f'.{random.randint(0,100000000)}.tmp'
+        try:
+            for target, content, mode in ((path + '.bin', data, 'wb'), (path + '.json', json.dumps(meta), 'w')):
+                with open(target + suffix, mode) as f:
+                    f.write(content)
+                os.replace(target + suffix, target)
+        except OSError as ex:
+            logging.error(f'Cannot cache image {key} on disk: {ex}')
+        finally:
+            for target in (path + '.bin', path + '.json'):
+                if os.path.exists(target + suffix):
+                    os.remove(target + suffix)
+
+    def _remember(self, key, data):
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        if len(data) > self.memory_bytes:
+            return
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, dropped = self._memory.popitem(last=False)
+            self._memory_size -= len(dropped)
+
+    def _evict(self):
+        key, meta = self._entries.popitem(last=False)
+        self._cache_size -= meta['size']
+        self.evictions += 1
+        dropped = self._memory.pop(key, None)
+        if dropped is not None:
+            self._memory_size -= len(dropped)
+        if self.cache_dir:
+            for suffix in ('.bin', '.json'):
+                try:
+                    os.remove(os.path.join(self.cache_dir, key + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def _read(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        if not self.cache_dir:
+            return None
+        try:
+            with open(os.path.join(self.cache_dir, key + '.bin'), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def _load(self):
+        """Adopt the images cached by previous runs, oldest first."""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            key, ext = os.path.splitext(name)
+            if ext != '.json' or not os.path.exists(os.path.join(self.cache_dir, key + '.bin')):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path) as f:
+                    found.append((os.path.getmtime(path), key, json.load(f)))
+            except (OSError, ValueError):
+                continue
+        for _, key, meta in sorted(found, key=lambda item: item[0]):
+            self._entries[key] = meta
+            self._cache_size += meta['size']
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries
+                                          or self._cache_size > self.max_cache_bytes):
+            self._evict()
@@ -0,0 +1,50 @@
+"""Provide registry of loaded fonts shared across renders.
+
+Parsing a TrueType file is costly, so every (font file, size) pair
+is loaded once and the same font object is handed out afterwards.
+"""
+import threading
+
+from .constants import FONT_PATH, FONT_SIZE
+
+
+class FontRegistry:
+    """Thread-safe pool of `FreeTypeFont` objects keyed by (path, size)."""
+
+    def __init__(self):
+        """Construct a new empty `FontRegistry`."""
+        self.loads = 0
+        self._fonts = {}
+        self._lock = threading.Lock()
+
+    def get(self, path=FONT_PATH, size=FONT_SIZE):
+        """Return the font for the file and size, loading it on first use.
+
+        :param path: the location of the TrueType file.
+        :param size: the font size.
+        :return: the shared `FreeTypeFont`.
+        """
+        key = (str(path), size)
+        font = self._fonts.get(key)
+        if font is None:
+            with self._lock:
+                font = self._fonts.get(key)
+                if font is None:
+                    from PIL import ImageFont
+                    font = ImageFont.truetype(str(path), size=size)
+                    self._fonts[key] = font
+                    self.loads += 1
+        return font
+
+    def warm(self, sizes=(FONT_SIZE,), path=FONT_PATH):
+        """Load the font in the given sizes ahead of the first render.
+
+        :param sizes: the font sizes to load.
+        :param path: the location of the TrueType file.
+        """
+        for size in sizes:
+            self.get(path, size)
+
+    def __len__(self):
+        """Return the number of loaded fonts."""
+        return len(self._fonts)
@@ -0,0 +1,75 @@
+"""Provide in-process cache of decoded and resized source images.
+
+The application picks its source photos from a small set on every request,
+so decoding and resizing the same JPEG again is wasted work.
+Images are keyed by (path, mtime, width) and kept within a memory ceiling,
+the least recently used ones are evicted first.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+
+class SourceImageCache:
+    """LRU cache of decoded source images already resized to the target width."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        """Construct a new `SourceImageCache`.
+
+        :param max_bytes: the memory ceiling for the decoded bitmaps.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, width, loader):
+        """Return a copy of the resized source image, loading it on a miss.
+
+        :param path: the file location of the source image.
+        :param width: the target pixel width.
+        :param loader: the callable `loader(path, width)` that decodes and resizes the image.
+        :return: the image the caller is free to draw on.
+        """
+        key = (str(path), os.stat(path).st_mtime_ns, width)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return image.copy()
+            self.misses += 1
+        image = loader(path, width)
+        image.load()
+        self._store(key, image)
+        return image.copy()
+
+    def stats(self) -> dict:
+        """Return the cache counters."""
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries),
+                    'bytes': self.bytes}
+
+    @staticmethod
+    def _size(image) -> int:
+        return image.size[0] * image.size[1] * len(image.getbands())
+
+    def _store(self, key, image):
+        size = self._size(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = image
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= self._size(evicted)
+                self.evictions += 1
@@ -0,0 +1,113 @@
+"""Provide background queue of meme jobs.
+
+A job is submitted and gets an id at once; the work runs on a bounded pool
+of worker threads. The number of queued and running jobs is capped, so a
+burst of slow jobs is refused with `QueueFullError` instead of piling up.
+Finished jobs are kept for `ttl` seconds for their result to be collected.
+"""
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .exceptions import QueueFullError
+
+
+class Job:
+    """State of a submitted job."""
+
+    __slots__ = ('id', 'status', 'result', 'error', 'created', 'finished', '_done')
+
+    def __init__(self):
+        """Construct a new queued `Job` with a random id."""
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self._done = threading.Event()
+
+    @property
+    def done(self) -> bool:
+        """Tell if the job has finished, successfully or not."""
+        return self._done.is_set()
+
+    def wait(self, timeout=None) -> bool:
+        """Wait for the job to finish and tell if it did."""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> dict:
+        """Return the job state for the status endpoint."""
+        return {'id': self.id, 'status': self.status, 'result': self.result, 'error': self.error}
+
+
+class JobQueue:
+    """Bounded pool of worker threads running jobs in the background."""
+
+    def __init__(self, workers=4, max_pending=64, ttl=600):
+        """Construct a new `JobQueue`.
+
+        :param workers: the number of jobs running at the same time.
+        :param max_pending: the maximum number of queued and running jobs.
+        :param ttl: the seconds a finished job is kept.
+        """
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.pending = 0
+        self.rejected = 0
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+
+    def submit(self, func, *args) -> Job:
+        """Queue `func(*args)` and return its job right away.
+
+        :raise QueueFullError: if `max_pending` jobs are already queued or running.
+        """
+        job = Job()
+        with self._lock:
+            self._purge()
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise QueueFullError(f'{self.pending} jobs are pending')
+            self.pending += 1
+            self._jobs[job.id] = job
+        self._pool.submit(self._run, job, func, args)
+        return job
+
+    def get(self, job_id):
+        """Return the job with the id or None if it is unknown or expired."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        """Return the queue counters."""
+        with self._lock:
+            return {'pending': self.pending, 'rejected': self.rejected, 'jobs': len(self._jobs)}
+
+    def shutdown(self, wait=True):
+        """Stop the worker threads."""
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job, func, args):
+        job.status = 'running'
+        try:
+            job.result = func(*args)
+            job.status = 'done'
+        except Exception as ex:
+            logging.error(f'Job {job.id} failed: {ex}')
+            job.error = str(ex)
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                self.pending -= 1
+            job._done.set()
+
+    def _purge(self):
+        expired = time.time() - self.ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < expired]:
+            del self._jobs[job_id]
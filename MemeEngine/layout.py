@@ -0,0 +1,189 @@
+"""Provide caption layout for the memes.
+
+The caption is wrapped to the image width with the largest font size whose
+block still fits into the safe area, then placed at a random position inside
+that area. The position is seeded by the caption and the image size, so the
+same meme always looks the same and stays addressable by the render cache.
+
+Word widths are measured once per (font, size) and lines are measured as the
+sum of their words, so wrapping a caption costs a few dictionary lookups;
+complete layouts of repeated captions are cached as well.
+"""
+import random
+import threading
+import zlib
+from collections import OrderedDict, namedtuple
+
+from .constants import FONT_PATH, CAPTION_MIN_FONT_SIZE, CAPTION_MAX_FONT_SIZE
+from .constants import CAPTION_MARGIN, CAPTION_MAX_HEIGHT, CAPTION_LINE_SPACING
+
+Caption = namedtuple('Caption', ['font', 'lines', 'box'])
+
+
+class CaptionLayout:
+    """Wrap, size and place captions with cached text measurements."""
+
+    def __init__(self, fonts, font_path=FONT_PATH, min_size=CAPTION_MIN_FONT_SIZE, max_size=CAPTION_MAX_FONT_SIZE,
+                 margin=CAPTION_MARGIN, max_height=CAPTION_MAX_HEIGHT, line_spacing=CAPTION_LINE_SPACING,
+                 max_layouts=4096, max_words=100000):
+        """Construct a new `CaptionLayout`.
+
+        :param fonts: the `FontRegistry` the fonts are loaded from.
+        :param font_path: the location of the TrueType file.
+        :param min_size: the smallest font size, used when no size fits.
+        :param max_size: the largest font size.
+        :param margin: the pixel distance of the caption from the image edges.
+        :param max_height: the fraction of the image height the caption may cover.
+        :param line_spacing: the line height as a multiple of the font height.
+        :param max_layouts: the number of complete layouts kept.
+        :param max_words: the number of word widths kept per font size.
+        """
+        self.fonts = fonts
+        self.font_path = font_path
+        self.min_size = min_size
+        self.max_size = max_size
+        self.margin = margin
+        self.max_height = max_height
+        self.line_spacing = line_spacing
+        self.max_layouts = max_layouts
+        self.max_words = max_words
+        self.hits = 0
+        self.misses = 0
+        self._widths = {}
+        self._heights = {}
+        self._layouts = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def identity(self) -> str:
+        """Return the description of everything that changes the layout, for the cache keys."""
+        return (f'{self.font_path}:{self.min_size}-{self.max_size}:{self.margin}:'
+                f'{self.max_height}:{self.line_spacing}')
+
+    def fit(self, text, image_size) -> Caption:
+        """Return the caption laid out on an image of the given size.
+
+        :param text: the caption.
+        :param image_size: the (width, height) of the image.
+        :return: the font, the ((x, y), line) pairs to draw and the (x, y, width, height) caption box.
+        """
+        key = (text, image_size)
+        with self._lock:
+            caption = self._layouts.get(key)
+            if caption is not None:
+                self._layouts.move_to_end(key)
+                self.hits += 1
+                return caption
+            self.misses += 1
+        caption = self._fit(text, image_size)
+        with self._lock:
+            self._layouts[key] = caption
+            if len(self._layouts) > self.max_layouts:
+                self._layouts.popitem(last=False)
+        return caption
+
+    def warm(self):
+        """Load the font in every size the layout may pick ahead of the first render."""
+        self.fonts.warm(range(self.min_size, self.max_size + 1), self.font_path)
+
+    def stats(self) -> dict:
+        """Return the layout cache counters."""
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'layouts': len(self._layouts),
+                    'words': sum(len(widths) for widths in self._widths.values())}
+
+    def wrap(self, words, size, max_width):
+        """Greedily break the words into lines no wider than max_width.
+
+        :return: the lines and the width of the widest one.
+        """
+        widths = self._word_widths(size)
+        space = self._width(widths, ' ', size)
+        lines, widest = [], 0
+        line, line_width = [], 0
+        for word in words:
+            width = self._width(widths, word, size)
+            if width > max_width:
+                *heads, word = self._split(word, size, max_width)
+                if line:
+                    lines.append(' '.join(line))
+                    widest = max(widest, line_width)
+                    line, line_width = [], 0
+                for head in heads:
+                    lines.append(head)
+                    widest = max(widest, self._width(widths, head, size))
+                width = self._width(widths, word, size)
+            if line and line_width + space + width <= max_width:
+                line.append(word)
+                line_width += space + width
+                continue
+            if line:
+                lines.append(' '.join(line))
+                widest = max(widest, line_width)
+            line, line_width = [word], width
+        if line:
+            lines.append(' '.join(line))
+            widest = max(widest, line_width)
+        return lines, widest
+
+    def _fit(self, text, image_size):
+        image_width, image_height = image_size
+        max_width = max(image_width - 2 * self.margin, 1)
+        max_height = max((image_height - 2 * self.margin) * self.max_height, 1)
+        words = text.split()
+        low, high = self.min_size, self.max_size
+        best = None
+        while low <= high:
+            size = (low + high) // 2
+            lines, widest = self.wrap(words, size, max_width)
+            height = len(lines) * self._line_height(size)
+            if height <= max_height:
+                best = (size, lines, widest, height)
+                low = size + 1
+            else:
+                high = size - 1
+        if best is None:
+            lines, widest = self.wrap(words, self.min_size, max_width)
+            best = (self.min_size, lines, widest, len(lines) * self._line_height(self.min_size))
+        size, lines, widest, height = best
+        rng = random.Random(zlib.crc32(text.encode('utf-8')) ^ (image_width << 16) ^ image_height)
+        x = rng.randint(self.margin, max(self.margin, image_width - self.margin - int(widest)))
+        y = rng.randint(self.margin, max(self.margin, image_height - self.margin - height))
+        line_height = self._line_height(size)
+        return Caption(self.fonts.get(self.font_path, size),
+                       tuple(((x, y + index * line_height), line) for index, line in enumerate(lines)),
+                       (x, y, int(widest), height))
+
+    def _word_widths(self, size):
+        widths = self._widths.get(size)
+        if widths is None or len(widths) > self.max_words:
+            widths = self._widths[size] = {}
+        return widths
+
+    def _width(self, widths, word, size):
+        width = widths.get(word)
+        if width is None:
+            width = widths[word] = self.fonts.get(self.font_path, size).getlength(word)
+        return width
+
+    def _line_height(self, size):
+        height = self._heights.get(size)
+        if height is None:
+            ascent, descent = self.fonts.get(self.font_path, size).getmetrics()
+            height = self._heights[size] = int((ascent + descent) * self.line_spacing)
+        return height
+
+    def _split(self, word, size, max_width):
+        """Break a word wider than the line into parts that fit, measured character by character."""
+        font = self.fonts.get(self.font_path, size)
+        parts, part = [], ''
+        for char in word:
+            if part and font.getlength(part + char) > max_width:
+                parts.append(part)
+                part = char
+            else:
+                part += char
+        parts.append(part)
+        return parts
@@ -1,45 +1,330 @@
 """Provide class MemeEngine for.
 
 Loading of a file from disk
-Transform image by resizing to a maximum width of 500px while maintaining the input aspect ratio
-Add a caption to an image (string input) with a body and author to a random location on the image.
+Transform image by resizing to a maximum width of 500px while maintaining the input aspect ratio,
+JPEG sources are decoded at the smallest DCT scale above the target and then resampled with a quality filter.
+Add a caption to an image (string input) with a body and author to a random location on the image,
+wrapped to the image width in the largest font size that fits.
 Save the result to the provided output diractory.
+Render several widths of the same meme from one decode and one caption layout.
+Encode the memes as baseline or progressive JPEG, WebP or AVIF with tunable presets.
 """
-from PIL import Image, ImageDraw, ImageFont
+from contextlib import contextmanager
+import io
 import random
 import logging
+import os
+import time
+
+from .constants import RESAMPLE, REDUCING_GAP, VARIANT_WIDTHS, OUTPUT_CODEC, ENCODE_PRESET
+from . import encoders
+from .fonts import FontRegistry
+from .layout import CaptionLayout
+
+
+RESAMPLING = {'nearest': 'NEAREST',
+              'bilinear': 'BILINEAR',
+              'bicubic': 'BICUBIC',
+              'lanczos': 'LANCZOS'}
+
+
+def _resampling(name):
+    """Return the Pillow resampling filter of the name, Pillow is imported on the first render."""
+    from PIL import Image
+    return Image.Resampling[RESAMPLING[name]]
+
+
+@contextmanager
+def _stage(name):
+    """Report the duration of the block to `MemeEngine.observer` when one is set."""
+    observer = MemeEngine.observer
+    if observer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observer(name, time.perf_counter() - started)
+
 
 class MemeEngine:
-    """Provide image operations for making a meme."""
+    """Provide image operations for making a meme.
 
-    def __init__(self, outputdir):
+    `observer` is called as `observer(stage, seconds)` after the decode, resize,
+    layout, draw, encode and write stages of every render.
+    """
+
+    fonts = FontRegistry()
+    layout = CaptionLayout(fonts)
+    observer = None
+
+    def __init__(self, outputdir, cache=None, source_cache=None, catalog=None,
+                 resample=RESAMPLE, encode_options=None, preset=ENCODE_PRESET, codec_options=None):
         """Construct a new `MemeEngine` from outputdir.
         
         :out_path {str}: the desired location for the output image.
+        :cache {RenderCache}: the optional cache of rendered memes.
+        :source_cache {SourceImageCache}: the optional cache of decoded source images.
+        :catalog {ImageCatalog}: the optional index of the source image dimensions.
+        :resample {str}: the resampling filter name, one of `RESAMPLING`.
+        :encode_options {dict}: the JPEG encoder options overriding `JPEG_OPTIONS`.
+        :preset {str}: the quality and effort preset of the encoders, one of `ENCODE_PRESETS`.
+        :codec_options {dict}: the encoder options by codec name overriding the preset.
         """
+        if resample not in RESAMPLING:
+            logging.error(f'Unknown resampling filter {resample}')
+            raise ValueError(f'Unknown resampling filter {resample}')
         self.out_path = outputdir
+        self.cache = cache
+        self.source_cache = source_cache
+        self.catalog = catalog
+        self.resample = resample
+        self.preset = preset
+        self.codec_options = encoders.codec_options(preset, codec_options)
+        self.codec_options['jpeg'].update(encode_options or {})
+        os.makedirs(outputdir, exist_ok=True)
         
-    def make_meme(self, img_path, text, author, width=500) -> str:
+    def make_meme(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> str:
         """Create a meme file With a Text from source image that is alocated by 'img_path' address.
         
         :in_path {str}: the file location for the input image.
         :text {str}: the text to put on the image.
         :author {str}: the author of the quote to put on image.
         :width {int}: The pixel width value. Default=500.
+        :codec {str}: the output codec name, one of `encoders.CODECS`.
         :return {str}: the file path to the output image.
         """
-        new_file_name = self.out_path + f'/{random.randint(0,100000000)}.jpg'
+        key = self.cache_key(img_path, text, author, width, codec)
+        extension = encoders.get_codec(codec).extension
+        if key is not None:
+            cached = self.cache.get(key, extension)
+            if cached is not None:
+                return cached
+        new_file_name = self.output_path(key, codec)
+        self.render(img_path, text, author, width, new_file_name, codec)
+        if key is not None:
+            self.cache.put(key, extension)
+        return new_file_name
+
+    def make_variants(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> dict:
+        """Create meme files in several widths, decoding the source and laying out the caption once.
+
+        The meme is drawn at the largest width and scaled down for the others.
+
+        :widths {list}: the pixel widths to create.
+        :codec {str}: the output codec name.
+        :return {dict}: the file path by width, narrowest first.
+        """
+        keys = self.variant_keys(img_path, text, author, widths, codec)
+        cached = self.cached_variants(keys, codec)
+        if cached is not None:
+            return cached
+        file_names = {width: self.output_path(key, codec) for width, key in keys.items()}
+        self.render_variants(img_path, text, author, file_names, codec)
+        for key in keys.values():
+            if key is not None:
+                self.cache.put(key, encoders.get_codec(codec).extension)
+        return file_names
+
+    def variant_keys(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> dict:
+        """Return the render cache key by width for `make_variants`, None values when the engine has no cache.
+
+        The largest width shares the key of `make_meme`, the smaller ones are scaled through
+        every larger width and get keys naming that chain.
+        """
+        widths = sorted(set(widths))
+        return {width: self.cache_key(img_path, text, author, '/'.join(map(str, widths[index:])), codec)
+                for index, width in enumerate(widths)}
+
+    def cached_variants(self, keys, codec=OUTPUT_CODEC) -> dict:
+        """Return the cached file path by width if every width is cached, None otherwise."""
+        if self.cache is None:
+            return None
+        extension = encoders.get_codec(codec).extension
+        paths = {}
+        for width, key in keys.items():
+            paths[width] = self.cache.get(key, extension)
+            if paths[width] is None:
+                return None
+        return paths
+
+    def cache_key(self, img_path, text, author, width=500, codec=OUTPUT_CODEC):
+        """Return the render cache key for the meme or None when the engine has no cache."""
+        if self.cache is None:
+            return None
         try:
-            with Image.open(img_path) as image:
-                ratio = width/float(image.size[0])
-                height = int(ratio*float(image.size[1]))
-                image = image.resize((width, height), Image.NEAREST)
-                draw = ImageDraw.Draw(image)
-                fnt = ImageFont.truetype('./fonts/LilitaOne-Regular.ttf', size=15)
-                text_to_draw = text + '. ' + author
-                draw.text((40, 40), text_to_draw, font=fnt, fill=(255, 255, 255, 255))
-                image.convert('RGB').save(new_file_name)
+            return self.cache.key(img_path, text, author, width, font=self.identity(codec))
         except FileNotFoundError:
-            logging.error(f'Cannot open file {new_file_name}')
-            raise FileNotFoundError(f'Cannot open file {new_file_name}')
-        return new_file_name
+            logging.error(f'Cannot open file {img_path}')
+            raise FileNotFoundError(f'Cannot open file {img_path}')
+
+    def identity(self, codec=OUTPUT_CODEC) -> str:
+        """Return the identity of the font, the filter, the codec and its encoder options for the cache keys."""
+        encoders.get_codec(codec)
+        options = ','.join(f'{name}={value}' for name, value in sorted(self.codec_options[codec].items()))
+        return f'{self.layout.identity}:{self.resample}:{codec}:{options}'
+
+    @property
+    def variant(self) -> str:
+        """Return the identity of the default codec output for the cache keys."""
+        return self.identity()
+
+    def output_path(self, key=None, codec=OUTPUT_CODEC) -> str:
+        """Return the file path for the output image addressed by the cache key."""
+        extension = encoders.get_codec(codec).extension
+        if key is None:
+            return self.out_path + f'/{random.randint(0,100000000)}.{extension}'
+        return self.cache.path_for(key, extension)
+
+    def render(self, img_path, text, author, width, file_name, codec=OUTPUT_CODEC) -> str:
+        """Draw the meme and save it to the file name, bypassing the render cache.
+
+        :return {str}: the file path to the output image.
+        """
+        image_format, options = self._encoder(codec)
+        image = self._draw(img_path, text, author, width, file_name)
+        self._save(image.convert('RGB'), file_name, options, image_format)
+        return file_name
+
+    def render_variants(self, img_path, text, author, file_names, codec=OUTPUT_CODEC) -> dict:
+        """Draw the meme once and save it in every width, bypassing the render cache.
+
+        :file_names {dict}: the output file path by width.
+        :return {dict}: the file names.
+        """
+        image_format, options = self._encoder(codec)
+        for width, image in self._draw_variants(img_path, text, author, file_names, img_path).items():
+            self._save(image, file_names[width], options, image_format)
+        return file_names
+
+    def render_variants_bytes(self, img_path, text, author, widths=VARIANT_WIDTHS, codec=OUTPUT_CODEC) -> dict:
+        """Draw the meme once and encode it in every width in memory.
+
+        :return {dict}: the encoded image by width, narrowest first.
+        """
+        image_format, options = self._encoder(codec)
+        return {width: self._encode(image, options, image_format)
+                for width, image in self._draw_variants(img_path, text, author, widths, img_path).items()}
+
+    def render_bytes(self, img_path, text, author, width=500, codec=OUTPUT_CODEC) -> bytes:
+        """Draw the meme and encode it in memory without writing to disk.
+
+        :return {bytes}: the encoded image.
+        """
+        image_format, options = self._encoder(codec)
+        image = self._draw(img_path, text, author, width, img_path)
+        return self._encode(image.convert('RGB'), options, image_format)
+
+    def target_size(self, img_path, width=500):
+        """Return the (width, height) of the resized source image from the catalog, None if it is unknown.
+
+        The size is planned from the indexed dimensions without opening the file, an entry whose
+        size or mtime no longer matches the file is ignored and the decoded size is used instead.
+        """
+        if self.catalog is None or hasattr(img_path, 'read'):
+            return None
+        entry = self.catalog.get(img_path)
+        if entry is None or not entry.width:
+            return None
+        try:
+            stat = os.stat(img_path)
+        except OSError:
+            return None
+        if stat.st_size != entry.size or stat.st_mtime_ns != entry.mtime_ns:
+            return None
+        return width, int(width / float(entry.width) * entry.height)
+
+    def _encoder(self, codec):
+        """Return the Pillow format and the encoder options of the codec.
+
+        :raise ValueError: if the codec is unknown or the installed Pillow cannot write it.
+        """
+        if not encoders.available(codec):
+            logging.error(f'Output codec {codec} is not available')
+            raise ValueError(f'Output codec {codec} is not available')
+        return encoders.get_codec(codec).format, self.codec_options[codec]
+
+    def _draw(self, img_path, text, author, width, file_name):
+        """Return the resized source image with the caption drawn on it."""
+        try:
+            image = self._load_source(img_path, width)
+        except FileNotFoundError:
+            logging.error(f'Cannot open file {file_name}')
+            raise FileNotFoundError(f'Cannot open file {file_name}')
+        with _stage('layout'):
+            caption = self.layout.fit(text + '. ' + author, image.size)
+        with _stage('draw'):
+            from PIL import ImageDraw
+            draw = ImageDraw.Draw(image)
+            for position, line in caption.lines:
+                draw.text(position, line, font=caption.font, fill=(255, 255, 255, 255))
+        return image
+
+    def _draw_variants(self, img_path, text, author, widths, file_name):
+        """Return the meme drawn at the largest width and scaled down to the other widths.
+
+        Every width is scaled from the next larger one, so each pass reads the smallest image it can.
+        """
+        widths = sorted(set(widths), reverse=True)
+        image = self._draw(img_path, text, author, widths[0], file_name).convert('RGB')
+        variants = {}
+        for width in widths:
+            if width != image.width:
+                with _stage('resize'):
+                    image = image.resize((width, max(round(image.height * width / image.width), 1)),
+                                         _resampling(self.resample), reducing_gap=REDUCING_GAP)
+            variants[width] = image
+        return dict(reversed(variants.items()))
+
+    def _load_source(self, img_path, width):
+        """Return the source image resized to the width, from the cache when possible."""
+        size = self.target_size(img_path, width)
+        if self.source_cache is None or hasattr(img_path, 'read'):
+            return self._decode(img_path, width, size, self.resample)
+        return self.source_cache.get(img_path, width,
+                                     lambda path, width: self._decode(path, width, size, self.resample))
+
+    @staticmethod
+    def _decode(img_path, width, size=None, resample=RESAMPLE):
+        """Load the image and resize it to the width keeping the aspect ratio.
+
+        JPEG images are decoded in draft mode at the smallest 1/2, 1/4 or 1/8 scale
+        that is still larger than the target, other formats are reduced by an integer
+        factor before the final resampling pass.
+
+        :size {tuple}: the planned target size, computed from the image when None.
+        :resample {str}: the resampling filter name.
+        """
+        from PIL import Image
+        with Image.open(img_path) as image:
+            with _stage('decode'):
+                if size is None:
+                    ratio = width/float(image.size[0])
+                    size = (width, int(ratio*float(image.size[1])))
+                image.draft('RGB', size)
+                image.load()
+            with _stage('resize'):
+                return image.resize(size, _resampling(resample), reducing_gap=REDUCING_GAP)
+
+    @staticmethod
+    def _encode(image, options=None, image_format='JPEG') -> bytes:
+        """Return the image encoded in the Pillow format."""
+        with _stage('encode'):
+            buffer = io.BytesIO()
+            image.save(buffer, image_format, **(options or {}))
+            return buffer.getvalue()
+
+    @classmethod
+    def _save(cls, image, file_name, options=None, image_format='JPEG'):
+        """Write the image next to its destination and move it in place in one step."""
+        data = cls._encode(image, options, image_format)
+        tmp_file_name = f'{file_name}.{random.randint(0,100000000)}.tmp'
+        try:
+            with _stage('write'):
+                with open(tmp_file_name, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_file_name, file_name)
+        finally:
+            if os.path.exists(tmp_file_name):
+                os.remove(tmp_file_name)
@@ -0,0 +1,225 @@
+"""Provide pool of pre-rendered memes for the random route.
+
+The bundled images and quotes make a small, static set of combinations,
+so a configurable number of them is rendered ahead of time by a background
+thread and a random one is served in O(1). Every combination is rendered in
+each of the pool widths and codecs, so a pool page offers the same `srcset`
+in the same negotiated format as a live render. When the source images or quotes
+change, or an image is modified in place, the pool drops the combinations that
+are gone or stale and refills itself incrementally; files already rendered by
+a previous run are reused.
+"""
+import hashlib
+import logging
+import math
+import os
+import random
+import threading
+
+from .constants import OUTPUT_CODEC
+from .encoders import available, get_codec
+from .meme_engine import MemeEngine
+
+
+class PrerenderPool:
+    """Background-filled set of rendered memes picked at random."""
+
+    def __init__(self, outputdir, size=100, widths=(500,), codecs=(OUTPUT_CODEC,), engine=None):
+        """Construct a new empty `PrerenderPool`.
+
+        :param outputdir: the directory of the pre-rendered files.
+        :param size: the number of combinations to keep rendered, None renders all of them.
+        :param widths: the pixel widths every meme is rendered in.
+        :param codecs: the output codec names every meme is rendered in, the ones
+            the installed Pillow cannot write are skipped by the first `refresh`.
+        :param engine: the engine to render with, a new one over outputdir by default.
+        """
+        self.out_path = outputdir
+        self.size = size
+        self.widths = tuple(sorted(widths))
+        self.codecs = tuple(codecs)
+        self.engine = engine or MemeEngine(outputdir)
+        self.rendered = 0
+        self._paths = []
+        self._combos = []
+        self._entries = {}
+        self._images = []
+        self._mtimes = {}
+        self._rendered_mtimes = {}
+        self._quotes = []
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._thread = None
+        self._stopped = False
+
+    def refresh(self, images, quotes):
+        """Use new sources, drop the combinations that are gone and refill in the background.
+
+        :param images: the source image paths.
+        :param quotes: the quotes, a `QuoteStore` or a list of `QuoteModel`.
+        """
+        images = list(images)
+        mtimes = {image: self._mtime(image) for image in images}
+        codecs = tuple(codec for codec in self.codecs if available(codec))
+        with self._lock:
+            self.codecs = codecs
+            self._images = images
+            self._mtimes = mtimes
+            self._quotes = quotes
+            for combo in [combo for combo in self._combos
+                          if not self._valid(combo) or self._rendered_mtimes[combo] != mtimes[combo[0]]]:
+                self._remove(combo)
+            self._wake.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._fill, name='prerender', daemon=True)
+                self._thread.start()
+
+    def pick(self, codec=None):
+        """Return the file paths by width of a random pre-rendered meme.
+
+        :param codec: the output codec name, the first of the pool codecs by default.
+        :return: None while the pool is empty or when the codec is not pre-rendered.
+        """
+        codec = codec or self.codecs[0]
+        if codec not in self.codecs:
+            return None
+        try:
+            return random.choice(self._paths)[codec]
+        except IndexError:
+            return None
+
+    def wait(self, timeout=None) -> bool:
+        """Wait until the pool is full and tell if it is."""
+        with self._lock:
+            return self._wake.wait_for(lambda: len(self._entries) >= self._target(), timeout)
+
+    def stop(self):
+        """Stop the background thread."""
+        with self._lock:
+            self._stopped = True
+            self._wake.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __len__(self):
+        """Return the number of pre-rendered memes."""
+        return len(self._paths)
+
+    def _valid(self, combo):
+        return combo[0] in self._mtimes and combo[1] in self._quotes
+
+    def _target(self):
+        total = len(self._images) * len(self._quotes)
+        return total if self.size is None else min(self.size, total)
+
+    def _add(self, combo, paths, mtime):
+        self._entries[combo] = len(self._paths)
+        self._paths.append(paths)
+        self._combos.append(combo)
+        self._rendered_mtimes[combo] = mtime
+
+    def _remove(self, combo):
+        """Drop the combination in O(1) by moving the last entry in its place."""
+        index = self._entries.pop(combo)
+        del self._rendered_mtimes[combo]
+        paths = self._paths[index]
+        last_paths, last_combo = self._paths.pop(), self._combos.pop()
+        if index < len(self._paths):
+            self._paths[index] = last_paths
+            self._combos[index] = last_combo
+            self._entries[last_combo] = index
+        self._delete(paths)
+
+    @staticmethod
+    def _delete(paths):
+        for path in [path for by_width in paths.values() for path in by_width.values()]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _mtime(image):
+        try:
+            return os.stat(image).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def _candidates(total):
+        """Yield every index below total once in a random order, drawn lazily.
+
+        The indexes are a random start plus multiples of a random step coprime with total,
+        so no permutation of the whole range is built.
+        """
+        step = 1
+        while total > 2:
+            step = random.randrange(1, total)
+            if math.gcd(step, total) == 1:
+                break
+        start = random.randrange(total)
+        for i in range(total):
+            yield (start + i * step) % total
+
+    def _next_combo(self):
+        """Return a combination that is not rendered yet, None when the pool is full."""
+        if len(self._entries) >= self._target():
+            return None
+        images, quotes = self._images, self._quotes
+        total = len(images) * len(quotes)
+        if self.size is None or total <= 2 * self.size:
+            candidates = self._candidates(total)
+        else:
+            candidates = (random.randrange(total) for _ in range(4 * self.size))
+        for index in candidates:
+            combo = (images[index % len(images)], quotes[index // len(images)])
+            if combo not in self._entries:
+                return combo
+        return None
+
+    def _file_name(self, combo, mtime, width, codec):
+        image, quote = combo
+        h = hashlib.sha256()
+        for part in (image, quote.body, quote.author, mtime, width, codec, self.engine.variant):
+            h.update(str(part).encode('utf-8'))
+            h.update(b'\0')
+        return self.out_path + f'/{h.hexdigest()[:32]}.{get_codec(codec).extension}'
+
+    def _fill(self):
+        while True:
+            with self._lock:
+                combo = None
+                while not self._stopped:
+                    combo = self._next_combo()
+                    if combo is not None:
+                        break
+                    self._wake.notify_all()
+                    self._wake.wait()
+                if self._stopped:
+                    return
+                mtime = self._mtimes[combo[0]]
+            image, quote = combo
+            try:
+                if mtime is None:
+                    raise FileNotFoundError(f'Cannot open file {image}')
+                paths = {codec: {width: self._file_name(combo, mtime, width, codec) for width in self.widths}
+                         for codec in self.codecs}
+                missing = [codec for codec, by_width in paths.items()
+                           if not all(os.path.exists(path) for path in by_width.values())]
+                for codec in missing:
+                    self.engine.render_variants(image, quote.body, quote.author, paths[codec], codec)
+                if missing:
+                    self.rendered += 1
+            except (OSError, ValueError) as ex:
+                logging.error(f'Cannot pre-render {image}: {ex}')
+                with self._lock:
+                    self._images = [source for source in self._images if source != image]
+                    self._mtimes.pop(image, None)
+                continue
+            with self._lock:
+                if combo in self._entries:
+                    continue
+                if self._valid(combo) and self._mtimes[image] == mtime:
+                    self._add(combo, paths, mtime)
+                else:
+                    self._delete(paths)
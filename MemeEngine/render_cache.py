@@ -0,0 +1,201 @@
+"""Provide content-addressed cache for rendered memes.
+
+Output files are named after a hash of everything that changes the picture:
+the source image bytes, the caption text, the author, the width, the font and
+the output codec. Files of every codec share the directory, each with its own extension.
+A hit returns the existing output path without touching Pillow.
+The files on disk are kept within an entry and byte budget,
+the least recently used ones are evicted first.
+"""
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """LRU cache of rendered meme files addressed by their content hash."""
+
+    name_pattern = re.compile(r'^[0-9a-f]{32}\.[0-9a-z]+$')
+
+    def __init__(self, directory, max_entries=1000, max_bytes=256 * 1024 * 1024, extension='jpg'):
+        """Construct a new `RenderCache` over the directory.
+
+        :param directory: the location of the rendered files.
+        :param max_entries: the maximum number of files to keep.
+        :param max_bytes: the maximum total size of the files to keep.
+        :param extension: the extension of the rendered files when none is given.
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._digests = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def key(self, img, text, author, width, font='') -> str:
+        """Build the cache key for a render.
+
+        :param img: the file location or the file object of the source image.
+        :param text: the text to put on the image.
+        :param author: the author of the quote.
+        :param width: the pixel width of the output.
+        :param font: the identity of the font the caption is drawn with.
+        :return: the hex digest addressing the output file.
+        """
+        h = hashlib.sha256()
+        for part in (self._source_digest(img), text, author, str(width), font):
+            h.update(str(part).encode('utf-8'))
+            h.update(b'\0')
+        return h.hexdigest()[:32]
+
+    def path_for(self, key, extension=None) -> str:
+        """Return the output file path for the key."""
+        return self.directory + '/' + self._name(key, extension)
+
+    def get(self, key, extension=None):
+        """Return the path of the rendered file for the key or None on a miss."""
+        name = self._name(key, extension)
+        path = self.directory + '/' + name
+        with self._lock:
+            if name in self._entries:
+                if os.path.exists(path):
+                    self._entries.move_to_end(name)
+                    self.hits += 1
+                    return path
+                self.bytes -= self._entries.pop(name)
+            self.misses += 1
+        return None
+
+    def put(self, key, extension=None) -> str:
+        """Register the rendered file for the key and evict files over the budget.
+
+        :return: the path of the rendered file.
+        """
+        name = self._name(key, extension)
+        path = self.directory + '/' + name
+        size = os.path.getsize(path)
+        with self._lock:
+            if name in self._entries:
+                self.bytes -= self._entries.pop(name)
+            self._entries[name] = size
+            self.bytes += size
+            self._evict()
+        return path
+
+    def stats(self) -> dict:
+        """Return the cache counters."""
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries),
+                    'bytes': self.bytes}
+
+    def _evict(self):
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            name, size = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.directory + '/' + name)
+            except FileNotFoundError:
+                pass
+
+    def _load(self):
+        """Adopt the files rendered by previous runs, oldest first."""
+        found = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not self.name_pattern.match(entry.name):
+                    continue
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self.bytes += size
+        self._evict()
+        if found:
+            logging.info(f'Render cache adopted {len(self._entries)} files from {self.directory}')
+
+    def _name(self, key, extension):
+        return f'{key}.{extension or self.extension}'
+
+    def _source_digest(self, img) -> str:
+        if hasattr(img, 'read'):
+            position = img.tell()
+            data = img.read()
+            img.seek(position)
+            return hashlib.sha256(data).hexdigest()
+        stat = os.stat(img)
+        stamp = (str(img), stat.st_size, stat.st_mtime_ns)
+        digest = self._digests.get(stamp)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(img, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    h.update(chunk)
+            digest = h.hexdigest()
+            self._digests[stamp] = digest
+        return digest
+
+
+class BytesCache:
+    """LRU cache of encoded memes kept in memory."""
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """Construct a new `BytesCache`.
+
+        :param max_bytes: the maximum total size of the kept images.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the encoded image for the key or None on a miss."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """Keep the encoded image and evict images over the budget."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old)
+            self._entries[key] = data
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Return the cache counters."""
+        with self._lock:
+            return {'hits': self.hits,
+                    'misses': self.misses,
+                    'evictions': self.evictions,
+                    'entries': len(self._entries),
+                    'bytes': self.bytes}
@@ -0,0 +1,168 @@
+"""Provide on-disk cache of parsed quote files.
+
+Parsing a pdf spawns `pdftotext` and parsing a docx unzips and walks the XML,
+so the parsed quotes are kept in a SQLite file keyed by the source path.
+A file is re-parsed only when its size, mtime and content hash changed:
+a matching size and mtime is trusted as is, otherwise the content hash decides.
+
+The quotes of a file are written as a new generation in short batches while
+the file is parsed; the `files` row is switched to it and the previous
+generation deleted in one final transaction, so readers never see a partial
+file and the parse never holds the whole file in memory.
+"""
+import hashlib
+import logging
+import os
+import random
+import sqlite3
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional
+
+from .models import QuoteModel
+
+
+class CorpusCache:
+    """SQLite store of the quotes parsed from each source file."""
+
+    schema = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            digest TEXT NOT NULL,
+            generation INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS quotes (
+            path TEXT NOT NULL,
+            generation INTEGER NOT NULL,
+            position INTEGER NOT NULL,
+            body TEXT NOT NULL,
+            author TEXT NOT NULL,
+            PRIMARY KEY (path, generation, position)
+        ) WITHOUT ROWID;
+    """
+    batch_size = 1000
+
+    def __init__(self, db_path: str):
+        """Construct a new `CorpusCache` stored in the db_path file.
+
+        :param db_path: the location of the SQLite file, it is created when missing.
+        """
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            columns = [row[1] for row in db.execute('PRAGMA table_info(files)')]
+            if columns and 'generation' not in columns:
+                db.executescript('DROP TABLE files; DROP TABLE IF EXISTS quotes;')
+            db.executescript(self.schema)
+
+    def is_fresh(self, path: str) -> bool:
+        """Tell if the cached quotes of the file are up to date.
+
+        :param path: the file path on the disk.
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._connect() as db:
+            row = db.execute('SELECT size, mtime_ns, digest FROM files WHERE path = ?', (key,)).fetchone()
+            if row is None or row[0] != stat.st_size:
+                self.misses += 1
+                return False
+            if row[1] != stat.st_mtime_ns:
+                if row[2] != self._digest(path):
+                    self.misses += 1
+                    return False
+                db.execute('UPDATE files SET mtime_ns = ? WHERE path = ?', (stat.st_mtime_ns, key))
+        self.hits += 1
+        return True
+
+    def iter_quotes(self, path: str) -> Iterator[QuoteModel]:
+        """Yield the cached quotes of the file in their original order.
+
+        :param path: the file path on the disk.
+        """
+        with self._connect() as db:
+            rows = db.execute('SELECT body, author FROM quotes JOIN files USING (path, generation) '
+                              'WHERE path = ? ORDER BY position', (os.path.abspath(path),))
+            for body, author in rows:
+                yield QuoteModel(body, author)
+
+    def load(self, path: str) -> Optional[List[QuoteModel]]:
+        """Return the cached quotes of the file or None if the file changed since it was stored.
+
+        :param path: the file path on the disk.
+        """
+        if not self.is_fresh(path):
+            return None
+        return list(self.iter_quotes(path))
+
+    def record(self, path: str, quotes: Iterable[QuoteModel]) -> Iterator[QuoteModel]:
+        """Pass the parsed quotes through while storing them as the cached quotes of the file.
+
+        The rows are written as a new generation in transactions of `batch_size` rows,
+        the file switches to it once the whole file was read. A parse that fails or is
+        not read to the end leaves the cached quotes as they were.
+
+        :param path: the file path on the disk.
+        :param quotes: the quotes parsed from the file.
+        """
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        digest = self._digest(path)
+        generation = random.getrandbits(62)
+        rows, count, done = [], 0, False
+        try:
+            for quote in quotes:
+                rows.append((key, generation, count, quote.body, quote.author))
+                count += 1
+                if len(rows) >= self.batch_size:
+                    self._write(rows)
+                    rows = []
+                yield quote
+            self._write(rows)
+            with self._connect() as db:
+                db.execute('DELETE FROM quotes WHERE path = ? AND generation = '
+                           '(SELECT generation FROM files WHERE path = ?)', (key, key))
+                db.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)',
+                           (key, stat.st_size, stat.st_mtime_ns, digest, generation))
+            done = True
+        finally:
+            if not done:
+                with self._connect() as db:
+                    db.execute('DELETE FROM quotes WHERE path = ? AND generation = ?', (key, generation))
+        logging.info(f'Cached {count} quotes from {path}')
+
+    def store(self, path: str, quotes: Iterable[QuoteModel]):
+        """Replace the cached quotes of the file.
+
+        :param path: the file path on the disk.
+        :param quotes: the quotes parsed from the file.
+        """
+        for _ in self.record(path, quotes):
+            pass
+
+    def _write(self, rows):
+        with self._connect() as db:
+            db.executemany('INSERT INTO quotes VALUES (?, ?, ?, ?, ?)', rows)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            db.execute('PRAGMA journal_mode=WAL')
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _digest(path: str) -> str:
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b''):
+                h.update(chunk)
+        return h.hexdigest()
@@ -1,23 +1,84 @@
 
 """Provide class for ingesting data from different types of files."""
-from typing import List
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Iterator, List, Sequence, Tuple
 from .models import IngestorInterface
 from .models import CSVIngestor, PdfIngestor, DocxIngestor, TextIngestor
 from .models import QuoteModel
 
 
 class Ingestor(IngestorInterface):
-    """Ingestor class encapsulates all helper classes for parsing different types of files."""
+    """Ingestor class encapsulates all helper classes for parsing different types of files.
+
+    `observer` is called as `observer('parse', seconds, format=extension)` after every parsed file.
+    """
 
     importers = [CSVIngestor, PdfIngestor, DocxIngestor, TextIngestor]
+    cache = None
+    observer = None
 
     @classmethod
-    def parse(cls, path: str) -> List[QuoteModel]:
-        """Select appropriate helper class for a given file path, based on the filetype.
+    def iter_parse(cls, path: str) -> Iterator[QuoteModel]:
+        """Select appropriate helper class for a given file path, based on the filetype, and stream its quotes.
+
+        When `Ingestor.cache` holds a `CorpusCache` the quotes of unchanged files
+        are streamed from it and the freshly parsed ones are stored in it.
 
         :path: the file path
-        :return: the list of qutes objects 'QuoteModel'
+        :return: the qutes objects 'QuoteModel' one by one
         """
+        if cls.cache is not None and os.path.exists(path) and cls.cache.is_fresh(path):
+            yield from cls.cache.iter_quotes(path)
+            return
         for importer in cls.importers:
             if importer.can_ingest(path):
-                return importer.parse(path)
+                quotes = importer.iter_parse(path)
+                if cls.cache is not None:
+                    quotes = cls.cache.record(path, quotes)
+                yield from quotes
+                return
+        logging.error(f'Cannot ingest {path}')
+        raise Exception('Cannot ingest', path)
+
+    @classmethod
+    def parse(cls, path: str) -> List[QuoteModel]:
+        """Parse all quotes of the file, reporting the duration to `observer` when one is set.
+
+        :path: the file path
+        :return: the list of qutes objects 'QuoteModel'
+        """
+        started = time.perf_counter()
+        quotes = super().parse(path)
+        if cls.observer is not None:
+            cls.observer('parse', time.perf_counter() - started, format=os.path.splitext(path)[1].lstrip('.').lower())
+        return quotes
+
+    @classmethod
+    def parse_many(cls, paths: Sequence[str], workers: int = None,
+                   processes: bool = False) -> Tuple[List[QuoteModel], Dict[str, Exception]]:
+        """Parse several files concurrently.
+
+        A file that fails to parse does not abort the others, its error is collected instead.
+
+        :paths: the file paths
+        :workers: the number of threads or processes, one per file by default
+        :processes: parse on a process pool instead of a thread pool
+        :return: the qutes of all files in the order of paths and the errors by path
+        """
+        paths = list(paths)
+        quotes, errors = [], {}
+        if not paths:
+            return quotes, errors
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(max_workers=workers or len(paths)) as executor:
+            futures = [executor.submit(cls.parse, path) for path in paths]
+            for path, future in zip(paths, futures):
+                try:
+                    quotes.extend(future.result())
+                except Exception as ex:
+                    logging.error(f'Cannot parse {path}: {ex}')
+                    errors[path] = ex
+        return quotes, errors
@@ -1,29 +1,36 @@
 """Provide classes for ingesting data from different types of files.
 
-Module contains abstract class with two methods 'can_ingest', 'parse' and
+Module contains abstract class with methods 'can_ingest', 'iter_parse' and 'parse' and
 then realizes this class with several different classes:
 CSVIngestor, PdfIngestor, DocxIngestor and TextIngestor.
 
 Each class knows the strategy how to parse the file of relevant type.
+The quotes are streamed from the file one by one, so memory use stays flat
+no matter how big the file is.
 """
-from typing import List
+from typing import Iterator, List
 import csv
+import io
 import os
 import logging
+import shutil
 import subprocess
+import zipfile
 from abc import ABC, abstractmethod
-from docx import Document
-import docx
-import random
+from itertools import islice
 from string import whitespace
+from xml.etree import ElementTree
 
 from .constants import QUOTE_AUTHOR_SEPARATOR
 from .exceptions import InvalidFileException
+from . import pdf_text
 
 
 class QuoteModel:
     """QuoteModel with two fields: 'body' and 'author'."""
 
+    __slots__ = ('body', 'author')
+
     def __init__(self, body, author):
         """Construct a new `QuoteModel` from quote and the author.
 
@@ -39,14 +46,16 @@ class QuoteModel:
         :param __o: the object to compare
         :return: the result of comparing
         """
+        if not isinstance(__o, QuoteModel):
+            return NotImplemented
         return self.body == __o.body and self.author == __o.author
     
     def __hash__(self):
-        """Hash object.
+        """Hash object consistently with `__eq__`.
         
-        :return: the object address
+        :return: the hash of the body and the author
         """
-        return id(self)
+        return hash((self.body, self.author))
     
     def __repr__(self):
         """Define object representation for the output."""
@@ -59,9 +68,9 @@ class IngestorInterface(ABC):
     An 'IngestorInterface' represents the parsing method for some text
     in the file and turing it into the object .
 
-    It is used as class object with calling the parse method.
+    It is used as class object with calling the parse or iter_parse method.
 
-    Concrete subclasses can override the `parse` classmethod to provide custom
+    Concrete subclasses can override the `iter_parse` classmethod to provide custom
     behavior to be able to ingest data from the file.
     """
 
@@ -79,8 +88,8 @@ class IngestorInterface(ABC):
 
     @classmethod
     @abstractmethod
-    def parse(cls, path: str) -> List[QuoteModel]:
-        """Parse text from file and turn it into the list of models 'QuoteModel'.
+    def iter_parse(cls, path: str) -> Iterator[QuoteModel]:
+        """Parse text from file and yield the models 'QuoteModel' one by one.
 
         Concrete subclasses must override this method to be able to
         parse the text from file based on filetype.
@@ -89,6 +98,28 @@ class IngestorInterface(ABC):
         """
         pass
 
+    @classmethod
+    def parse(cls, path: str) -> List[QuoteModel]:
+        """Parse text from file and turn it into the list of models 'QuoteModel'.
+
+        :param path: the file path on the disk.
+        """
+        return list(cls.iter_parse(path))
+
+    @classmethod
+    def iter_batches(cls, path: str, size: int = 1000) -> Iterator[List[QuoteModel]]:
+        """Parse text from file and yield lists of at most size models 'QuoteModel'.
+
+        :param path: the file path on the disk.
+        :param size: the number of quotes in a batch.
+        """
+        quotes = cls.iter_parse(path)
+        while True:
+            batch = list(islice(quotes, size))
+            if not batch:
+                return
+            yield batch
+
 
 class CSVIngestor(IngestorInterface):
     """A sublass for IngestorInterface superclass for dealing with csv file."""
@@ -96,8 +127,8 @@ class CSVIngestor(IngestorInterface):
     type_ = ['csv']
 
     @classmethod
-    def parse(cls, path: str) -> List[QuoteModel]:
-        """Parse text from csv file and turn it into the list of models 'QuoteModel'.
+    def iter_parse(cls, path: str) -> Iterator[QuoteModel]:
+        """Parse text from csv file and yield the models 'QuoteModel'.
 
         :param path: the file path on the disk.
         :return: the sequence of 'QuoteModel'
@@ -106,70 +137,84 @@ class CSVIngestor(IngestorInterface):
             logging.error(f'Cannot ingest {path}')
             raise Exception('Cannot ingest', path)
 
-        quotes = []
         try:
             with open(path) as f:
                 reader = csv.DictReader(f)
                 for row in reader:
-                    quotes.append(QuoteModel(row['body'], row['author']))
+                    yield QuoteModel(row['body'], row['author'])
         except KeyError:
             logging.error('Csv file has wrong header names')
             raise InvalidFileException('Csv file {path} has invalid content')
         except FileNotFoundError:
             logging.error(f'Cannot open file {path}')
             raise FileNotFoundError(f'Cannot open file {path}')
-        return quotes
 
 
 class PdfIngestor(IngestorInterface):
-    """A sublass for IngestorInterface superclass for dealing with pdf file."""
+    """A sublass for IngestorInterface superclass for dealing with pdf file.
+
+    The text is read from the stdout of `pdftotext` without a temporary file,
+    or extracted in-process when the binary is not installed.
+    """
 
     type_ = ['pdf']
 
     @classmethod
-    def parse(cls, path: str) -> List[QuoteModel]:
-        """Parse text from pdf file and turn it into the list of models 'QuoteModel'.
+    def iter_parse(cls, path: str) -> Iterator[QuoteModel]:
+        """Parse text from pdf file and yield the models 'QuoteModel'.
 
         :param path: the filepath on the disk.
         :return: the sequence of 'QuoteModel'
         """
         if not cls.can_ingest(path):
             raise Exception('Cannot ingest', path)
-
-        tmp = f'./{random.randint(0,100000000)}.txt'
-        call = subprocess.call(['pdftotext', path, tmp])
-
-        file_ref = open(tmp, 'r')
-        quotes = []
+        if not os.path.isfile(path):
+            logging.error(f'Cannot open file {path}')
+            raise FileNotFoundError(f'Cannot open file {path}')
 
         try:
-            for line in file_ref:
+            for line in cls.iter_lines(path):
                 items = line.strip().split(' "')
                 for item in items:
                     parsed_item = item.split(QUOTE_AUTHOR_SEPARATOR)
                     if len(parsed_item) >= 2:
-                        quotes.append(
-                            QuoteModel(parsed_item[0].strip(whitespace + '"'), parsed_item[1].strip(whitespace + '"'))
-                        )
-        except FileNotFoundError:
-            logging.error(f'Cannot open file {path}')
-            raise FileNotFoundError(f'Cannot open file {path}')
+                        yield QuoteModel(parsed_item[0].strip(whitespace + '"'), parsed_item[1].strip(whitespace + '"'))
         except IndexError:
             logging.error(f'Pdf file {path} has wrongly built data.')
             raise InvalidFileException(f'Pdf file {path} has invalid content')
-        file_ref.close()
-        os.remove(tmp)
-        return quotes
+
+    @staticmethod
+    def iter_lines(path: str) -> Iterator[str]:
+        """Yield the text lines of the pdf file.
+
+        :param path: the filepath on the disk.
+        """
+        if shutil.which('pdftotext') is None:
+            yield from pdf_text.iter_lines(path)
+            return
+        with subprocess.Popen(['pdftotext', path, '-'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as proc:
+            yield from io.TextIOWrapper(proc.stdout, encoding='utf-8', errors='replace')
+        if proc.returncode != 0:
+            logging.error(f'pdftotext failed on {path} with exit code {proc.returncode}')
+            raise InvalidFileException(f'Pdf file {path} has invalid content')
 
 
 class DocxIngestor(IngestorInterface):
-    """A sublass for IngestorInterface superclass for dealing with docx file."""
+    """A sublass for IngestorInterface superclass for dealing with docx file.
+
+    The document part is streamed out of the zip archive with `iterparse`,
+    so only one paragraph is held in memory at a time. Paragraph text follows
+    python-docx: the runs directly inside a body paragraph, with tabs and breaks.
+    """
 
     type_ = ['docx']
 
+    namespace = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+    office_document = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
     @classmethod
-    def parse(cls, path: str) -> List[QuoteModel]:
-        """Parse text from docx file and turn it into the list of models 'QuoteModel'.
+    def iter_parse(cls, path: str) -> Iterator[QuoteModel]:
+        """Parse text from docx file and yield the models 'QuoteModel'.
 
         :param path: the filepath on the disk.
         :return: the sequence of 'QuoteModel'
@@ -178,26 +223,74 @@ class DocxIngestor(IngestorInterface):
             logging.error(f'Cannot ingest {path}')
             raise Exception('Cannot ingest', path)
 
-        quotes = []
         try:
-            doc = Document(path)
-        except docx.opc.exceptions.PackageNotFoundError:
+            archive = zipfile.ZipFile(path)
+        except FileNotFoundError:
             logging.error(f'Cannot open file {path}')
             raise FileNotFoundError(f'Cannot open file {path}')
+        except zipfile.BadZipFile:
+            logging.error(f'Docx file {path} is not a zip archive.')
+            raise InvalidFileException(f'Docx file {path} has invalid content')
         try:
-            for el in doc.paragraphs:
-                if el.text != "":
-                    info_line = el.text.split(QUOTE_AUTHOR_SEPARATOR)
-                    if len(info_line) < 2:
-                        continue
-                    quotes.append(
-                        QuoteModel(info_line[0].strip(whitespace + '"'), info_line[1].strip(whitespace + '"'))
-                    )
-            return quotes
-        except IndexError:
+            with archive:
+                for text in cls.iter_paragraphs(archive):
+                    if text != "":
+                        info_line = text.split(QUOTE_AUTHOR_SEPARATOR)
+                        if len(info_line) < 2:
+                            continue
+                        yield QuoteModel(info_line[0].strip(whitespace + '"'), info_line[1].strip(whitespace + '"'))
+        except (IndexError, KeyError, ElementTree.ParseError):
             logging.error(f'Docx file {path} has wrongly built data.')
             raise InvalidFileException(f'Docx file {path} has invalid content')
 
+    @classmethod
+    def iter_paragraphs(cls, archive: zipfile.ZipFile) -> Iterator[str]:
+        """Yield the text of the body paragraphs of the document.
+
+        :param archive: the opened docx file.
+        """
+        w = cls.namespace
+        depth = 0
+        body = None
+        with archive.open(cls._document_part(archive)) as part:
+            for event, elem in ElementTree.iterparse(part, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if depth == 2 and elem.tag == w + 'body':
+                        body = elem
+                    continue
+                depth -= 1
+                if depth != 2 or body is None:
+                    continue
+                if elem.tag == w + 'p':
+                    yield ''.join(cls._run_text(run) for run in elem.iterfind(w + 'r'))
+                body.clear()
+
+    @classmethod
+    def _run_text(cls, run) -> str:
+        w = cls.namespace
+        text = ''
+        for child in run:
+            if child.tag == w + 't':
+                text += child.text or ''
+            elif child.tag == w + 'tab':
+                text += '\t'
+            elif child.tag in (w + 'br', w + 'cr'):
+                text += '\n'
+        return text
+
+    @classmethod
+    def _document_part(cls, archive: zipfile.ZipFile) -> str:
+        """Return the name of the main document part from the package relationships."""
+        try:
+            rels = ElementTree.fromstring(archive.read('_rels/.rels'))
+        except KeyError:
+            return 'word/document.xml'
+        for rel in rels:
+            if rel.get('Type') == cls.office_document:
+                return rel.get('Target').lstrip('/')
+        return 'word/document.xml'
+
 
 class TextIngestor(IngestorInterface):
     """A sublass for IngestorInterface superclass for dealing with txt file."""
@@ -205,8 +298,8 @@ class TextIngestor(IngestorInterface):
     type_ = ['txt']
 
     @classmethod
-    def parse(cls, path: str) -> List[QuoteModel]:
-        """Parse text from txt file and turn it into the list of models 'QuoteModel'.
+    def iter_parse(cls, path: str) -> Iterator[QuoteModel]:
+        """Parse text from txt file and yield the models 'QuoteModel'.
 
         :param path: the filepath on the disk.
         :return: the sequence of 'QuoteModel'
@@ -215,20 +308,16 @@ class TextIngestor(IngestorInterface):
             logging.error(f'Cannot ingest {path}')
             raise Exception('Cannot ingest', path)
 
-        quotes = []
         try:
             with open(path) as f:
                 for line in f:
                     info_line = line.split(QUOTE_AUTHOR_SEPARATOR)
                     if len(info_line) < 2:
                         continue
-                    quotes.append(
-                        QuoteModel(info_line[0].strip(whitespace + '"'), info_line[1].strip(whitespace + '"'))
-                    )
+                    yield QuoteModel(info_line[0].strip(whitespace + '"'), info_line[1].strip(whitespace + '"'))
         except FileNotFoundError:
             logging.error(f'Cannot open file {path}')
             raise FileNotFoundError(f'Cannot open file {path}')
         except IndexError:
             logging.error(f'Txt file {path} has wrongly built data.')
             raise InvalidFileException(f'Txt file {path} has invalid content')
-        return quotes
@@ -0,0 +1,478 @@
+"""Provide pure-Python text extraction from pdf files.
+
+It is the fallback of `PdfIngestor` for machines without the `pdftotext` binary.
+It covers what quote documents are made of: FlateDecode and object streams,
+simple and Type0 fonts with ToUnicode maps, and text positioned with the
+Td, TD, Tm, T* and TJ operators. Like `pdftotext` it puts every text line of
+a page on its own line and ends every page with a form feed.
+"""
+import re
+import zlib
+from collections import namedtuple
+
+WHITESPACE = b' \t\r\n\x0c\x00'
+DELIMITERS = b'()<>[]{}/%'
+OBJECT_HEADER = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+
+Ref = namedtuple('Ref', 'num gen')
+Stream = namedtuple('Stream', 'dict raw')
+
+
+class Name(str):
+    """A pdf name object such as /Font."""
+
+    pass
+
+
+class Operator(str):
+    """A bare keyword: a content stream operator or true, false, null, R."""
+
+    pass
+
+
+class PdfSyntaxError(ValueError):
+    """Exception raised for the pdf syntax the lexer cannot read."""
+
+    pass
+
+
+class Lexer:
+    """Reads pdf objects from a byte buffer."""
+
+    escapes = {ord('n'): b'\n', ord('r'): b'\r', ord('t'): b'\t', ord('b'): b'\b', ord('f'): b'\f',
+               ord('('): b'(', ord(')'): b')', ord('\\'): b'\\'}
+
+    def __init__(self, data: bytes, pos: int = 0):
+        """Construct a new `Lexer` reading data from the position pos."""
+        self.data = data
+        self.pos = pos
+
+    def skip_whitespace(self):
+        """Move past whitespace and comments."""
+        data = self.data
+        while self.pos < len(data):
+            char = data[self.pos]
+            if char in WHITESPACE:
+                self.pos += 1
+            elif char == 0x25:
+                while self.pos < len(data) and data[self.pos] not in b'\r\n':
+                    self.pos += 1
+            else:
+                break
+
+    def parse_object(self):
+        """Read the next object, raise EOFError at the end of the buffer."""
+        self.skip_whitespace()
+        data = self.data
+        if self.pos >= len(data):
+            raise EOFError
+        char = data[self.pos:self.pos + 1]
+        if char == b'/':
+            return self._name()
+        if char == b'(':
+            return self._literal_string()
+        if data.startswith(b'<<', self.pos):
+            return self._dict()
+        if char == b'<':
+            return self._hex_string()
+        if char == b'[':
+            self.pos += 1
+            items = []
+            while True:
+                self.skip_whitespace()
+                if data.startswith(b']', self.pos):
+                    self.pos += 1
+                    return items
+                items.append(self.parse_object())
+        if char in b')>]}{':
+            self.pos += 1
+            return Operator(char.decode('latin-1'))
+        token = self._regular()
+        if re.fullmatch(rb'[+-]?(\d+\.?\d*|\.\d+)', token):
+            if b'.' in token:
+                return float(token)
+            number = int(token)
+            return self._maybe_ref(number)
+        if token == b'true':
+            return True
+        if token == b'false':
+            return False
+        if token == b'null':
+            return None
+        return Operator(token.decode('latin-1'))
+
+    def _maybe_ref(self, number):
+        saved = self.pos
+        self.skip_whitespace()
+        generation = re.compile(rb'\d+').match(self.data, self.pos)
+        if generation:
+            self.pos = generation.end()
+            self.skip_whitespace()
+            if self.data.startswith(b'R', self.pos) and (
+                    self.pos + 1 >= len(self.data) or self.data[self.pos + 1] in WHITESPACE + DELIMITERS):
+                self.pos += 1
+                return Ref(number, int(generation.group()))
+        self.pos = saved
+        return number
+
+    def _regular(self) -> bytes:
+        start = self.pos
+        data = self.data
+        while self.pos < len(data) and data[self.pos] not in WHITESPACE + DELIMITERS:
+            self.pos += 1
+        if self.pos == start:
+            raise PdfSyntaxError(f'Unexpected byte at {start}')
+        return data[start:self.pos]
+
+    def _name(self) -> Name:
+        self.pos += 1
+        start = self.pos
+        data = self.data
+        while self.pos < len(data) and data[self.pos] not in WHITESPACE + DELIMITERS:
+            self.pos += 1
+        raw = re.sub(rb'#([0-9a-fA-F]{2})', lambda m: bytes([int(m.group(1), 16)]), data[start:self.pos])
+        return Name(raw.decode('latin-1'))
+
+    def _dict(self) -> dict:
+        self.pos += 2
+        result = {}
+        while True:
+            self.skip_whitespace()
+            if self.data.startswith(b'>>', self.pos):
+                self.pos += 2
+                return result
+            key = self.parse_object()
+            if not isinstance(key, Name):
+                raise PdfSyntaxError(f'Dictionary key expected at {self.pos}')
+            result[key] = self.parse_object()
+
+    def _hex_string(self) -> bytes:
+        end = self.data.index(b'>', self.pos)
+        digits = re.sub(rb'\s', b'', self.data[self.pos + 1:end])
+        self.pos = end + 1
+        if len(digits) % 2:
+            digits += b'0'
+        return bytes.fromhex(digits.decode('latin-1'))
+
+    def _literal_string(self) -> bytes:
+        data = self.data
+        self.pos += 1
+        depth = 1
+        out = bytearray()
+        while self.pos < len(data):
+            char = data[self.pos]
+            self.pos += 1
+            if char == 0x5c:
+                if self.pos >= len(data):
+                    break
+                nxt = data[self.pos]
+                if nxt in self.escapes:
+                    out += self.escapes[nxt]
+                    self.pos += 1
+                elif 0x30 <= nxt <= 0x37:
+                    octal = re.compile(rb'[0-7]{1,3}').match(data, self.pos)
+                    out.append(int(octal.group(), 8) & 0xff)
+                    self.pos = octal.end()
+                elif nxt == 0x0d:
+                    self.pos += 2 if data.startswith(b'\r\n', self.pos) else 1
+                elif nxt == 0x0a:
+                    self.pos += 1
+                continue
+            if char == 0x28:
+                depth += 1
+            elif char == 0x29:
+                depth -= 1
+                if depth == 0:
+                    return bytes(out)
+            out.append(char)
+        return bytes(out)
+
+
+class Document:
+    """The objects of a pdf file indexed by their object number."""
+
+    def __init__(self, data: bytes):
+        """Construct a new `Document` from the content of a pdf file."""
+        self.objects = {}
+        self._read_objects(data)
+        self._read_object_streams()
+
+    def resolve(self, obj):
+        """Follow indirect references to the object they point at."""
+        seen = 0
+        while isinstance(obj, Ref) and seen < 32:
+            obj = self.objects.get(obj.num)
+            seen += 1
+        return obj
+
+    def pages(self):
+        """Yield the page dictionaries in document order with their inherited resources."""
+        catalog = next((obj for obj in self.objects.values()
+                        if isinstance(obj, dict) and obj.get('Type') == 'Catalog'), None)
+        if catalog is None:
+            return
+        stack = [(self.resolve(catalog.get('Pages')), None)]
+        visited = set()
+        while stack:
+            node, resources = stack.pop()
+            if not isinstance(node, dict) or id(node) in visited:
+                continue
+            visited.add(id(node))
+            resources = self.resolve(node.get('Resources', resources))
+            if node.get('Type') == 'Page' or 'Kids' not in node:
+                yield node, resources
+                continue
+            kids = self.resolve(node.get('Kids')) or []
+            stack.extend((self.resolve(kid), resources) for kid in reversed(kids))
+
+    def decode(self, stream) -> bytes:
+        """Return the decoded data of the stream, None for filters that are not supported."""
+        if not isinstance(stream, Stream):
+            return None
+        filters = self.resolve(stream.dict.get('Filter'))
+        if filters is None:
+            filters = []
+        elif not isinstance(filters, list):
+            filters = [filters]
+        data = stream.raw
+        for name in filters:
+            if self.resolve(name) not in ('FlateDecode', 'Fl'):
+                return None
+            try:
+                data = zlib.decompressobj().decompress(data)
+            except zlib.error:
+                return None
+        return data
+
+    def _read_objects(self, data: bytes):
+        pos = 0
+        while True:
+            match = OBJECT_HEADER.search(data, pos)
+            if match is None:
+                return
+            lexer = Lexer(data, match.end())
+            try:
+                obj = lexer.parse_object()
+            except (EOFError, PdfSyntaxError, ValueError):
+                pos = match.end()
+                continue
+            lexer.skip_whitespace()
+            if isinstance(obj, dict) and data.startswith(b'stream', lexer.pos):
+                start = lexer.pos + 6
+                if data.startswith(b'\r\n', start):
+                    start += 2
+                elif data.startswith(b'\n', start) or data.startswith(b'\r', start):
+                    start += 1
+                length = obj.get('Length')
+                end = start + length if isinstance(length, int) else -1
+                if end < 0 or not data[end:end + 32].lstrip().startswith(b'endstream'):
+                    end = data.find(b'endstream', start)
+                    if end < 0:
+                        end = len(data)
+                obj = Stream(obj, data[start:end])
+                lexer.pos = end
+            self.objects[int(match.group(1))] = obj
+            pos = lexer.pos
+
+    def _read_object_streams(self):
+        for obj in list(self.objects.values()):
+            if not isinstance(obj, Stream) or obj.dict.get('Type') != 'ObjStm':
+                continue
+            data = self.decode(obj)
+            if data is None:
+                continue
+            first = self.resolve(obj.dict.get('First'))
+            count = self.resolve(obj.dict.get('N'))
+            header = Lexer(data)
+            try:
+                entries = [(header.parse_object(), header.parse_object()) for _ in range(count)]
+            except (EOFError, PdfSyntaxError, ValueError):
+                continue
+            for num, offset in entries:
+                if num in self.objects:
+                    continue
+                try:
+                    self.objects[num] = Lexer(data, first + offset).parse_object()
+                except (EOFError, PdfSyntaxError, ValueError):
+                    continue
+
+
+class Font:
+    """Turns the bytes of a shown string into text."""
+
+    def __init__(self, document: Document, font: dict):
+        """Construct a new `Font` from a font dictionary."""
+        font = document.resolve(font) or {}
+        self.code_length = 2 if font.get('Subtype') == 'Type0' else 1
+        self.mapping = {}
+        cmap = document.decode(document.resolve(font.get('ToUnicode')))
+        if cmap:
+            self._read_cmap(cmap)
+
+    def decode(self, raw: bytes) -> str:
+        """Return the text of the shown string."""
+        if self.code_length == 1 and not self.mapping:
+            return raw.decode('cp1252', errors='replace')
+        chars = []
+        for i in range(0, len(raw) - self.code_length + 1, self.code_length):
+            code = int.from_bytes(raw[i:i + self.code_length], 'big')
+            chars.append(self.mapping.get(code, chr(code) if self.code_length == 1 else ''))
+        return ''.join(chars)
+
+    @staticmethod
+    def _text(raw: bytes) -> str:
+        return raw.decode('utf-16-be', errors='replace')
+
+    def _read_cmap(self, data: bytes):
+        lexer = Lexer(data)
+        operands = []
+        while True:
+            try:
+                token = lexer.parse_object()
+            except EOFError:
+                break
+            except (PdfSyntaxError, ValueError):
+                lexer.pos += 1
+                continue
+            if isinstance(token, Operator):
+                if token == 'endcodespacerange' and operands and isinstance(operands[0], bytes):
+                    self.code_length = len(operands[0])
+                elif token == 'endbfchar':
+                    for src, dst in zip(operands[::2], operands[1::2]):
+                        if isinstance(src, bytes) and isinstance(dst, bytes):
+                            self.mapping[int.from_bytes(src, 'big')] = self._text(dst)
+                elif token == 'endbfrange':
+                    for low, high, dst in zip(operands[::3], operands[1::3], operands[2::3]):
+                        self._add_range(low, high, dst)
+                operands = []
+            else:
+                operands.append(token)
+
+    def _add_range(self, low, high, dst):
+        if not isinstance(low, bytes) or not isinstance(high, bytes):
+            return
+        low, high = int.from_bytes(low, 'big'), int.from_bytes(high, 'big')
+        if isinstance(dst, list):
+            for code, item in zip(range(low, high + 1), dst):
+                if isinstance(item, bytes):
+                    self.mapping[code] = self._text(item)
+        elif isinstance(dst, bytes) and dst:
+            base = int.from_bytes(dst, 'big')
+            for offset in range(high - low + 1):
+                self.mapping[low + offset] = self._text((base + offset).to_bytes(len(dst), 'big'))
+
+
+def content_operations(data: bytes):
+    """Yield (operands, operator) pairs of a content stream."""
+    lexer = Lexer(data)
+    operands = []
+    while True:
+        try:
+            token = lexer.parse_object()
+        except EOFError:
+            return
+        except (PdfSyntaxError, ValueError):
+            lexer.pos += 1
+            operands = []
+            continue
+        if not isinstance(token, Operator):
+            operands.append(token)
+            continue
+        if token == 'ID':
+            end = re.compile(rb'\sEI(?=[\s]|$)').search(data, lexer.pos)
+            lexer.pos = end.end() if end else len(data)
+        else:
+            yield operands, token
+        operands = []
+
+
+def _page_lines(document: Document, page: dict, resources: dict):
+    resources = resources or {}
+    fonts = {}
+    font_dicts = document.resolve(resources.get('Font')) or {}
+    contents = document.resolve(page.get('Contents'))
+    if not isinstance(contents, list):
+        contents = [contents]
+    data = b'\n'.join(document.decode(document.resolve(part)) or b'' for part in contents)
+
+    lines = []
+    current = []
+    line_y = None
+    font = None
+    size = 1.0
+    leading = 0.0
+    matrix = line_matrix = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+
+    def move(tx, ty):
+        nonlocal matrix, line_matrix
+        a, b, c, d, e, f = line_matrix
+        line_matrix = [a, b, c, d, e + tx * a + ty * c, f + tx * b + ty * d]
+        matrix = line_matrix
+
+    def show(text):
+        nonlocal current, line_y
+        y = matrix[5]
+        if line_y is not None and abs(y - line_y) > max(1.0, 0.3 * size * abs(matrix[3])):
+            lines.append(''.join(current))
+            current = []
+        line_y = y
+        current.append(text)
+
+    for operands, op in content_operations(data):
+        try:
+            if op == 'BT':
+                matrix = line_matrix = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+            elif op == 'Tf' and len(operands) == 2:
+                name, size = operands
+                if name not in fonts:
+                    fonts[name] = Font(document, font_dicts.get(name))
+                font = fonts[name]
+            elif op == 'Td':
+                move(*operands)
+            elif op == 'TD':
+                leading = -operands[1]
+                move(*operands)
+            elif op == 'TL':
+                leading = operands[0]
+            elif op == 'Tm':
+                matrix = line_matrix = [float(value) for value in operands]
+            elif op in ('T*', "'", '"'):
+                move(0, -leading)
+            if font is None:
+                continue
+            if op in ('Tj', "'", '"') and operands and isinstance(operands[-1], bytes):
+                show(font.decode(operands[-1]))
+            elif op == 'TJ' and operands and isinstance(operands[0], list):
+                parts = []
+                for item in operands[0]:
+                    if isinstance(item, bytes):
+                        parts.append(font.decode(item))
+                    elif isinstance(item, (int, float)) and item < -250 and parts and not parts[-1].endswith(' '):
+                        parts.append(' ')
+                show(''.join(parts))
+        except (TypeError, ValueError):
+            continue
+    if current:
+        lines.append(''.join(current))
+    return [line.rstrip() for line in lines if line.strip()]
+
+
+def iter_lines(path: str):
+    """Yield the text lines of the pdf file page by page, a form feed line closes every page.
+
+    :param path: the file path on the disk.
+    """
+    with open(path, 'rb') as f:
+        document = Document(f.read())
+    for page, resources in document.pages():
+        for line in _page_lines(document, page, resources):
+            yield line + '\n'
+        yield '\f'
+
+
+def extract_text(path: str) -> str:
+    """Return the text of the pdf file, one text line per line and a form feed after each page.
+
+    :param path: the file path on the disk.
+    """
+    return ''.join(iter_lines(path))
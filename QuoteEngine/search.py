@@ -0,0 +1,139 @@
+"""Provide inverted index of the quote words and authors.
+
+Every word of a quote body and every author maps to the ids of the quotes
+that contain it, kept in compact arrays that only grow as quotes are added.
+A query for one word or one author returns its posting array as is, a query
+combining several is intersected starting from the shortest array and cached
+until the next quote is added or removed. `random.choice` over the result is O(1).
+"""
+import bisect
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Iterable, Sequence
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> list:
+    """Return the distinct lowercase words of the text in order of appearance."""
+    return list(dict.fromkeys(TOKEN_PATTERN.findall(text.casefold())))
+
+
+def normalize_author(author: str) -> str:
+    """Return the author in the form it is indexed under."""
+    return ' '.join(author.casefold().split())
+
+
+class QuoteIndex:
+    """Word and author index of quote ids with incremental updates."""
+
+    def __init__(self, max_results=1024):
+        """Construct a new empty `QuoteIndex`.
+
+        :param max_results: the number of intersected query results kept.
+        """
+        self.max_results = max_results
+        self._words = {}
+        self._authors = {}
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, quote_id: int, body: str, author: str):
+        """Index a quote, the ids must be added in increasing order.
+
+        :param quote_id: the id of the quote in its store.
+        :param body: the text of the quote.
+        :param author: the author of the quote.
+        """
+        with self._lock:
+            for word in tokenize(body):
+                self._posting(self._words, word).append(quote_id)
+            self._posting(self._authors, normalize_author(author)).append(quote_id)
+            self._results.clear()
+
+    def remove(self, quote_id: int, body: str, author: str):
+        """Drop a quote from the index.
+
+        :param quote_id: the id of the quote in its store.
+        :param body: the text of the quote.
+        :param author: the author of the quote.
+        """
+        with self._lock:
+            for index, term in self._terms(body, author):
+                posting = index[term]
+                posting.remove(quote_id)
+                if not posting:
+                    del index[term]
+            self._results.clear()
+
+    def move(self, old_id: int, new_id: int, body: str, author: str):
+        """Index a quote under a new id, keeping every posting in increasing order.
+
+        :param old_id: the id the quote is indexed under.
+        :param new_id: the id the quote moves to.
+        :param body: the text of the quote.
+        :param author: the author of the quote.
+        """
+        with self._lock:
+            for index, term in self._terms(body, author):
+                posting = index[term]
+                posting.remove(old_id)
+                bisect.insort(posting, new_id)
+            self._results.clear()
+
+    def copy(self) -> 'QuoteIndex':
+        """Return an independent copy of the index, the posting arrays are copied as a whole."""
+        index = QuoteIndex(self.max_results)
+        with self._lock:
+            index._words = {word: posting[:] for word, posting in self._words.items()}
+            index._authors = {author: posting[:] for author, posting in self._authors.items()}
+        return index
+
+    def query(self, words: Iterable[str] = (), author: str = None) -> Sequence[int]:
+        """Return the ids of the quotes containing all the words by the author.
+
+        :param words: the words or phrases to match, split the same way the bodies are.
+        :param author: the author to match, case insensitive.
+        :return: the matching ids in increasing order, an empty sequence when there are none.
+        """
+        if isinstance(words, str):
+            words = (words,)
+        terms = tuple(sorted({token for text in words for token in tokenize(text)}))
+        author = normalize_author(author) if author else None
+        with self._lock:
+            postings = [self._words.get(term, ()) for term in terms]
+            if author is not None:
+                postings.append(self._authors.get(author, ()))
+            if not postings:
+                return ()
+            if len(postings) == 1:
+                return postings[0]
+            key = (terms, author)
+            result = self._results.get(key)
+            if result is not None:
+                self._results.move_to_end(key)
+                return result
+            postings.sort(key=len)
+            others = [set(posting) for posting in postings[1:]]
+            result = array('I', (quote_id for quote_id in postings[0]
+                                 if all(quote_id in other for other in others)))
+            self._results[key] = result
+            if len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+            return result
+
+    def authors(self) -> list:
+        """Return the indexed authors."""
+        return list(self._authors)
+
+    def _terms(self, body, author):
+        return [(self._words, word) for word in tokenize(body)] + [(self._authors, normalize_author(author))]
+
+    @staticmethod
+    def _posting(index, term):
+        posting = index.get(term)
+        if posting is None:
+            posting = index[term] = array('I')
+        return posting
@@ -0,0 +1,183 @@
+"""Provide compact deduplicated storage for loaded quotes.
+
+Quotes are kept as two parallel columns of strings instead of one object
+with its own attribute dictionary per quote, the authors are interned and
+identical quotes loaded from several files are stored once.
+A `QuoteModel` is built only when a quote is read, so `random.choice`
+keeps working over the store in O(1), and over the result of `find` as well.
+A removed quote is replaced by the last one, so the ids stay dense and only
+the index entries of the two quotes are touched.
+"""
+import sys
+from typing import Iterable, Iterator, Sequence
+
+from .models import QuoteModel
+from .search import QuoteIndex, tokenize
+
+
+class QuoteStore:
+    """Deduplicated, index addressable collection of quotes."""
+
+    def __init__(self, quotes: Iterable[QuoteModel] = (), indexed: bool = False):
+        """Construct a new `QuoteStore` holding the quotes.
+
+        :param quotes: the quotes to add.
+        :param indexed: keep a word and author `QuoteIndex` of the quotes for `find`.
+        """
+        self._bodies = []
+        self._authors = []
+        self._index = {}
+        self.search = QuoteIndex() if indexed else None
+        self.extend(quotes)
+
+    def add(self, quote: QuoteModel) -> int:
+        """Add the quote unless an equal one is stored already.
+
+        :param quote: the quote to add.
+        :return: the id of the stored quote.
+        """
+        body, author = quote.body, quote.author
+        found = self._find(body, author)
+        if found is not None:
+            return found
+        quote_id = len(self._bodies)
+        self._bodies.append(body)
+        self._authors.append(sys.intern(author) if type(author) is str else author)
+        self._link(body, quote_id)
+        if self.search is not None:
+            self.search.add(quote_id, body, author)
+        return quote_id
+
+    def remove(self, quote: QuoteModel) -> bool:
+        """Remove the quote, the last stored quote takes over its id.
+
+        :param quote: the quote to remove.
+        :return: True if the quote was stored.
+        """
+        quote_id = self._find(quote.body, quote.author)
+        if quote_id is None:
+            return False
+        self._unlink(quote.body, quote_id)
+        if self.search is not None:
+            self.search.remove(quote_id, quote.body, quote.author)
+        last = len(self._bodies) - 1
+        if quote_id != last:
+            body, author = self._bodies[last], self._authors[last]
+            self._unlink(body, last)
+            self._bodies[quote_id], self._authors[quote_id] = body, author
+            self._link(body, quote_id)
+            if self.search is not None:
+                self.search.move(last, quote_id, body, author)
+        self._bodies.pop()
+        self._authors.pop()
+        return True
+
+    def copy(self) -> 'QuoteStore':
+        """Return an independent copy to update while readers keep using this store."""
+        store = QuoteStore()
+        store._bodies = self._bodies[:]
+        store._authors = self._authors[:]
+        store._index = {body: ids[:] if isinstance(ids, list) else ids for body, ids in self._index.items()}
+        store.search = self.search.copy() if self.search is not None else None
+        return store
+
+    def extend(self, quotes: Iterable[QuoteModel]) -> int:
+        """Add the quotes skipping the duplicates.
+
+        :param quotes: the quotes to add.
+        :return: the number of quotes that were new.
+        """
+        size = len(self._bodies)
+        for quote in quotes:
+            self.add(quote)
+        return len(self._bodies) - size
+
+    def find(self, words: Iterable[str] = (), author: str = None) -> 'QuoteView':
+        """Return the quotes containing all the words by the author.
+
+        :param words: the words to match.
+        :param author: the author to match, case insensitive.
+        :return: the matching quotes, all of them when neither is given.
+        """
+        if isinstance(words, str):
+            words = (words,)
+        words = [text for text in words if tokenize(text)]
+        author = author if author and author.strip() else None
+        if not words and not author:
+            return QuoteView(self, range(len(self)))
+        if self.search is None:
+            raise ValueError('QuoteStore is not indexed')
+        return QuoteView(self, self.search.query(words, author))
+
+    def _link(self, body, quote_id):
+        ids = self._index.get(body)
+        if ids is None:
+            self._index[body] = quote_id
+        elif isinstance(ids, list):
+            ids.append(quote_id)
+        else:
+            self._index[body] = [ids, quote_id]
+
+    def _unlink(self, body, quote_id):
+        ids = self._index[body]
+        if not isinstance(ids, list):
+            del self._index[body]
+            return
+        ids.remove(quote_id)
+        if len(ids) == 1:
+            self._index[body] = ids[0]
+
+    def _find(self, body, author):
+        ids = self._index.get(body)
+        if ids is None:
+            return None
+        for quote_id in ids if isinstance(ids, list) else (ids,):
+            if self._authors[quote_id] == author:
+                return quote_id
+        return None
+
+    def __len__(self):
+        """Return the number of stored quotes."""
+        return len(self._bodies)
+
+    def __getitem__(self, index):
+        """Return the quote with the id, or the list of quotes for a slice."""
+        if isinstance(index, slice):
+            return [QuoteModel(body, author)
+                    for body, author in zip(self._bodies[index], self._authors[index])]
+        return QuoteModel(self._bodies[index], self._authors[index])
+
+    def __iter__(self) -> Iterator[QuoteModel]:
+        """Iterate over the stored quotes in insertion order."""
+        for body, author in zip(self._bodies, self._authors):
+            yield QuoteModel(body, author)
+
+    def __contains__(self, quote) -> bool:
+        """Tell if an equal quote is stored."""
+        return isinstance(quote, QuoteModel) and self._find(quote.body, quote.author) is not None
+
+
+class QuoteView:
+    """Read-only sequence of the stored quotes with the given ids."""
+
+    __slots__ = ('store', 'ids')
+
+    def __init__(self, store: QuoteStore, ids: Sequence[int]):
+        """Construct a new `QuoteView` over the ids of the store."""
+        self.store = store
+        self.ids = ids
+
+    def __len__(self):
+        """Return the number of quotes in the view."""
+        return len(self.ids)
+
+    def __getitem__(self, index) -> QuoteModel:
+        """Return the quote at the position in the view, or the list of quotes for a slice."""
+        if isinstance(index, slice):
+            return [self.store[quote_id] for quote_id in self.ids[index]]
+        return self.store[self.ids[index]]
+
+    def __iter__(self) -> Iterator[QuoteModel]:
+        """Iterate over the quotes in the view."""
+        for quote_id in self.ids:
+            yield self.store[quote_id]
@@ -1,13 +1,36 @@
 """Main application module."""
 import io
+import concurrent.futures
 import random
 import os
-import requests
-from flask import Flask, render_template, abort, request
+import time
+from flask import Flask, Response, render_template, abort, request, jsonify, url_for, g
 
 from QuoteEngine.ingestor import Ingestor
+from QuoteEngine.corpus_cache import CorpusCache
 from constants import QUOTE_FILES, IMAGE_SOURCE_PATH, IMAGE_DESTINATION_PATH
+from constants import RENDER_CACHE_MAX_ENTRIES, RENDER_CACHE_MAX_BYTES, SOURCE_CACHE_MAX_BYTES
+from constants import RENDER_BACKEND, RENDER_WORKERS, RENDER_TIMEOUT, CORPUS_CACHE_PATH
+from constants import FETCH_CACHE_PATH, FETCH_MAX_BYTES, FETCH_CONNECT_TIMEOUT, FETCH_READ_TIMEOUT, FETCH_DEADLINE
+from constants import JOB_WORKERS, JOB_MAX_PENDING, JOB_TTL, JOB_MAX_WAIT
+from constants import RANDOM_MEME_MODE, MEMORY_CACHE_MAX_BYTES, MEME_MAX_AGE, CAPTION_MAX_LENGTH
+from constants import MEME_WIDTHS, MEME_DISPLAY_WIDTH, MEME_CODECS
+from constants import PRERENDER_POOL_SIZE, PRERENDER_POOL_PATH, RELOAD_INTERVAL, IMAGE_INDEX_PATH
+from constants import PROFILE_THRESHOLD, PROFILE_INTERVAL, PROFILE_PATH, WARMUP_ON_IMPORT, WARMUP_TIMEOUT
 from MemeEngine.meme_engine import MemeEngine
+from MemeEngine.render_cache import RenderCache, BytesCache
+from MemeEngine.image_cache import SourceImageCache
+from MemeEngine.catalog import ImageCatalog
+from MemeEngine.encoders import get_codec, negotiate
+from MemeEngine.executor import create_executor, RenderExecutor
+from MemeEngine.fetcher import ImageFetcher
+from MemeEngine.exceptions import FetchError, QueueFullError
+from MemeEngine.jobs import JobQueue
+from MemeEngine.pool import PrerenderPool
+from watcher import ContentWatcher
+from metrics import Metrics
+from profiler import SamplingProfiler
+from warmup import Warmup
 
 
 def create_app(config_filename: str = __name__) -> Flask:
@@ -16,30 +39,218 @@ def create_app(config_filename: str = __name__) -> Flask:
 
 app = create_app()
 
-meme = MemeEngine(IMAGE_DESTINATION_PATH)
+metrics = Metrics()
+metrics.describe('http_request_seconds', 'Request latency by endpoint.')
+metrics.describe('http_requests_total', 'Requests by endpoint and status code.')
+metrics.describe('meme_stage_seconds', 'Time spent in the MemeEngine render stages.')
+metrics.describe('ingest_seconds', 'Time spent parsing a quote file by format.')
+metrics.describe('fetch_seconds', 'Time spent downloading remote source images.')
+MemeEngine.observer = lambda stage, seconds: metrics.observe('meme_stage_seconds', seconds, stage=stage)
+Ingestor.observer = lambda stage, seconds, **labels: metrics.observe('ingest_seconds', seconds, **labels)
+profiler = SamplingProfiler(PROFILE_INTERVAL) if PROFILE_THRESHOLD is not None else None
+RenderExecutor.profiler = profiler
+
+render_cache = RenderCache(IMAGE_DESTINATION_PATH,
+                           max_entries=RENDER_CACHE_MAX_ENTRIES,
+                           max_bytes=RENDER_CACHE_MAX_BYTES)
+catalog = ImageCatalog(IMAGE_SOURCE_PATH, IMAGE_INDEX_PATH)
+meme = MemeEngine(IMAGE_DESTINATION_PATH,
+                  cache=render_cache,
+                  source_cache=SourceImageCache(SOURCE_CACHE_MAX_BYTES),
+                  catalog=catalog)
+memory_cache = BytesCache(MEMORY_CACHE_MAX_BYTES)
+fetcher = ImageFetcher(FETCH_CACHE_PATH,
+                       max_bytes=FETCH_MAX_BYTES,
+                       connect_timeout=FETCH_CONNECT_TIMEOUT,
+                       read_timeout=FETCH_READ_TIMEOUT,
+                       deadline=FETCH_DEADLINE)
+jobs = JobQueue(workers=JOB_WORKERS, max_pending=JOB_MAX_PENDING, ttl=JOB_TTL)
+
+watcher = ContentWatcher(QUOTE_FILES, IMAGE_SOURCE_PATH, interval=RELOAD_INTERVAL, catalog=catalog, indexed=True)
+renderer = create_executor(RENDER_BACKEND, meme, workers=RENDER_WORKERS, width=max(MEME_WIDTHS))
+pool = None
+if PRERENDER_POOL_SIZE != 0:
+    pool = PrerenderPool(PRERENDER_POOL_PATH, size=PRERENDER_POOL_SIZE, widths=MEME_WIDTHS,
+                         codecs=MEME_CODECS,
+                         engine=MemeEngine(PRERENDER_POOL_PATH, source_cache=meme.source_cache, catalog=catalog))
+
 
 def setup():
-    """Load all resources."""
-    quotes = []
-    for file_path in QUOTE_FILES:
-        quotes.extend(Ingestor.parse(file_path))
+    """Load all resources, `watcher.content` holds the current quotes and images."""
+    Ingestor.cache = CorpusCache(CORPUS_CACHE_PATH)
+    watcher.load()
+
+
+def warm_workers():
+    """Decode the loaded images in the render workers at the width the variants are drawn at."""
+    renderer.warm(watcher.content.images, max(MEME_WIDTHS))
+
+
+def start_background():
+    """Fill the pre-rendered pool and start watching the content for changes."""
+    if pool is not None:
+        pool.refresh(watcher.content.images, watcher.content.quotes)
+        watcher.listeners.append(lambda content: pool.refresh(content.images, content.quotes))
+    if RELOAD_INTERVAL:
+        watcher.start()
+
+
+warmup = Warmup([('content', setup), ('workers', warm_workers), ('fonts', meme.layout.warm),
+                 ('background', start_background)], required=['content'])
+if WARMUP_ON_IMPORT:
+    warmup.start()
+
 
-    imgs = []
-    for root, _, files in os.walk(IMAGE_SOURCE_PATH):
-        imgs = [os.path.join(root, name) for name in files]
-    return quotes, imgs
+def current_content():
+    """Return the loaded quotes and images, waiting for the content step of the warm-up on the first requests."""
+    if not warmup.wait(WARMUP_TIMEOUT, step='content'):
+        abort(503)
+    return watcher.content
 
 
-quotes, images = setup()
+@app.before_request
+def start_request():
+    """Start the request timer and the profiler of slow requests."""
+    g.started = time.perf_counter()
+    if profiler is not None:
+        profiler.begin()
+
+
+@app.after_request
+def finish_request(response):
+    """Record the request latency and dump the profile of a request slower than `PROFILE_THRESHOLD`.
+
+    Responses whose image format was negotiated vary by the Accept header.
+    """
+    if g.get('codec') is not None:
+        response.vary.add('Accept')
+    elapsed = time.perf_counter() - g.started
+    endpoint = request.endpoint or 'unknown'
+    metrics.observe('http_request_seconds', elapsed, endpoint=endpoint)
+    metrics.inc('http_requests_total', endpoint=endpoint, status=response.status_code)
+    if profiler is not None:
+        samples = profiler.end()
+        if elapsed > PROFILE_THRESHOLD and samples:
+            profiler.dump(samples, os.path.join(PROFILE_PATH, f'{time.strftime("%Y%m%d-%H%M%S")}-{endpoint}-'
+                                                              f'{int(elapsed * 1000)}ms.txt'))
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_text():
+    """Return the metrics in the Prometheus text format."""
+    for prefix, component in (('render_cache', render_cache), ('source_cache', meme.source_cache),
+                              ('memory_cache', memory_cache), ('fetcher', fetcher), ('jobs', jobs),
+                              ('reload', watcher)):
+        for name, value in component.stats().items():
+            metrics.set(f'{prefix}_{name}', value)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 
 @app.route('/')
 def meme_rand():
-    """Generate a random meme."""
-    image = random.choice(images)
+    """Generate a random meme, served from the pre-rendered pool when it is filled.
+
+    The `q` (words) and `author` query parameters pick the quote among the matching ones,
+    blank ones do not filter.
+    """
+    words = [word for word in request.args.getlist('q') if word.strip()]
+    author = request.args.get('author', '').strip() or None
+    if len(' '.join(words)) > CAPTION_MAX_LENGTH or len(author or '') > CAPTION_MAX_LENGTH:
+        abort(400)
+    codec = None
+    if pool is not None and not words and not author:
+        codec = negotiate_codec()
+        paths = pool.pick(codec)
+        if paths is not None:
+            return render_meme(paths)
+    content = current_content()
+    quotes = content.quotes.find(words, author)
+    if not quotes:
+        abort(404)
+    image = random.choice(content.images)
     quote = random.choice(quotes)
-    path = meme.make_meme(image, quote.body, quote.author)
-    return render_template('meme.html', path=path)
+    if RANDOM_MEME_MODE == 'memory':
+        name = os.path.relpath(image, IMAGE_SOURCE_PATH)
+        return render_meme({width: url_for('meme_image', img=name, body=quote.body, author=quote.author, w=width)
+                            for width in MEME_WIDTHS})
+    try:
+        paths = renderer.render_variants(image, quote.body, quote.author, MEME_WIDTHS, timeout=RENDER_TIMEOUT,
+                                         codec=codec or negotiate_codec())
+    except concurrent.futures.TimeoutError:
+        return render_template('meme_error.html'), 503
+    return render_meme(paths)
+
+
+def negotiate_codec():
+    """Return the first of `MEME_CODECS` the client names in its Accept header, the last one otherwise."""
+    g.codec = negotiate(request.accept_mimetypes, MEME_CODECS)
+    metrics.inc('meme_codec_total', codec=g.codec)
+    return g.codec
+
+
+def render_meme(paths):
+    """Render the meme page offering the browser every width through `srcset`.
+
+    :param paths: the URL of the meme by width.
+    """
+    path = paths.get(MEME_DISPLAY_WIDTH) or paths[max(paths)]
+    srcset = ', '.join(f'{paths[width]} {width}w' for width in sorted(paths))
+    sizes = f'(max-width: {MEME_DISPLAY_WIDTH}px) 100vw, {MEME_DISPLAY_WIDTH}px'
+    return render_template('meme.html', path=path, srcset=srcset, sizes=sizes)
+
+
+@app.route('/meme.jpg')
+def meme_image():
+    """Render a meme of a bundled image in memory and stream it with caching headers.
+
+    The URL carries the image name, the quote and the width, so it always maps to the same picture,
+    encoded in the format negotiated from the Accept header. Every width is scaled from one layout
+    at the largest width, so the `srcset` candidates are the same picture; one render fills the
+    memory cache for all of them.
+    """
+    image = current_content().image_names.get(request.args.get('img', ''))
+    body = request.args.get('body', '')
+    author = request.args.get('author', '')
+    width = request.args.get('w', MEME_DISPLAY_WIDTH, type=int)
+    if image is None:
+        abort(404)
+    if len(body) > CAPTION_MAX_LENGTH or len(author) > CAPTION_MAX_LENGTH or width not in MEME_WIDTHS:
+        abort(400)
+    codec = negotiate_codec()
+    keys = meme.variant_keys(image, body, author, MEME_WIDTHS, codec)
+    etag = keys[width]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        data = memory_cache.get(etag)
+        if data is None:
+            try:
+                variants = renderer.render_variants_bytes(image, body, author, MEME_WIDTHS, timeout=RENDER_TIMEOUT,
+                                                          codec=codec)
+            except concurrent.futures.TimeoutError:
+                abort(503)
+            for variant_width, encoded in variants.items():
+                memory_cache.put(keys[variant_width], encoded)
+            data = variants[width]
+        response = Response(data, mimetype=get_codec(codec).mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = MEME_MAX_AGE
+    return response
+
+
+@app.route('/ready', methods=['GET'])
+def ready():
+    """Report whether the warm-up is done, with the duration of every step."""
+    status = warmup.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
+@app.route('/reload', methods=['GET'])
+def reload_stats():
+    """Return the hot-reload counters and durations."""
+    return jsonify(watcher.stats())
 
 
 @app.route('/create', methods=['GET'])
@@ -55,11 +266,70 @@ def meme_post():
     body = request.form['body']
     author = request.form['author']
     try:
-        image = io.BytesIO(requests.get(image_url).content)
-        path = meme.make_meme(image, body, author)
-    except requests.exceptions.ConnectionError:
+        with metrics.timer('fetch_seconds'):
+            image = io.BytesIO(fetcher.fetch(image_url))
+        paths = renderer.render_variants(image, body, author, MEME_WIDTHS, timeout=RENDER_TIMEOUT,
+                                         codec=negotiate_codec())
+    except FetchError:
+        return render_template('meme_error.html')
+    except concurrent.futures.TimeoutError:
+        return render_template('meme_error.html'), 503
+    return render_meme(paths)
+
+
+def fetch_and_render(image_url, body, author, codec):
+    """Download the source image and render the meme in every width, used by the background jobs.
+
+    :return: the file path by width, the same result as the `/create` render.
+    """
+    with metrics.timer('fetch_seconds'):
+        image = io.BytesIO(fetcher.fetch(image_url))
+    return renderer.render_variants(image, body, author, MEME_WIDTHS, timeout=RENDER_TIMEOUT, codec=codec)
+
+
+@app.route('/jobs', methods=['POST'])
+def job_post():
+    """Queue a user defined meme and return the job id without waiting for it."""
+    try:
+        job = jobs.submit(fetch_and_render, request.form['image_url'], request.form['body'], request.form['author'],
+                          negotiate_codec())
+    except QueueFullError:
+        response = jsonify({'error': 'Too many pending jobs, try again later'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    response = jsonify({'id': job.id,
+                        'status': job.status,
+                        'status_url': url_for('job_status', job_id=job.id),
+                        'result_url': url_for('job_result', job_id=job.id)})
+    response.headers['Location'] = url_for('job_status', job_id=job.id)
+    return response, 202
+
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Return the job status, waiting up to `wait` seconds for it to finish."""
+    job = jobs.get(job_id)
+    if job is None:
+        abort(404)
+    wait = request.args.get('wait', default=0, type=float)
+    if wait > 0:
+        job.wait(min(wait, JOB_MAX_WAIT))
+    return jsonify(job.to_dict())
+
+
+@app.route('/jobs/<job_id>/meme', methods=['GET'])
+def job_result(job_id):
+    """Show the meme of a finished job."""
+    job = jobs.get(job_id)
+    if job is None:
+        abort(404)
+    if job.status == 'failed':
         return render_template('meme_error.html')
-    return render_template('meme.html', path=path)
+    if not job.done:
+        response = jsonify(job.to_dict())
+        response.headers['Retry-After'] = '1'
+        return response, 202
+    return render_meme(job.result)
 
 
 if __name__ == "__main__":
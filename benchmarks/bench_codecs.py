@@ -0,0 +1,67 @@
+"""Report the bytes per meme and the encode latency of every output codec and preset.
+
+Every bundled dog photo is drawn into a meme once, then encoded by each codec the
+installed Pillow can write with each of the `ENCODE_PRESETS`. The table shows the
+mean size, the size relative to baseline JPEG with the same preset and the fastest
+encode time averaged over the images.
+
+Run with `python -m benchmarks.bench_codecs [--width 500 --presets fast balanced small]`.
+"""
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from MemeEngine.constants import ENCODE_PRESETS
+from MemeEngine.encoders import CODECS, available
+from MemeEngine.meme_engine import MemeEngine
+
+IMAGE_DIR = './_data/photos/dog'
+
+
+def best_of(func, repeat):
+    """Return the result and the fastest wall time of repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - started)
+    return result, min(timings)
+
+
+def main():
+    """Run the benchmark and print a table per preset."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', default=IMAGE_DIR)
+    parser.add_argument('--width', type=int, default=500)
+    parser.add_argument('--presets', nargs='*', default=list(ENCODE_PRESETS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.images, '*.jpg')))
+    codecs = [name for name in CODECS if available(name)]
+    missing = [name for name in CODECS if name not in codecs]
+    print(f'{len(paths)} images at {args.width}px' + (f', not available: {", ".join(missing)}' if missing else ''))
+    with tempfile.TemporaryDirectory() as tmp:
+        memes = [MemeEngine(tmp)._draw(path, 'Treat yo self', 'Fluffles', args.width, path).convert('RGB')
+                 for path in paths]
+        for preset in args.presets:
+            engine = MemeEngine(tmp, preset=preset)
+            print(f'\npreset {preset}')
+            print(f'{"codec":<10}{"bytes":>10}{"vs jpeg":>10}{"encode":>12}')
+            baseline = None
+            for name in codecs:
+                image_format, options = engine._encoder(name)
+                sizes, timings = [], []
+                for meme in memes:
+                    data, timing = best_of(lambda: MemeEngine._encode(meme, options, image_format), args.repeat)
+                    sizes.append(len(data))
+                    timings.append(timing)
+                size = sum(sizes) / len(sizes)
+                baseline = baseline or size
+                print(f'{name:<10}{size:>10.0f}{size / baseline:>9.0%}{sum(timings) / len(timings) * 1000:>10.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Compare the caption drawing paths of `MemeEngine`.
+
+single  - one `draw.text` call at (40, 40) with the size 15 font (the former implementation)
+cold    - `CaptionLayout.fit` with empty caches followed by drawing the lines
+warm    - the same caption laid out again, served from the layout cache
+layout  - `CaptionLayout.fit` alone with empty layout caches and warm word widths
+
+Run with `python -m benchmarks.bench_layout [--lengths 20 500]`.
+"""
+import argparse
+import time
+
+from PIL import Image, ImageDraw
+
+from MemeEngine.fonts import FontRegistry
+from MemeEngine.layout import CaptionLayout
+
+WORDS = ('treat', 'walk', 'good', 'dog', 'always', 'loyal', 'ball', 'fetch', 'the', 'a', 'sunny', 'park', 'nap')
+
+
+def caption(length):
+    """Return a caption of about the given length in characters."""
+    words, size = [], 0
+    index = 0
+    while size < length:
+        word = WORDS[index % len(WORDS)]
+        words.append(word)
+        size += len(word) + 1
+        index += 1
+    return ' '.join(words)[:length]
+
+
+def best_of(func, repeat):
+    """Return the fastest wall time of repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    """Run the benchmark and print a table of the per-caption timings."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lengths', type=int, nargs='*', default=[20, 100, 300, 500])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    fonts = FontRegistry()
+    image = Image.new('RGB', (500, 500))
+    draw = ImageDraw.Draw(image)
+    single_font = fonts.get(size=15)
+
+    def single(text):
+        draw.text((40, 40), text, font=single_font, fill=(255, 255, 255, 255))
+
+    def laid_out(layout, text):
+        result = layout.fit(text, image.size)
+        for position, line in result.lines:
+            draw.text(position, line, font=result.font, fill=(255, 255, 255, 255))
+
+    def cold(text):
+        layout = CaptionLayout(fonts)
+        laid_out(layout, text)
+
+    warm_layout = CaptionLayout(fonts)
+    measure_layout = CaptionLayout(fonts, max_layouts=0)
+    warm_layout.warm()
+
+    methods = {'single': single,
+               'cold': cold,
+               'warm': lambda text: laid_out(warm_layout, text),
+               'layout': lambda text: measure_layout.fit(text, image.size)}
+    print(f'{"chars":>6}' + ''.join(f'{name:>12}' for name in methods) + f'{"lines":>7}')
+    for length in args.lengths:
+        text = caption(length)
+        laid_out(warm_layout, text)
+        measure_layout.fit(text, image.size)
+        row = ''.join(f'{best_of(lambda: func(text), args.repeat) * 1000:>10.3f}ms' for func in methods.values())
+        print(f'{length:>6}{row}{len(warm_layout.fit(text, image.size).lines):>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Compare the pdf ingestion paths.
+
+legacy  - `pdftotext` writing a temporary file in the CWD that is read back (the former implementation)
+pipe    - `pdftotext` writing to stdout, read over a pipe
+python  - the in-process extractor in `QuoteEngine.pdf_text`
+
+Run with `python -m benchmarks.bench_pdf [--sizes 1000 10000]`.
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+
+from QuoteEngine import pdf_text
+from QuoteEngine.models import PdfIngestor
+from benchmarks.synthetic import quotes, write_pdf
+
+BUNDLED_PDF = './_data/DogQuotes/DogQuotesPDF.pdf'
+
+
+def legacy_text(path):
+    """Extract text the way `PdfIngestor` did before, through a temporary file."""
+    tmp = f'./{random.randint(0,100000000)}.txt'
+    subprocess.call(['pdftotext', path, tmp])
+    with open(tmp, 'r') as f:
+        text = f.read()
+    os.remove(tmp)
+    return text
+
+
+def pipe_text(path):
+    """Extract text with `pdftotext` over stdout."""
+    return subprocess.run(['pdftotext', path, '-'], stdout=subprocess.PIPE, check=True).stdout.decode('utf-8')
+
+
+def best_of(func, path, repeat):
+    """Return the fastest wall time of repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    """Run the benchmark and print a table of the timings."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000], help='Synthetic quote counts')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    paths = {'DogQuotesPDF.pdf': BUNDLED_PDF}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            path = os.path.join(tmp, f'synthetic_{size}.pdf')
+            write_pdf(path, quotes(size))
+            paths[f'synthetic {size}'] = path
+
+        methods = {'python': pdf_text.extract_text}
+        if shutil.which('pdftotext'):
+            methods = {'legacy': legacy_text, 'pipe': pipe_text, **methods}
+        else:
+            print('pdftotext is not installed, only the in-process extractor is measured')
+
+        print(f'{"file":<24}' + ''.join(f'{name:>12}' for name in methods) + f'{"quotes":>10}')
+        for label, path in paths.items():
+            row = ''.join(f'{best_of(func, path, args.repeat) * 1000:>10.1f}ms' for func in methods.values())
+            print(f'{label:<24}{row}{len(PdfIngestor.parse(path)):>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Compare the source decode and resize paths of `MemeEngine`.
+
+legacy  - full decode at native resolution and a NEAREST resize (the former implementation)
+draft   - JPEG draft-mode decode at the nearest DCT scale above the target and a LANCZOS resize
+
+Every render draws the caption and encodes the JPEG, the source cache is not used.
+
+Run with `python -m benchmarks.bench_resize [--megapixels 1 12 48]`.
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from PIL import Image, ImageDraw
+
+from MemeEngine.constants import FONT_PATH, FONT_SIZE
+from MemeEngine.meme_engine import MemeEngine
+from benchmarks.synthetic import write_jpeg
+
+
+def legacy_render(path, width=500):
+    """Render the meme the way `MemeEngine` did before, at native decode resolution."""
+    with Image.open(path) as image:
+        height = int(width / float(image.size[0]) * image.size[1])
+        image = image.resize((width, height), Image.Resampling.NEAREST)
+    ImageDraw.Draw(image).text((40, 40), 'Body. Author', font=MemeEngine.fonts.get(FONT_PATH, FONT_SIZE),
+                               fill=(255, 255, 255, 255))
+    buffer = io.BytesIO()
+    image.convert('RGB').save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+def best_of(func, path, repeat):
+    """Return the fastest wall time of repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    """Run the benchmark and print a table of the per-render latencies."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megapixels', type=float, nargs='*', default=[1, 4, 12, 24, 48])
+    parser.add_argument('--width', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = MemeEngine(tmp)
+        methods = {'legacy': lambda path: legacy_render(path, args.width),
+                   'draft': lambda path: engine.render_bytes(path, 'Body', 'Author', args.width)}
+        print(f'{"source":<20}{"file":>10}' + ''.join(f'{name:>12}' for name in methods) + f'{"speedup":>10}')
+        for megapixels in args.megapixels:
+            path = os.path.join(tmp, f'{megapixels}mp.jpg')
+            width, height = write_jpeg(path, megapixels)
+            timings = [best_of(func, path, args.repeat) for func in methods.values()]
+            row = ''.join(f'{timing * 1000:>10.1f}ms' for timing in timings)
+            size = f'{os.path.getsize(path) / 1024 / 1024:.1f}MB'
+            print(f'{f"{width}x{height}":<20}{size:>10}{row}{timings[0] / timings[-1]:>9.1f}x')
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Measure the startup time of the Flask worker and of the command-line tool.
+
+import  - `import app`, what a WSGI worker and the test collection pay before serving
+ready   - `import app` and waiting until the quotes, images and fonts are loaded
+help    - `python meme.py -h`, the whole process
+
+Every measurement is a fresh interpreter, the fastest of `--repeat` runs is shown.
+The app timings are taken inside the interpreter, from before the import until
+the app is importable or ready, so they leave out the interpreter startup and exit.
+
+With `--cold` the corpus cache and the image index are deleted before every run,
+as on the first start of a fresh checkout.
+
+Run with `python -m benchmarks.bench_startup [--cold]`.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from constants import CORPUS_CACHE_PATH, IMAGE_INDEX_PATH
+
+TIMED = ('import os, time\n'
+         'started = time.perf_counter()\n'
+         'import app\n'
+         '{wait}'
+         'print(time.perf_counter() - started, flush=True)\n'
+         'os._exit(0)\n')
+COMMANDS = {'import': [sys.executable, '-c', TIMED.format(wait='')],
+            'ready': [sys.executable, '-c', TIMED.format(wait='getattr(app, "warmup", None) and app.warmup.wait()\n')],
+            'help': [sys.executable, 'meme.py', '-h']}
+
+
+def clear_caches():
+    """Delete the persisted corpus cache and image index."""
+    for path in (CORPUS_CACHE_PATH, f'{CORPUS_CACHE_PATH}-wal', f'{CORPUS_CACHE_PATH}-shm', IMAGE_INDEX_PATH):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def best_of(command, repeat, cold=False):
+    """Return the fastest time of repeat runs, as printed by the command or the process wall time."""
+    timings = []
+    for _ in range(repeat):
+        if cold:
+            clear_caches()
+        started = time.perf_counter()
+        output = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout
+        elapsed = time.perf_counter() - started
+        if '-c' in command:
+            elapsed = float(output.decode().split()[-1])
+        timings.append(elapsed)
+    return min(timings)
+
+
+def main():
+    """Run the benchmark and print the startup times."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--cold', action='store_true', help='Delete the corpus cache and image index before every run')
+    args = parser.parse_args()
+    for name, command in COMMANDS.items():
+        print(f'{name:<8}{best_of(command, args.repeat, args.cold) * 1000:>10.1f}ms', flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compare rendering a meme in several widths with one `make_variants` call and with separate `make_meme` calls.
+
+separate  - one `make_meme` call per width, every call decodes the source and lays out the caption
+variants  - one `make_variants` call, the source is decoded and the caption laid out once at the largest width
+
+Both write the files to disk, the render cache and the source cache are not used.
+
+Run with `python -m benchmarks.bench_variants [--megapixels 1 12 --widths 250 500 1000]`.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from MemeEngine.meme_engine import MemeEngine
+from benchmarks.synthetic import write_jpeg
+
+
+def best_of(func, path, repeat):
+    """Return the fastest wall time of repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    """Run the benchmark and print a table of the latencies of a complete set of widths."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--megapixels', type=float, nargs='*', default=[1, 4, 12, 24])
+    parser.add_argument('--widths', type=int, nargs='*', default=[250, 500, 1000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = MemeEngine(tmp)
+        methods = {'separate': lambda path: [engine.make_meme(path, 'Body', 'Author', width) for width in args.widths],
+                   'variants': lambda path: engine.make_variants(path, 'Body', 'Author', args.widths)}
+        print(f'widths {", ".join(map(str, sorted(args.widths)))}')
+        print(f'{"source":<20}' + ''.join(f'{name:>12}' for name in methods) + f'{"speedup":>10}')
+        for megapixels in args.megapixels:
+            path = os.path.join(tmp, f'{megapixels}mp.jpg')
+            width, height = write_jpeg(path, megapixels)
+            timings = [best_of(func, path, args.repeat) for func in methods.values()]
+            row = ''.join(f'{timing * 1000:>10.1f}ms' for timing in timings)
+            print(f'{f"{width}x{height}":<20}{row}{timings[0] / timings[-1]:>9.1f}x')
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
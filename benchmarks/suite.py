@@ -0,0 +1,187 @@
+"""Time the ingest and render hot paths and compare them against a saved baseline.
+
+ingest/<format>/<quotes>      - `Ingestor.parse` of a synthetic file, without the corpus cache
+render/<megapixels>mp/<chars> - `MemeEngine.make_meme` of a synthetic photo with a caption of that length
+app/random                    - `GET /` with the pre-rendered pool bypassed, followed by a `GET` of the image the page
+                                links to; in the default memory mode that is `/meme.jpg`, rendered on every request
+                                because the in-memory meme cache is disabled for the case (the decoded source
+                                images and the caption layouts stay cached)
+app/create                    - `POST /create` through the Flask test client, the remote image fetch is stubbed
+
+Results are written as JSON with `--output`. With `--baseline` every case is compared
+to the saved results and the run fails when one is slower by more than `--threshold`.
+
+Run with `python -m benchmarks.suite [--sizes 1000 1000000] [--output results.json] [--baseline baseline.json]`.
+"""
+import argparse
+import datetime
+import html
+import io
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import PIL
+from PIL import Image
+
+from MemeEngine.meme_engine import MemeEngine
+from MemeEngine.render_cache import BytesCache
+from QuoteEngine.ingestor import Ingestor
+from benchmarks.synthetic import WRITERS, quotes, write_jpeg
+
+
+def best_of(func, repeat):
+    """Return the fastest wall time of repeat calls."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def selected(name, only):
+    """Tell if the case is run, all of them are when no prefixes are given."""
+    return not only or name.startswith(tuple(only))
+
+
+def ingest_cases(tmp, sizes, only=()):
+    """Yield (name, items, func) parsing a synthetic file per format and size."""
+    for size in sizes:
+        rows = quotes(size)
+        for extension, writer in WRITERS.items():
+            if not selected(f'ingest/{extension}/{size}', only):
+                continue
+            path = os.path.join(tmp, f'quotes_{size}.{extension}')
+            writer(path, rows)
+            yield f'ingest/{extension}/{size}', size, lambda path=path: Ingestor.parse(path)
+
+
+def render_cases(tmp, megapixels, captions, only=()):
+    """Yield (name, items, func) rendering a synthetic photo per size and caption length."""
+    engine = MemeEngine(os.path.join(tmp, 'out'))
+    for size in megapixels:
+        if not any(selected(f'render/{size:g}mp/{length}', only) for length in captions):
+            continue
+        path = os.path.join(tmp, f'{size}mp.jpg')
+        write_jpeg(path, size)
+        for length in captions:
+            if not selected(f'render/{size:g}mp/{length}', only):
+                continue
+            body = ('Treat yo self ' * (length // 14 + 1))[:length]
+            yield f'render/{size:g}mp/{length}', 1, lambda path=path, body=body: os.remove(
+                engine.make_meme(path, body, 'Fluffles'))
+
+
+def app_cases(requests, only=()):
+    """Yield (name, items, func) sending requests through the Flask test client."""
+    if not any(selected(name, only) for name in ('app/random', 'app/create')):
+        return
+    import app as web
+    web.warmup.wait()
+    if web.pool is not None:
+        web.pool.wait(60)
+
+    upload = io.BytesIO()
+    Image.new('RGB', (1200, 900), (40, 90, 160)).save(upload, 'JPEG')
+
+    def random_memes():
+        with web.app.test_client() as client, mock.patch.object(web, 'pool', None), \
+                mock.patch.object(web, 'memory_cache', BytesCache(max_bytes=0)):
+            for _ in range(requests):
+                response = client.get('/')
+                assert response.status_code == 200
+                src = html.unescape(re.search(r'src="([^"]+)"', response.data.decode()).group(1))
+                image = client.get(src)
+                assert image.status_code == 200
+                image.close()
+
+    def create_memes():
+        with web.app.test_client() as client, \
+                mock.patch.object(web.fetcher, 'fetch', return_value=upload.getvalue()):
+            for _ in range(requests):
+                data = {'image_url': 'https://example.com/dog.jpg', 'body': f'body {time.time_ns()}', 'author': 'a'}
+                assert client.post('/create', data=data).status_code == 200
+
+    for name, func in (('app/random', random_memes), ('app/create', create_memes)):
+        if selected(name, only):
+            yield name, requests, func
+
+
+def run(cases, repeat):
+    """Time the cases and return the results by name."""
+    results = {}
+    for name, items, func in cases:
+        seconds = best_of(func, repeat)
+        results[name] = {'seconds': seconds, 'items': items}
+        print(f'{name:<28}{seconds * 1000:>12.2f}ms{seconds / items * 1e6:>14.2f}us/item', flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Compare the results to the baseline ones.
+
+    :param results: the current results by name.
+    :param baseline: the saved results by name.
+    :param threshold: the tolerated relative slowdown, 0.1 is 10%.
+    :return: the (name, current, baseline, ratio, regressed) rows of the cases present in both.
+    """
+    rows = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]['seconds']
+        ratio = result['seconds'] / base if base else float('inf')
+        rows.append((name, result['seconds'], base, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    """Run the suite, save the results and compare them to the baseline."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000, 100000], help='Synthetic quote counts')
+    parser.add_argument('--megapixels', type=float, nargs='*', default=[1, 12, 48], help='Synthetic photo sizes')
+    parser.add_argument('--captions', type=int, nargs='*', default=[10, 100, 500], help='Caption lengths')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per app case')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', nargs='*', default=[], help='Run the cases with these name prefixes')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare to the results saved in this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Tolerated slowdown, 0.1 is 10%%')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for cases in (ingest_cases(tmp, args.sizes, args.only),
+                      render_cases(tmp, args.megapixels, args.captions, args.only),
+                      app_cases(args.requests, args.only)):
+            results.update(run(cases, args.repeat))
+
+    report = {'meta': {'created': datetime.datetime.now().isoformat(timespec='seconds'),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'pillow': PIL.__version__},
+              'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        rows = compare(results, baseline, args.threshold)
+        print(f'\n{"case":<28}{"current":>12}{"baseline":>12}{"change":>10}')
+        for name, current, base, ratio, regressed in rows:
+            flag = '  REGRESSION' if regressed else ''
+            print(f'{name:<28}{current * 1000:>10.2f}ms{base * 1000:>10.2f}ms{(ratio - 1) * 100:>+9.1f}%{flag}')
+        if any(row[-1] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
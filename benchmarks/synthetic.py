@@ -0,0 +1,118 @@
+"""Provide writers of synthetic quote files and photos for the benchmarks."""
+import csv
+import zipfile
+import zlib
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw
+
+LINES_PER_PAGE = 50
+
+
+def quotes(count):
+    """Return count (body, author) pairs."""
+    return [(f'Synthetic quote number {i} about treats and walks', f'Author {i % 997}') for i in range(count)]
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_pdf(path, rows):
+    """Write the quotes as a pdf with one '"body" - author' line per quote.
+
+    :param path: the output file path.
+    :param rows: the (body, author) pairs.
+    """
+    pages = [rows[i:i + LINES_PER_PAGE] for i in range(0, len(rows), LINES_PER_PAGE)] or [[]]
+    objects = {1: b'<< /Type /Catalog /Pages 2 0 R >>',
+               3: b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>'}
+    kids = []
+    for index, page in enumerate(pages):
+        page_num, content_num = 4 + 2 * index, 5 + 2 * index
+        kids.append(f'{page_num} 0 R')
+        lines = ['BT', '/F1 11 Tf', '14 TL', '50 760 Td']
+        lines += [f'({_escape(chr(34) + body + chr(34) + " - " + author)}) Tj T*' for body, author in page]
+        lines.append('ET')
+        content = zlib.compress('\n'.join(lines).encode('cp1252'))
+        objects[page_num] = (f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                             f'/Resources << /Font << /F1 3 0 R >> >> /Contents {content_num} 0 R >>').encode()
+        objects[content_num] = (f'<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n'.encode()
+                                + content + b'\nendstream')
+    objects[2] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'.encode()
+
+    out = bytearray(b'%PDF-1.4\n')
+    offsets = {}
+    for num in sorted(objects):
+        offsets[num] = len(out)
+        out += f'{num} 0 obj\n'.encode() + objects[num] + b'\nendobj\n'
+    xref = len(out)
+    out += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode()
+    for num in sorted(objects):
+        out += f'{offsets[num]:010d} 00000 n \n'.encode()
+    out += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode()
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def write_csv(path, rows):
+    """Write the quotes as a csv with body and author columns."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['body', 'author'])
+        writer.writerows(rows)
+
+
+def write_txt(path, rows):
+    """Write the quotes as text with one 'body - author' line per quote."""
+    with open(path, 'w') as f:
+        f.writelines(f'{body} - {author}\n' for body, author in rows)
+
+
+DOCX_CONTENT_TYPES = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                      '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                      '<Default Extension="rels" '
+                      'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                      '<Default Extension="xml" ContentType="application/xml"/>'
+                      '<Override PartName="/word/document.xml" ContentType="application/'
+                      'vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/></Types>')
+DOCX_RELS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+             '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+             '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+             'relationships/officeDocument" Target="word/document.xml"/></Relationships>')
+
+
+def write_docx(path, rows):
+    """Write the quotes as a minimal docx with one '"body" - author' paragraph per quote."""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', DOCX_CONTENT_TYPES)
+        archive.writestr('_rels/.rels', DOCX_RELS)
+        with archive.open('word/document.xml', 'w') as f:
+            f.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>')
+            for body, author in rows:
+                f.write(f'<w:p><w:r><w:t>"{escape(body)}" - {escape(author)}</w:t></w:r></w:p>'.encode('utf-8'))
+            f.write(b'</w:body></w:document>')
+
+
+WRITERS = {'csv': write_csv, 'txt': write_txt, 'docx': write_docx, 'pdf': write_pdf}
+
+
+def write_jpeg(path, megapixels, quality=90):
+    """Write a 4:3 photo-like JPEG of about the given number of megapixels.
+
+    :param path: the output file path.
+    :param megapixels: the pixel count in millions.
+    :param quality: the JPEG quality.
+    """
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = width * 3 // 4
+    image = Image.merge('RGB', [Image.linear_gradient('L').resize((width, height)),
+                                Image.radial_gradient('L').resize((width, height)),
+                                Image.linear_gradient('L').rotate(90).resize((width, height))])
+    draw = ImageDraw.Draw(image)
+    step = max(width // 40, 1)
+    for x in range(0, width, step):
+        draw.line([(x, 0), (width - x, height)], fill=(x % 255, 80, 160), width=max(step // 8, 1))
+    image.save(path, 'JPEG', quality=quality)
+    return width, height
@@ -1,9 +1,51 @@
 """Common constants."""
+import os
 
 IMAGE_SOURCE_PATH = './_data/photos/dog/'
 IMAGE_DESTINATION_PATH = './static'
+IMAGE_INDEX_PATH = './.cache/image_index.json'
 QUOTE_FILES = ['./_data/DogQuotes/DogQuotesTXT.txt',
                 './_data/DogQuotes/DogQuotesDOCX.docx',
                 './_data/DogQuotes/DogQuotesPDF.pdf',
                 './_data/DogQuotes/DogQuotesCSV.csv']
 
+RENDER_CACHE_MAX_ENTRIES = 1000
+RENDER_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SOURCE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+RENDER_BACKEND = 'thread'
+RENDER_WORKERS = os.cpu_count()
+RENDER_TIMEOUT = 10
+
+CORPUS_CACHE_PATH = './.cache/corpus.sqlite3'
+
+FETCH_CACHE_PATH = './.cache/images'
+FETCH_MAX_BYTES = 10 * 1024 * 1024
+FETCH_CONNECT_TIMEOUT = 3.05
+FETCH_READ_TIMEOUT = 10
+FETCH_DEADLINE = 20
+
+JOB_WORKERS = 4
+JOB_MAX_PENDING = 64
+JOB_TTL = 600
+JOB_MAX_WAIT = 30
+
+RANDOM_MEME_MODE = 'memory'
+MEMORY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+MEME_MAX_AGE = 24 * 60 * 60
+CAPTION_MAX_LENGTH = 500
+MEME_WIDTHS = (250, 500, 1000)
+MEME_DISPLAY_WIDTH = 500
+MEME_CODECS = ['avif', 'webp', 'jpeg']
+
+PRERENDER_POOL_SIZE = 100
+PRERENDER_POOL_PATH = './static/pool'
+
+RELOAD_INTERVAL = 2
+
+PROFILE_THRESHOLD = None
+PROFILE_INTERVAL = 0.005
+PROFILE_PATH = './.cache/profiles'
+
+WARMUP_ON_IMPORT = True
+WARMUP_TIMEOUT = 30
@@ -1,33 +1,55 @@
-"""Module implements la command line tool for generating memes."""
-import os
+"""Module implements la command line tool for generating memes.
+
+The engines are imported by the functions that use them, so `--help`
+and argument errors do not pay for loading Pillow and the ingestors.
+"""
+import csv
+import time
 import random
 import argparse
 
-from MemeEngine.meme_engine import MemeEngine
-from QuoteEngine.ingestor import Ingestor
-from QuoteEngine.models import QuoteModel
-from constants import QUOTE_FILES, IMAGE_SOURCE_PATH
+from constants import QUOTE_FILES, IMAGE_SOURCE_PATH, CORPUS_CACHE_PATH, IMAGE_INDEX_PATH
+
+
+def load_images():
+    """Collect the source image paths from the persisted image index."""
+    from MemeEngine.catalog import ImageCatalog
+    return ImageCatalog(IMAGE_SOURCE_PATH, IMAGE_INDEX_PATH).scan()
+
+
+def load_quotes(indexed=False):
+    """Parse all quote files.
+
+    :param indexed: build the word and author index for `QuoteStore.find`.
+    """
+    from QuoteEngine.ingestor import Ingestor
+    from QuoteEngine.corpus_cache import CorpusCache
+    from QuoteEngine.store import QuoteStore
+    Ingestor.cache = CorpusCache(CORPUS_CACHE_PATH)
+    quotes, _ = Ingestor.parse_many(QUOTE_FILES)
+    return QuoteStore(quotes, indexed=indexed)
 
 
-def generate_meme(path=None, body=None, author=None):
-    """Generate a meme given an path and a quote."""
+def generate_meme(path=None, body=None, author=None, search=None, by=None):
+    """Generate a meme given an path and a quote.
+
+    Without a body the quote is picked at random among the ones containing
+    the `search` words and written by the `by` author.
+    """
+    from MemeEngine.meme_engine import MemeEngine
+    from QuoteEngine.models import QuoteModel
     img = None
     quote = None
 
     if path is None:
-        imgs = []
-        for root, dirs, files in os.walk(IMAGE_SOURCE_PATH):
-            imgs = [os.path.join(root, name) for name in files]
-
-        img = random.choice(imgs)
+        img = random.choice(load_images())
     else:
         img = path[0]
 
     if body is None:
-        quotes = []
-        for file in QUOTE_FILES:
-            quotes.extend(Ingestor.parse(file))
-
+        quotes = load_quotes(indexed=bool(search or by)).find(search.split() if search else (), by)
+        if not quotes:
+            raise Exception('No quote matches the search')
         quote = random.choice(quotes)
     else:
         if author is None:
@@ -39,10 +61,88 @@ def generate_meme(path=None, body=None, author=None):
     return path
 
 
+def read_manifest(manifest):
+    """Read (image, body, author) rows from a csv manifest, empty cells are picked at random."""
+    with open(manifest) as f:
+        return [(row.get('image') or None, row.get('body') or None, row.get('author') or None)
+                for row in csv.DictReader(f)]
+
+
+def generate_batch(count=None, manifest=None, workers=None, output='./tmp'):
+    """Generate many memes loading images and quotes once and rendering on worker processes.
+
+    The workers decode the bundled images up front for random memes only, the images of a
+    manifest are decoded when they are rendered instead of by every worker before the first one.
+    The files are named after their render cache key, so every distinct meme gets its own file,
+    identical rows share one and a rerun reuses the files already in the output directory.
+
+    :param count: the number of random memes to generate.
+    :param manifest: the csv file with image, body and author columns.
+    :param workers: the number of worker processes.
+    :param output: the output directory.
+    :return: the list of generated file paths and the stage timings in seconds.
+    """
+    from MemeEngine.meme_engine import MemeEngine
+    from MemeEngine.executor import create_executor
+    from MemeEngine.render_cache import RenderCache
+    from QuoteEngine.models import QuoteModel
+    timings = {}
+    started = time.perf_counter()
+    imgs = load_images()
+    timings['load images'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rows = read_manifest(manifest) if manifest else [(None, None, None)] * count
+    quotes = load_quotes() if any(body is None for _, body, _ in rows) else []
+    timings['load quotes'] = time.perf_counter() - started
+
+    jobs = []
+    for img, body, author in rows:
+        if body is None:
+            quote = random.choice(quotes)
+        elif author is None:
+            raise Exception('Author Required if Body is Used')
+        else:
+            quote = QuoteModel(body, author)
+        jobs.append((img or random.choice(imgs), quote.body, quote.author))
+
+    started = time.perf_counter()
+    cache = RenderCache(output, max_entries=float('inf'), max_bytes=float('inf'))
+    executor = create_executor('process', MemeEngine(output, cache=cache), workers=workers,
+                               sources=imgs if manifest is None else ())
+    timings['start workers'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    try:
+        futures = [executor.submit(*job) for job in jobs]
+        paths = [future.result() for future in futures]
+    finally:
+        executor.shutdown()
+    timings['render'] = time.perf_counter() - started
+    return paths, timings
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Generate meme with quote')
     parser.add_argument('--path', type=str, default=None, help='Provide the source image path')
     parser.add_argument('--body', type=str, default=None, help='Provide the text to be printed on the image')
     parser.add_argument('--author', type=str, default=None, help='Provide the author of the quote')
+    parser.add_argument('--search', type=str, default=None, help='Pick a random quote containing these words')
+    parser.add_argument('--by', type=str, default=None, help='Pick a random quote by this author')
+    parser.add_argument('--count', type=int, default=None, help='Generate N random memes in parallel')
+    parser.add_argument('--manifest', type=str, default=None,
+                        help='Generate memes from a csv file with image, body and author columns')
+    parser.add_argument('--workers', type=int, default=None, help='Number of worker processes for batch mode')
+    parser.add_argument('--output', type=str, default='./tmp', help='Output directory for batch mode')
     args = parser.parse_args()
-    print(generate_meme(args.path, args.body, args.author))
+    if args.count is None and args.manifest is None:
+        print(generate_meme(args.path, args.body, args.author, args.search, args.by))
+    else:
+        started = time.perf_counter()
+        paths, timings = generate_batch(args.count, args.manifest, args.workers, args.output)
+        total = time.perf_counter() - started
+        for path in paths:
+            print(path)
+        for stage, seconds in timings.items():
+            print(f'{stage}: {seconds:.3f}s')
+        print(f'{len(paths)} memes in {total:.3f}s, {len(paths) / total:.1f} memes/sec')
@@ -0,0 +1,103 @@
+"""Provide in-process counters, gauges and latency histograms in the Prometheus text format.
+
+The engines report their stage timings through the `observer` hooks of
+`MemeEngine` and `Ingestor`, the application records the request latencies
+and copies the cache counters in as gauges when `/metrics` is scraped.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and histograms keyed by name and labels."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Construct a new empty `Metrics`.
+
+        :param buckets: the upper bounds in seconds of the histogram buckets.
+        """
+        self.buckets = tuple(buckets)
+        self._help = {}
+        self._types = {}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, text):
+        """Set the help text of the metric."""
+        self._help[name] = text
+
+    def inc(self, name, value=1, **labels):
+        """Add the value to the counter."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._types.setdefault(name, 'counter')
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        """Set the gauge to the value."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._types.setdefault(name, 'gauge')
+            self._values[key] = value
+
+    def observe(self, name, seconds, **labels):
+        """Record a duration in the histogram."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._types.setdefault(name, 'histogram')
+            histogram = self._values.get(key)
+            if histogram is None:
+                histogram = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[0][index] += 1
+                    break
+            histogram[1] += seconds
+            histogram[2] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Record the duration of the block in the histogram."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            values = sorted(self._values.items(), key=lambda item: item[0])
+            values = [(key, [list(value[0]), value[1], value[2]] if isinstance(value, list) else value)
+                      for key, value in values]
+        lines = []
+        current = None
+        for (name, labels), value in values:
+            if name != current:
+                current = name
+                if name in self._help:
+                    lines.append(f'# HELP {name} {self._help[name]}')
+                lines.append(f'# TYPE {name} {self._types[name]}')
+            if not isinstance(value, list):
+                lines.append(f'{name}{_labels(labels)} {value}')
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f'{name}_bucket{_labels(labels, [("le", bound)])} {cumulative}')
+            lines.append(f'{name}_bucket{_labels(labels, [("le", "+Inf")])} {count}')
+            lines.append(f'{name}_sum{_labels(labels)} {total}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,100 @@
+"""Provide sampling profiler for the request threads.
+
+A single background thread looks at the stacks of the threads that called
+`begin` every `interval` seconds through `sys._current_frames` and counts the
+collapsed stacks, so a request is profiled without the overhead of tracing
+every call. The samples of slow requests are written in the collapsed stack
+format that flame graph tools read. Threads doing work on behalf of a profiled
+thread, such as the render threads, `attach` to its samples so their stacks
+are merged into the same profile.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+
+class SamplingProfiler:
+    """Statistical profiler of the threads between `begin` and `end`."""
+
+    def __init__(self, interval=0.005, max_depth=64):
+        """Construct a new `SamplingProfiler`, the sampling thread starts with the first `begin`.
+
+        :param interval: the seconds between two samples.
+        :param max_depth: the number of innermost frames kept per sample.
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def begin(self):
+        """Start sampling the current thread."""
+        with self._lock:
+            self._active[threading.get_ident()] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def end(self) -> Counter:
+        """Stop sampling the current thread and return the counts of its collapsed stacks."""
+        with self._lock:
+            return self._active.pop(threading.get_ident(), Counter())
+
+    def current(self):
+        """Return the samples of the current thread, None when it is not profiled."""
+        with self._lock:
+            return self._active.get(threading.get_ident())
+
+    @contextmanager
+    def attach(self, samples):
+        """Sample the current thread into the samples of another thread for the duration of the block."""
+        ident = threading.get_ident()
+        with self._lock:
+            previous = self._active.get(ident)
+            self._active[ident] = samples
+        try:
+            yield
+        finally:
+            with self._lock:
+                if previous is None:
+                    self._active.pop(ident, None)
+                else:
+                    self._active[ident] = previous
+
+    @staticmethod
+    def dump(samples, path):
+        """Write the samples as 'outer;inner count' lines."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            for stack, count in samples.most_common():
+                f.write(f'{stack} {count}\n')
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                if not self._active:
+                    self._wake.clear()
+                    continue
+                for ident, samples in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        samples[self._collapse(frame)] += 1
+
+    def _collapse(self, frame):
+        names = []
+        while frame is not None and len(names) < self.max_depth:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
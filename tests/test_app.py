@@ -1,12 +1,22 @@
+import html
 import unittest
 import io
 from flask import Flask
-from app import app
-from PIL import Image
+from app import app, warmup, pool, watcher
+from MemeEngine.meme_engine import MemeEngine
+from MemeEngine.render_cache import BytesCache
+from MemeEngine.exceptions import FetchError
+from PIL import Image, ImageChops
 from unittest.mock import patch, MagicMock
 import pathlib
+import re
+import urllib.parse
 
 class TestApp(unittest.TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        if pool is not None:
+            pool.stop()
 
     @staticmethod
     def get_image_file(size=(50, 50),
@@ -17,23 +27,98 @@ class TestApp(unittest.TestCase):
         file_obj.seek(0)
         return file_obj.read()
 
-    @patch('app.meme')
+    @patch('app.pool', None)
+    @patch('app.RANDOM_MEME_MODE', 'disk')
+    @patch('app.renderer')
     def test_meme_rand(self, mock):
         with app.test_client() as client:
-            mock.make_meme.return_value = './static/61146707.jpg'
+            mock.render_variants.return_value = {250: './static/1.jpg', 500: './static/61146707.jpg',
+                                                 1000: './static/2.jpg'}
             response = client.get('/')
             data = response.data.decode()
             assert response.status_code in (200,)
-            assert './static/61146707.jpg' in data
+            assert 'src="./static/61146707.jpg"' in data
+            assert 'srcset="./static/1.jpg 250w, ./static/61146707.jpg 500w, ./static/2.jpg 1000w"' in data
 
-    @patch('app.requests.get')
-    @patch('MemeEngine.meme_engine.random.randint')
-    def test_meme_post(self, mock_random, mock_request):
+    def test_meme_rand_pool(self):
         with app.test_client() as client:
-            mock_response = MagicMock()
-            mock_response.content = self.get_image_file()
-            mock_request.return_value = mock_response
-            mock_random.return_value = 1234
+            with patch('app.pool') as mock_pool:
+                mock_pool.pick.return_value = {250: './static/pool/1.webp', 500: './static/pool/2.webp',
+                                               1000: './static/pool/3.webp'}
+                response = client.get('/', headers={'Accept': 'image/webp,*/*'})
+                data = response.data.decode()
+            mock_pool.pick.assert_called_once_with('webp')
+            assert 'Accept' in response.headers['Vary']
+            assert 'src="./static/pool/2.webp"' in data
+            assert 'srcset="./static/pool/1.webp 250w, ./static/pool/2.webp 500w, ./static/pool/3.webp 1000w"' in data
+
+    @patch('app.pool', None)
+    def test_meme_rand_memory(self):
+        with app.test_client() as client:
+            with patch('app.RANDOM_MEME_MODE', 'memory'):
+                data = client.get('/').data.decode()
+            url = html.unescape(re.search(r'src="([^"]+)"', data).group(1))
+            assert url.startswith('/meme.jpg?')
+            srcset = html.unescape(re.search(r'srcset="([^"]+)"', data).group(1))
+            assert [candidate.split()[1] for candidate in srcset.split(', ')] == ['250w', '500w', '1000w']
+            small = client.get(srcset.split()[0])
+            assert Image.open(io.BytesIO(small.data)).width == 250
+            assert client.get(url.replace('w=500', 'w=123')).status_code == 400
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.mimetype == 'image/jpeg'
+            assert response.headers['Cache-Control'] == 'public, max-age=86400'
+            Image.open(io.BytesIO(response.data)).verify()
+            cached = client.get(url, headers={'If-None-Match': response.headers['ETag']})
+            assert cached.status_code == 304
+            webp = client.get(url, headers={'Accept': 'image/webp,*/*;q=0.8'})
+            assert webp.mimetype == 'image/webp'
+            assert webp.headers['Vary'] == 'Accept'
+            assert webp.headers['ETag'] != response.headers['ETag']
+
+    @patch('app.RANDOM_MEME_MODE', 'memory')
+    def test_meme_rand_search(self):
+        with app.test_client() as client:
+            data = client.get('/?author=fluffles&q=treat').data.decode()
+            assert 'Treat+yo+self' in data or 'Treat%20yo%20self' in data
+            assert client.get('/?q=nothingmatchesthis').status_code == 404
+            assert client.get('/?q=').status_code == 200
+            assert client.get('/?q=%20%20&author=%20').status_code == 200
+
+    @patch('app.memory_cache', BytesCache())
+    def test_meme_image_widths_share_layout(self):
+        assert warmup.wait(30)
+        body, author = 'The same caption at every width', 'Tester'
+        captions = []
+        fit = MemeEngine.layout.fit
+
+        def spy(text, size):
+            caption = fit(text, size)
+            if text.startswith(body):
+                captions.append((size, caption))
+            return caption
+        name = sorted(watcher.content.image_names)[0]
+        images = {}
+        with app.test_client() as client, patch.object(MemeEngine.layout, 'fit', side_effect=spy):
+            for width in (250, 500, 1000):
+                query = urllib.parse.urlencode({'img': name, 'body': body, 'author': author, 'w': width})
+                response = client.get(f'/meme.jpg?{query}')
+                assert response.status_code == 200
+                images[width] = Image.open(io.BytesIO(response.data)).convert('L')
+        assert [size[0] for size, caption in captions] == [1000]
+        for width in (250, 500):
+            scaled = images[1000].resize(images[width].size)
+            changed = ImageChops.difference(scaled, images[width]).point(lambda value: 255 if value > 64 else 0)
+            assert changed.histogram()[255] < 0.01 * width * images[width].height
+
+    def test_meme_image_unknown(self):
+        with app.test_client() as client:
+            assert client.get('/meme.jpg?img=../app.py&body=a&author=b').status_code == 404
+
+    @patch('app.fetcher.fetch')
+    def test_meme_post(self, mock_fetch):
+        with app.test_client() as client:
+            mock_fetch.return_value = self.get_image_file()
             response = client.post('/create', data = {
                 'image_url': 'https://ttt.com',
                 'body': 'body',
@@ -41,4 +126,70 @@ class TestApp(unittest.TestCase):
             })
             data = response.data.decode()
             assert response.status_code in (200,)
-            assert './static/1234.jpg' in data
+            assert re.search(r'\./static/[0-9a-f]{32}\.jpg', data)
+            response = client.post('/create', headers={'Accept': 'text/html,image/webp,*/*;q=0.8'}, data = {
+                'image_url': 'https://ttt.com',
+                'body': 'body',
+                'author': 'author'
+            })
+            assert re.search(r'\./static/[0-9a-f]{32}\.webp 500w', response.data.decode())
+
+    @patch('app.fetcher.fetch', side_effect=FetchError('Cannot fetch'))
+    def test_meme_post_fetch_error(self, mock_fetch):
+        with app.test_client() as client:
+            response = client.post('/create', data = {
+                'image_url': 'https://ttt.com',
+                'body': 'body',
+                'author': 'author'
+            })
+            assert 'Invalid image file path' in response.data.decode()
+
+    @patch('app.fetcher.fetch')
+    def test_job(self, mock_fetch):
+        with app.test_client() as client:
+            mock_fetch.return_value = self.get_image_file()
+            response = client.post('/jobs', data = {
+                'image_url': 'https://ttt.com',
+                'body': 'job body',
+                'author': 'author'
+            }, headers={'Accept': 'image/webp,*/*'})
+            assert response.status_code == 202
+            job = response.get_json()
+            status = client.get(job['status_url'] + '?wait=10').get_json()
+            assert status['status'] == 'done'
+            assert list(status['result']) == ['250', '500', '1000']
+            assert all(path.endswith('.webp') for path in status['result'].values())
+            response = client.get(job['result_url'])
+            assert response.status_code == 200
+            data = response.data.decode()
+            assert f'src="{status["result"]["500"]}"' in data
+            assert f'{status["result"]["1000"]} 1000w' in data
+
+    def test_ready(self):
+        assert warmup.wait(30)
+        with app.test_client() as client:
+            response = client.get('/ready')
+            status = response.get_json()
+            assert response.status_code == 200
+            assert status['ready'] is True
+            assert set(status['steps']) == {'content', 'workers', 'fonts', 'background'}
+
+    def test_reload_stats(self):
+        warmup.wait(30)
+        with app.test_client() as client:
+            stats = client.get('/reload').get_json()
+            assert stats['reloads'] >= 1
+            assert stats['images'] == 4
+
+    def test_metrics(self):
+        with app.test_client() as client:
+            client.get('/jobs/unknown')
+            response = client.get('/metrics')
+            text = response.data.decode()
+            assert response.mimetype == 'text/plain'
+            assert 'http_requests_total{endpoint="job_status",status="404"}' in text
+            assert 'render_cache_hits' in text
+
+    def test_job_unknown(self):
+        with app.test_client() as client:
+            assert client.get('/jobs/unknown').status_code == 404
@@ -0,0 +1,18 @@
+import unittest
+
+from benchmarks.suite import compare, selected
+
+
+class TestSuite(unittest.TestCase):
+    def test_compare(self):
+        results = {'a': {'seconds': 1.05}, 'b': {'seconds': 2.0}, 'new': {'seconds': 1.0}}
+        baseline = {'a': {'seconds': 1.0}, 'b': {'seconds': 1.0}, 'gone': {'seconds': 1.0}}
+        rows = {row[0]: row for row in compare(results, baseline, 0.1)}
+        self.assertEqual(sorted(rows), ['a', 'b'])
+        self.assertFalse(rows['a'][-1])
+        self.assertTrue(rows['b'][-1])
+
+    def test_selected(self):
+        self.assertTrue(selected('ingest/csv/1000', []))
+        self.assertTrue(selected('ingest/csv/1000', ['ingest/csv', 'app']))
+        self.assertFalse(selected('render/1mp/10', ['ingest']))
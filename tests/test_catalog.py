@@ -0,0 +1,60 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from MemeEngine.catalog import ImageCatalog
+
+IMAGE_PATH = str(pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg')
+
+
+class TestImageCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'photos')
+        os.makedirs(os.path.join(self.root, 'a', 'b'))
+        shutil.copy(IMAGE_PATH, os.path.join(self.root, 'top.jpg'))
+        shutil.copy(IMAGE_PATH, os.path.join(self.root, 'a', 'one.jpg'))
+        shutil.copy(IMAGE_PATH, os.path.join(self.root, 'a', 'b', 'two.jpg'))
+        with open(os.path.join(self.root, 'a', 'notes.txt'), 'w') as f:
+            f.write('not an image')
+        with open(os.path.join(self.root, 'a', 'broken.png'), 'w') as f:
+            f.write('not an image either')
+        self.index = os.path.join(self.tmp.name, 'index.json')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_recursive_scan(self):
+        catalog = ImageCatalog(self.root, self.index)
+        paths = catalog.scan()
+        self.assertEqual([os.path.relpath(path, self.root) for path in paths],
+                         [os.path.join('a', 'b', 'two.jpg'), os.path.join('a', 'one.jpg'), 'top.jpg'])
+        entry = catalog.get(paths[0])
+        self.assertEqual(entry.format, 'JPEG')
+        self.assertGreater(entry.width, 0)
+        self.assertIsNone(catalog.get(os.path.join(self.root, 'a', 'broken.png')))
+
+    def test_symlink_cycle(self):
+        os.symlink(self.root, os.path.join(self.root, 'a', 'b', 'loop'))
+        os.symlink(os.path.join(self.root, 'a'), os.path.join(self.root, 'again'))
+        paths = ImageCatalog(self.root).scan()
+        self.assertEqual(sorted(os.path.basename(path) for path in paths), ['one.jpg', 'top.jpg', 'two.jpg'])
+
+    def test_persisted_and_incremental(self):
+        ImageCatalog(self.root, self.index).scan()
+        catalog = ImageCatalog(self.root, self.index)
+        self.assertEqual(len(catalog), 3)
+        catalog.scan()
+        self.assertEqual(catalog.probes, 0)
+        shutil.copy(IMAGE_PATH, os.path.join(self.root, 'a', 'three.jpg'))
+        self.assertEqual(len(catalog.scan()), 4)
+        self.assertEqual(catalog.probes, 1)
+
+    def test_formats(self):
+        catalog = ImageCatalog(self.root, formats={'PNG'})
+        self.assertEqual(catalog.scan(), [])
+        catalog = ImageCatalog(self.root)
+        catalog.scan()
+        self.assertEqual(catalog.images(formats={'PNG'}), [])
@@ -0,0 +1,71 @@
+import os
+import sqlite3
+import tempfile
+import tracemalloc
+import unittest
+from unittest.mock import patch
+
+from QuoteEngine.corpus_cache import CorpusCache
+from QuoteEngine.ingestor import Ingestor
+from QuoteEngine.models import QuoteModel, TextIngestor
+
+
+class TestCorpusCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = CorpusCache(os.path.join(self.tmp.name, 'cache', 'corpus.sqlite3'))
+        self.source = os.path.join(self.tmp.name, 'quotes.txt')
+        self.write('To bork or not to bork - Bork\nHe who smelt it... - Stinky\n')
+
+    def tearDown(self):
+        Ingestor.cache = None
+        self.tmp.cleanup()
+
+    def write(self, content):
+        with open(self.source, 'w') as f:
+            f.write(content)
+
+    def test_unchanged_file_is_not_parsed(self):
+        Ingestor.cache = self.cache
+        quotes = Ingestor.parse(self.source)
+        with patch.object(TextIngestor, 'parse') as mock_parse:
+            self.assertEqual(Ingestor.parse(self.source), quotes)
+            mock_parse.assert_not_called()
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_changed_file_is_parsed_again(self):
+        Ingestor.cache = self.cache
+        Ingestor.parse(self.source)
+        self.write('Treat yo self - Fluffles\n')
+        self.assertEqual(Ingestor.parse(self.source), [QuoteModel('Treat yo self', 'Fluffles')])
+        self.assertEqual(self.cache.load(self.source), [QuoteModel('Treat yo self', 'Fluffles')])
+
+    def test_touched_file_is_matched_by_content(self):
+        self.cache.store(self.source, TextIngestor.parse(self.source))
+        stat = os.stat(self.source)
+        os.utime(self.source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertEqual(len(self.cache.load(self.source)), 2)
+
+    def test_flat_memory(self):
+        with open(self.source, 'w') as f:
+            for i in range(200000):
+                f.write(f'Quote number {i} - Author {i}\n')
+        Ingestor.cache = self.cache
+        tracemalloc.start()
+        count = sum(1 for _ in Ingestor.iter_parse(self.source))
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        self.assertEqual(count, 200000)
+        self.assertLess(peak, 1024 * 1024)
+        self.assertEqual(sum(1 for _ in self.cache.iter_quotes(self.source)), 200000)
+
+    def test_interrupted_parse_keeps_quotes(self):
+        self.cache.store(self.source, TextIngestor.parse(self.source))
+        self.write('Treat yo self - Fluffles\n' * 5)
+        with patch.object(CorpusCache, 'batch_size', 2):
+            quotes = self.cache.record(self.source, TextIngestor.parse(self.source))
+            next(quotes), next(quotes), next(quotes)
+            quotes.close()
+        self.assertEqual([quote.author for quote in self.cache.iter_quotes(self.source)], ['Bork', 'Stinky'])
+        with sqlite3.connect(self.cache.db_path) as db:
+            self.assertEqual(db.execute('SELECT COUNT(*) FROM quotes').fetchone()[0], 2)
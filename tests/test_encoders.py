@@ -0,0 +1,35 @@
+import unittest
+from unittest.mock import patch
+
+from MemeEngine.constants import JPEG_OPTIONS
+from MemeEngine.encoders import available, codec_options, get_codec, negotiate
+
+CHROME = [('image/avif', 1), ('image/webp', 1), ('image/apng', 1), ('image/*', 0.8), ('*/*', 0.8)]
+
+
+class TestEncoders(unittest.TestCase):
+    def test_negotiate(self):
+        names = ['avif', 'webp', 'jpeg']
+        with patch('MemeEngine.encoders.available', side_effect=lambda name: name != 'avif'):
+            self.assertEqual(negotiate(CHROME, names), 'webp')
+        with patch('MemeEngine.encoders.available', return_value=True):
+            self.assertEqual(negotiate(CHROME, names), 'avif')
+            self.assertEqual(negotiate([('*/*', 1)], names), 'jpeg')
+            self.assertEqual(negotiate([('image/webp', 0), ('image/*', 1)], names), 'jpeg')
+            self.assertEqual(negotiate([], names), 'jpeg')
+
+    def test_codec_options(self):
+        self.assertEqual(codec_options('balanced')['jpeg'], JPEG_OPTIONS)
+        self.assertEqual(codec_options('small')['webp']['method'], 6)
+        options = codec_options('fast', {'webp': {'quality': 50}})
+        self.assertEqual(options['webp'], {'quality': 50, 'method': 0})
+        with self.assertRaises(ValueError):
+            codec_options('tiny')
+        with self.assertRaises(ValueError):
+            codec_options('balanced', {'gif': {}})
+
+    def test_get_codec(self):
+        self.assertEqual(get_codec('webp').mimetype, 'image/webp')
+        self.assertTrue(available('jpeg'))
+        with self.assertRaises(ValueError):
+            get_codec('gif')
@@ -0,0 +1,97 @@
+import concurrent.futures
+import io
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from MemeEngine.executor import create_executor, InlineExecutor, ThreadExecutor, ProcessExecutor
+from MemeEngine.meme_engine import MemeEngine
+from MemeEngine.render_cache import RenderCache
+
+IMAGE_PATH = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+
+
+class TestRenderExecutor(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.engine = MemeEngine(self.tmp.name, cache=RenderCache(self.tmp.name))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_create_executor(self):
+        self.assertIsInstance(create_executor('inline', self.engine), InlineExecutor)
+        executor = create_executor('thread', self.engine, workers=2)
+        self.assertIsInstance(executor, ThreadExecutor)
+        executor.shutdown()
+        with self.assertRaises(ValueError):
+            create_executor('gpu', self.engine)
+
+    def test_inline_propagates_errors(self):
+        with self.assertRaises(FileNotFoundError):
+            create_executor('inline', self.engine).render('unknown.jpg', 'a', 'b')
+
+    def test_thread_render(self):
+        executor = create_executor('thread', self.engine, workers=2)
+        try:
+            paths = {executor.render(IMAGE_PATH, 'body', 'author', timeout=10) for _ in range(4)}
+        finally:
+            executor.shutdown()
+        self.assertEqual(len(paths), 1)
+        self.assertTrue(os.path.exists(paths.pop()))
+
+    def test_process_render(self):
+        executor = ProcessExecutor(self.engine, workers=2, sources=[IMAGE_PATH])
+        try:
+            path = executor.render(IMAGE_PATH, 'body', 'author', timeout=30)
+            upload = executor.render(io.BytesIO(IMAGE_PATH.read_bytes()), 'upload', 'author', timeout=30)
+            self.assertEqual(executor.render(IMAGE_PATH, 'body', 'author', timeout=30), path)
+        finally:
+            executor.shutdown()
+        self.assertTrue(os.path.exists(path))
+        self.assertTrue(os.path.exists(upload))
+        self.assertEqual(self.engine.cache.stats()['hits'], 1)
+
+    def test_process_warm(self):
+        executor = ProcessExecutor(self.engine, workers=2, width=100)
+        try:
+            self.assertEqual(len(executor.warm([IMAGE_PATH, 'unknown.jpg'])), 2)
+            self.assertEqual(len(executor.warm([IMAGE_PATH], 200)), 2)
+            path = executor.render(IMAGE_PATH, 'body', 'author', width=100, timeout=30)
+        finally:
+            executor.shutdown()
+        self.assertTrue(os.path.exists(path))
+
+    def test_render_variants_bytes(self):
+        expected = self.engine.render_variants_bytes(IMAGE_PATH, 'body', 'author', (250, 500))
+        for executor in (InlineExecutor(self.engine), ThreadExecutor(self.engine, workers=1),
+                         ProcessExecutor(self.engine, workers=1)):
+            try:
+                data = executor.render_variants_bytes(IMAGE_PATH, 'body', 'author', (500, 250), timeout=30)
+            finally:
+                executor.shutdown()
+            self.assertEqual(data, expected)
+
+    def test_process_render_variants(self):
+        executor = ProcessExecutor(self.engine, workers=1, sources=[IMAGE_PATH])
+        try:
+            paths = executor.render_variants(IMAGE_PATH, 'body', 'author', (250, 500), timeout=30)
+            self.assertEqual(executor.render_variants(IMAGE_PATH, 'body', 'author', (250, 500), timeout=30), paths)
+        finally:
+            executor.shutdown()
+        self.assertEqual(sorted(paths), [250, 500])
+        self.assertTrue(all(os.path.exists(path) for path in paths.values()))
+        self.assertEqual(self.engine.cache.stats()['hits'], 2)
+
+    def test_timeout(self):
+        executor = create_executor('thread', self.engine, workers=1)
+        release = concurrent.futures.Future()
+        try:
+            with patch.object(self.engine, 'make_meme', side_effect=lambda *args: release.result()):
+                with self.assertRaises(concurrent.futures.TimeoutError):
+                    executor.render(IMAGE_PATH, 'body', 'author', timeout=0.01)
+        finally:
+            release.set_result(None)
+            executor.shutdown()
@@ -0,0 +1,160 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from MemeEngine.exceptions import FetchError, ImageTooLargeError
+from MemeEngine.fetcher import ImageFetcher
+
+IMAGE = b'\xff\xd8' + b'x' * 1000
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests = []
+
+    def do_GET(self):
+        Handler.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.path.startswith('/image'):
+            if self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', '"v1"')
+            self.send_header('Cache-Control', 'max-age=0' if 'stale' in self.path else 'max-age=60')
+            self.send_header('Content-Length', str(len(IMAGE)))
+            self.end_headers()
+            self.wfile.write(IMAGE)
+        elif self.path == '/big':
+            self.send_response(200)
+            self.end_headers()
+            for _ in range(100):
+                self.wfile.write(b'x' * 1024)
+        elif self.path == '/trickle':
+            self.send_response(200)
+            try:
+                for index in range(100):
+                    self.send_header(f'X-Trickle-{index}', 'x')
+                    self.flush_headers()
+                    time.sleep(0.05)
+                self.end_headers()
+            except OSError:
+                pass
+        elif self.path == '/slow':
+            self.send_response(200)
+            self.send_header('Content-Length', '100')
+            self.end_headers()
+            try:
+                for _ in range(100):
+                    self.wfile.write(b'x')
+                    self.wfile.flush()
+                    time.sleep(0.05)
+            except OSError:
+                pass
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestImageFetcher(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        cls.server.daemon_threads = True
+        cls.url = f'http://127.0.0.1:{cls.server.server_port}'
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.requests = []
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_fresh_response_is_cached(self):
+        fetcher = ImageFetcher(self.tmp.name)
+        self.assertEqual(fetcher.fetch(self.url + '/image'), IMAGE)
+        self.assertEqual(fetcher.fetch(self.url + '/image'), IMAGE)
+        self.assertEqual(len(Handler.requests), 1)
+        self.assertEqual(fetcher.stats()['hits'], 1)
+
+    def test_stale_response_is_revalidated(self):
+        fetcher = ImageFetcher(self.tmp.name)
+        fetcher.fetch(self.url + '/image-stale')
+        self.assertEqual(fetcher.fetch(self.url + '/image-stale'), IMAGE)
+        self.assertEqual(Handler.requests[-1], ('/image-stale', '"v1"'))
+        self.assertEqual(fetcher.stats()['revalidations'], 1)
+
+    def test_disk_cache_survives_restart(self):
+        ImageFetcher(self.tmp.name).fetch(self.url + '/image')
+        self.assertEqual(ImageFetcher(self.tmp.name).fetch(self.url + '/image'), IMAGE)
+        self.assertEqual(len(Handler.requests), 1)
+
+    def test_concurrent_disk_writes(self):
+        fetcher = ImageFetcher(cache_dir=self.tmp.name)
+        errors = []
+        response = type('Response', (), {'headers': {'Cache-Control': 'max-age=60'}})()
+
+        def store(index):
+            try:
+                for _ in range(50):
+                    fetcher._store('same', bytes([index]) * 100000, response)
+            except Exception as ex:
+                errors.append(ex)
+        threads = [threading.Thread(target=store, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ['same.bin', 'same.json'])
+
+    def test_disk_write_failure_is_not_fatal(self):
+        fetcher = ImageFetcher(cache_dir=self.tmp.name)
+        with patch('MemeEngine.fetcher.open', side_effect=OSError('disk full'), create=True):
+            self.assertEqual(fetcher.fetch(self.url + '/image'), IMAGE)
+        self.assertEqual(os.listdir(self.tmp.name), [])
+
+    def test_lru_eviction(self):
+        fetcher = ImageFetcher(max_entries=2)
+        for name in ('a', 'b', 'a', 'c'):
+            fetcher.fetch(self.url + '/image-' + name)
+        fetcher.fetch(self.url + '/image-a')
+        fetcher.fetch(self.url + '/image-b')
+        self.assertEqual([path for path, _ in Handler.requests], ['/image-a', '/image-b', '/image-c', '/image-b'])
+        self.assertEqual(fetcher.stats()['evictions'], 2)
+
+    def test_size_limit(self):
+        with self.assertRaises(ImageTooLargeError):
+            ImageFetcher(max_bytes=10 * 1024).fetch(self.url + '/big')
+
+    def test_deadline(self):
+        started = time.monotonic()
+        with self.assertRaises(FetchError):
+            ImageFetcher(read_timeout=2, deadline=0.3).fetch(self.url + '/slow')
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_deadline_covers_headers(self):
+        started = time.monotonic()
+        with self.assertRaises(FetchError):
+            ImageFetcher(read_timeout=2, deadline=0.3).fetch(self.url + '/trickle')
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_http_error(self):
+        with self.assertRaises(FetchError):
+            ImageFetcher().fetch(self.url + '/missing')
+
+    def test_connection_error(self):
+        with self.assertRaises(FetchError):
+            ImageFetcher(connect_timeout=0.5).fetch('http://127.0.0.1:1/image')
@@ -0,0 +1,29 @@
+import threading
+import unittest
+
+from MemeEngine.constants import FONT_PATH
+from MemeEngine.fonts import FontRegistry
+
+
+class TestFontRegistry(unittest.TestCase):
+    def test_loads_each_size_once(self):
+        fonts = FontRegistry()
+        self.assertIs(fonts.get(FONT_PATH, 15), fonts.get(FONT_PATH, 15))
+        self.assertIsNot(fonts.get(FONT_PATH, 15), fonts.get(FONT_PATH, 20))
+        self.assertEqual(fonts.loads, 2)
+
+    def test_warm(self):
+        fonts = FontRegistry()
+        fonts.warm(sizes=(10, 12, 14))
+        self.assertEqual(len(fonts), 3)
+
+    def test_shared_across_threads(self):
+        fonts = FontRegistry()
+        loaded = []
+        threads = [threading.Thread(target=lambda: loaded.append(fonts.get(FONT_PATH, 30))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(fonts.loads, 1)
+        self.assertEqual(len({id(font) for font in loaded}), 1)
@@ -0,0 +1,37 @@
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from MemeEngine.image_cache import SourceImageCache
+from MemeEngine.meme_engine import MemeEngine
+
+IMAGE_PATH = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+
+
+class TestSourceImageCache(unittest.TestCase):
+    def test_decodes_once(self):
+        cache = SourceImageCache()
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = MemeEngine(tmp, source_cache=cache)
+            engine.make_meme(IMAGE_PATH, 'one', 'a')
+            with patch('PIL.Image.open') as mock_open:
+                engine.make_meme(IMAGE_PATH, 'two', 'a')
+                mock_open.assert_not_called()
+        self.assertEqual(cache.stats()['hits'], 1)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_returns_independent_copies(self):
+        cache = SourceImageCache()
+        first = cache.get(IMAGE_PATH, 100, MemeEngine._decode)
+        first.paste((0, 0, 0), (0, 0, 100, 100))
+        second = cache.get(IMAGE_PATH, 100, MemeEngine._decode)
+        self.assertNotEqual(first.tobytes(), second.tobytes())
+
+    def test_memory_ceiling(self):
+        cache = SourceImageCache(max_bytes=100 * 100 * 3)
+        cache.get(IMAGE_PATH, 100, MemeEngine._decode)
+        cache.get(IMAGE_PATH, 90, MemeEngine._decode)
+        self.assertEqual(cache.stats()['entries'], 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+        self.assertLessEqual(cache.stats()['bytes'], cache.max_bytes)
@@ -1,8 +1,15 @@
+import os
+import shutil
+import tempfile
+import time
 import unittest
 import pathlib
 from functools import reduce
+from unittest.mock import patch
 
+from QuoteEngine.corpus_cache import CorpusCache
 from QuoteEngine.ingestor import Ingestor
+from QuoteEngine.models import TextIngestor
 
 
 class TestIngestor(unittest.TestCase):
@@ -23,3 +30,44 @@ class TestIngestor(unittest.TestCase):
         for result in ['To bork or not to bork', 'Bork', 'He who smelt it...', 'Stinky', 'RAWRGWAWGGR', 'Chewy', 'Bark like no one’s listening', 'Rex', 'Life is like peanut butter: crunchy', 'Peanut',
                        'Channel your inner husky', 'Tiny', 'Treat yo self', 'Fluffles', 'Life is like a box of treats', 'Forrest Pup', "It's the size of the fight in the dog", 'Bark Twain']:
             self.assertIn(result, all_quotes_as_str)
+
+    def test_parse_many(self):
+        paths = [str(file) for file in self.source_files]
+        quotes, errors = Ingestor.parse_many(paths[:1] + ['unknownfile.txt'] + paths[1:])
+        expected = []
+        for path in paths:
+            expected.extend(Ingestor.parse(path))
+        self.assertEqual(quotes, expected)
+        self.assertEqual(list(errors), ['unknownfile.txt'])
+        self.assertIsInstance(errors['unknownfile.txt'], FileNotFoundError)
+
+    def test_parse_many_processes(self):
+        paths = [str(file) for file in self.source_files]
+        quotes, errors = Ingestor.parse_many(paths, processes=True)
+        self.assertEqual(len(quotes), 9)
+        self.assertEqual(errors, {})
+
+    def test_parse_many_with_cache(self):
+        def slow_parse(path):
+            for quote in parse(path):
+                time.sleep(0.2)
+                yield quote
+        parse = TextIngestor.iter_parse
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for index in range(4):
+                paths.append(os.path.join(tmp, f'quotes{index}.txt'))
+                shutil.copy(self.source_files[0], paths[-1])
+            Ingestor.cache = CorpusCache(os.path.join(tmp, 'corpus.sqlite3'))
+            try:
+                with patch.object(TextIngestor, 'iter_parse', side_effect=slow_parse):
+                    started = time.perf_counter()
+                    quotes, errors = Ingestor.parse_many(paths)
+                    elapsed = time.perf_counter() - started
+                cached = Ingestor.parse_many(paths)[0]
+            finally:
+                Ingestor.cache = None
+        self.assertEqual(errors, {})
+        self.assertEqual(cached, quotes)
+        self.assertEqual(len(quotes), 4 * len(Ingestor.parse(str(self.source_files[0]))))
+        self.assertLess(elapsed, 2 * len(quotes) / 4 * 0.2)
@@ -0,0 +1,42 @@
+import threading
+import unittest
+
+from MemeEngine.exceptions import QueueFullError
+from MemeEngine.jobs import JobQueue
+
+
+class TestJobQueue(unittest.TestCase):
+    def test_result(self):
+        queue = JobQueue(workers=2)
+        job = queue.submit(lambda a, b: a + b, 1, 2)
+        self.assertTrue(job.wait(5))
+        self.assertEqual(queue.get(job.id).to_dict(), {'id': job.id, 'status': 'done', 'result': 3, 'error': None})
+        queue.shutdown()
+
+    def test_failure(self):
+        queue = JobQueue(workers=1)
+        job = queue.submit(lambda: 1 / 0)
+        job.wait(5)
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.error, 'division by zero')
+        queue.shutdown()
+
+    def test_backpressure(self):
+        queue = JobQueue(workers=1, max_pending=2)
+        release = threading.Event()
+        queue.submit(release.wait)
+        queue.submit(release.wait)
+        with self.assertRaises(QueueFullError):
+            queue.submit(release.wait)
+        self.assertEqual(queue.stats()['rejected'], 1)
+        release.set()
+        queue.shutdown()
+        self.assertEqual(queue.stats()['pending'], 0)
+
+    def test_expired_jobs_are_purged(self):
+        queue = JobQueue(workers=1, ttl=0)
+        job = queue.submit(lambda: None)
+        job.wait(5)
+        queue.submit(lambda: None).wait(5)
+        self.assertIsNone(queue.get(job.id))
+        queue.shutdown()
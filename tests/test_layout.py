@@ -0,0 +1,45 @@
+import unittest
+
+from MemeEngine.fonts import FontRegistry
+from MemeEngine.layout import CaptionLayout
+
+LONG_QUOTE = ('To bathe a dog is a lot of work, but you will be rewarded with the cleanest and happiest dog '
+              'in the neighborhood. Bark Twain')
+
+
+class TestCaptionLayout(unittest.TestCase):
+    def setUp(self):
+        self.layout = CaptionLayout(FontRegistry())
+
+    def assertInside(self, caption, size):
+        x, y, width, height = caption.box
+        self.assertGreaterEqual(x, self.layout.margin)
+        self.assertGreaterEqual(y, self.layout.margin)
+        self.assertLessEqual(x + width, size[0] - self.layout.margin)
+        self.assertLessEqual(y + height, size[1] - self.layout.margin)
+
+    def test_wraps_long_caption(self):
+        caption = self.layout.fit(LONG_QUOTE, (500, 500))
+        self.assertGreater(len(caption.lines), 1)
+        self.assertEqual(' '.join(line for _, line in caption.lines), LONG_QUOTE)
+        for _, line in caption.lines:
+            self.assertLessEqual(caption.font.getlength(line), 500 - 2 * self.layout.margin + 1)
+        self.assertInside(caption, (500, 500))
+
+    def test_short_caption_uses_large_font(self):
+        short = self.layout.fit('Woof. Rex', (500, 500))
+        long = self.layout.fit(LONG_QUOTE, (500, 500))
+        self.assertEqual(short.font.size, self.layout.max_size)
+        self.assertLess(long.font.size, short.font.size)
+        self.assertInside(short, (500, 500))
+
+    def test_deterministic_and_cached(self):
+        first = self.layout.fit(LONG_QUOTE, (500, 400))
+        self.assertEqual(CaptionLayout(FontRegistry()).fit(LONG_QUOTE, (500, 400)).lines, first.lines)
+        self.assertIs(self.layout.fit(LONG_QUOTE, (500, 400)), first)
+        self.assertEqual(self.layout.stats()['hits'], 1)
+
+    def test_splits_word_wider_than_image(self):
+        caption = self.layout.fit('W' * 200, (300, 300))
+        self.assertGreater(len(caption.lines), 1)
+        self.assertEqual(''.join(line for _, line in caption.lines), 'W' * 200)
@@ -0,0 +1,49 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from MemeEngine import executor
+from meme import generate_batch
+
+IMAGE_PATH = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+
+
+class TestBatch(unittest.TestCase):
+    def test_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, 'manifest.csv')
+            with open(manifest, 'w') as f:
+                f.write('image,body,author\n')
+                f.write(f'{IMAGE_PATH},Chase the mailman,Skittle\n')
+                f.write(f'{IMAGE_PATH},Treat yo self,Fluffles\n')
+            with patch.object(executor, 'create_executor', wraps=executor.create_executor) as create:
+                paths, timings = generate_batch(manifest=manifest, workers=2, output=tmp)
+            self.assertEqual(create.call_args.kwargs['sources'], ())
+            self.assertEqual(len(paths), 2)
+            self.assertTrue(all(os.path.exists(path) for path in paths))
+            self.assertEqual(list(timings), ['load images', 'load quotes', 'start workers', 'render'])
+
+    def test_author_required(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, 'manifest.csv')
+            with open(manifest, 'w') as f:
+                f.write('image,body,author\n')
+                f.write(f'{IMAGE_PATH},Chase the mailman,\n')
+            with self.assertRaises(Exception):
+                generate_batch(manifest=manifest, output=tmp)
+
+    def test_unique_names(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            manifest = os.path.join(tmp, 'manifest.csv')
+            with open(manifest, 'w') as f:
+                f.write('image,body,author\n')
+                f.write(f'{IMAGE_PATH},Chase the mailman,Skittle\n')
+                f.write(f'{IMAGE_PATH},Treat yo self,Fluffles\n')
+                f.write(f'{IMAGE_PATH},Chase the mailman,Skittle\n')
+            with patch('MemeEngine.meme_engine.random.randint', return_value=7):
+                paths = generate_batch(manifest=manifest, workers=2, output=tmp)[0]
+            self.assertEqual(len(set(paths)), 2)
+            self.assertEqual(paths[0], paths[2])
+            self.assertEqual(generate_batch(manifest=manifest, workers=1, output=tmp)[0], paths)
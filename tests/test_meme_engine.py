@@ -2,8 +2,13 @@ from PIL import Image
 import unittest
 import pathlib
 import os
+import io
+import tempfile
+from unittest.mock import patch
 
 from MemeEngine.meme_engine import MemeEngine
+from MemeEngine.catalog import ImageCatalog
+from MemeEngine.render_cache import RenderCache
 
                            
 class TestMemeEngine(unittest.TestCase):
@@ -18,3 +23,119 @@ class TestMemeEngine(unittest.TestCase):
         image_path = pathlib.Path(__file__).parent.resolve() / 'test_image.jpg'
         with self.assertRaises(FileNotFoundError):
             MemeEngine('./tmp').make_meme(image_path, '', '')
+
+    def test_render_bytes(self):
+        image_path = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+        with tempfile.TemporaryDirectory() as tmp:
+            data = MemeEngine(tmp).render_bytes(image_path, 'Treat yo self', 'Fluffles')
+            self.assertEqual(os.listdir(tmp), [])
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.format, 'JPEG')
+            self.assertEqual(image.size, (500, 500))
+
+    def test_target_size_from_catalog(self):
+        image_dir = str(pathlib.Path(__file__).parent.resolve() / 'utils')
+        catalog = ImageCatalog(image_dir)
+        catalog.scan()
+        image_path = os.path.join(image_dir, 'test_image.jpg')
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = MemeEngine(tmp, catalog=catalog)
+            self.assertEqual(engine.target_size(image_path, 250), (250, 250))
+            self.assertIsNone(engine.target_size('unknown.jpg'))
+            data = engine.render_bytes(image_path, 'Treat yo self', 'Fluffles', 250)
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.size, (250, 250))
+
+    def test_target_size_of_replaced_image(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            image_path = os.path.join(tmp, 'source.jpg')
+            Image.new('RGB', (200, 100)).save(image_path)
+            catalog = ImageCatalog(tmp)
+            catalog.scan()
+            Image.new('RGB', (100, 200)).save(image_path)
+            stat = os.stat(image_path)
+            os.utime(image_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+            engine = MemeEngine(os.path.join(tmp, 'out'), catalog=catalog)
+            self.assertIsNone(engine.target_size(image_path, 50))
+            data = engine.render_bytes(image_path, 'Treat yo self', 'Fluffles', 50)
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertEqual(image.size, (50, 100))
+
+    def test_draft_decode_large_jpeg(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, 'large.jpg')
+            Image.new('RGB', (4000, 3000), (10, 120, 200)).save(source, 'JPEG')
+            image = MemeEngine._decode(source, 500)
+            self.assertEqual(image.size, (500, 375))
+            self.assertGreater(image.getpixel((250, 180))[2], 150)
+
+    def test_encode_options(self):
+        image_path = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = MemeEngine(tmp, encode_options={'progressive': True, 'quality': 60})
+            data = engine.render_bytes(image_path, 'Treat yo self', 'Fluffles')
+            self.assertNotEqual(engine.variant, MemeEngine(tmp).variant)
+        with Image.open(io.BytesIO(data)) as image:
+            self.assertTrue(image.info.get('progressive'))
+        with self.assertRaises(ValueError):
+            MemeEngine('./tmp', resample='unknown')
+
+    def test_observer_stages(self):
+        image_path = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+        stages = []
+        MemeEngine.observer = lambda stage, seconds: stages.append(stage)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                MemeEngine(tmp).make_meme(image_path, 'Treat yo self', 'Fluffles')
+        finally:
+            MemeEngine.observer = None
+        self.assertEqual(stages, ['decode', 'resize', 'layout', 'draw', 'encode', 'write'])
+
+    def test_make_variants(self):
+        image_path = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+        stages = []
+        MemeEngine.observer = lambda stage, seconds: stages.append(stage)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                engine = MemeEngine(tmp, cache=RenderCache(tmp))
+                paths = engine.make_variants(image_path, 'Treat yo self', 'Fluffles', widths=(500, 100, 250))
+                self.assertEqual(list(paths), [100, 250, 500])
+                for width, path in paths.items():
+                    with Image.open(path) as image:
+                        self.assertEqual(image.size, (width, width))
+                self.assertEqual(paths[500], engine.make_meme(image_path, 'Treat yo self', 'Fluffles', 500))
+                self.assertEqual(engine.make_variants(image_path, 'Treat yo self', 'Fluffles', (100, 250, 500)), paths)
+        finally:
+            MemeEngine.observer = None
+        self.assertEqual(stages.count('decode'), 1)
+        self.assertEqual(stages.count('layout'), 1)
+        self.assertEqual(stages.count('write'), 3)
+
+    def test_render_variants_bytes(self):
+        image_path = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+        with tempfile.TemporaryDirectory() as tmp:
+            data = MemeEngine(tmp).render_variants_bytes(image_path, 'Treat yo self', 'Fluffles', (250, 500))
+            self.assertEqual(os.listdir(tmp), [])
+        for width, encoded in data.items():
+            with Image.open(io.BytesIO(encoded)) as image:
+                self.assertEqual(image.size, (width, width))
+
+    def test_output_codecs(self):
+        image_path = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = MemeEngine(tmp, cache=RenderCache(tmp))
+            jpeg = engine.make_meme(image_path, 'Treat yo self', 'Fluffles')
+            webp = engine.make_meme(image_path, 'Treat yo self', 'Fluffles', codec='webp')
+            self.assertEqual(engine.make_meme(image_path, 'Treat yo self', 'Fluffles', codec='webp'), webp)
+            self.assertTrue(webp.endswith('.webp'))
+            with Image.open(webp) as image:
+                self.assertEqual(image.format, 'WEBP')
+            self.assertLess(os.path.getsize(webp), os.path.getsize(jpeg))
+            with Image.open(io.BytesIO(engine.render_bytes(image_path, 'a', 'b', codec='pjpeg'))) as image:
+                self.assertTrue(image.info.get('progressive'))
+            with self.assertRaises(ValueError):
+                engine.make_meme(image_path, 'Treat yo self', 'Fluffles', codec='gif')
+            with patch('MemeEngine.encoders.available', return_value=False):
+                with self.assertRaises(ValueError):
+                    engine.render_bytes(image_path, 'Treat yo self', 'Fluffles', codec='avif')
+        self.assertNotEqual(MemeEngine('./tmp', preset='small').identity('webp'), MemeEngine('./tmp').identity('webp'))
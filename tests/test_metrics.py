@@ -0,0 +1,35 @@
+import unittest
+
+from metrics import Metrics
+
+
+class TestMetrics(unittest.TestCase):
+    def test_counter_and_gauge(self):
+        metrics = Metrics()
+        metrics.describe('requests_total', 'Requests.')
+        metrics.inc('requests_total', endpoint='a')
+        metrics.inc('requests_total', 2, endpoint='a')
+        metrics.set('entries', 5)
+        text = metrics.render()
+        self.assertIn('# HELP requests_total Requests.\n# TYPE requests_total counter\n', text)
+        self.assertIn('requests_total{endpoint="a"} 3\n', text)
+        self.assertIn('# TYPE entries gauge\nentries 5\n', text)
+
+    def test_histogram(self):
+        metrics = Metrics(buckets=(0.1, 1.0))
+        metrics.observe('latency_seconds', 0.05, stage='draw')
+        metrics.observe('latency_seconds', 0.5, stage='draw')
+        metrics.observe('latency_seconds', 5, stage='draw')
+        with metrics.timer('latency_seconds', stage='encode'):
+            pass
+        lines = metrics.render().splitlines()
+        self.assertIn('latency_seconds_bucket{stage="draw",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_bucket{stage="draw",le="1.0"} 2', lines)
+        self.assertIn('latency_seconds_bucket{stage="draw",le="+Inf"} 3', lines)
+        self.assertIn('latency_seconds_sum{stage="draw"} 5.55', lines)
+        self.assertIn('latency_seconds_count{stage="encode"} 1', lines)
+
+    def test_label_escaping(self):
+        metrics = Metrics()
+        metrics.inc('errors_total', path='a"b\\c')
+        self.assertIn('errors_total{path="a\\"b\\\\c"} 1', metrics.render())
@@ -1,8 +1,14 @@
+import os
 import pathlib
+import tempfile
+import tracemalloc
+import types
 import unittest
+from unittest.mock import patch
 import docx
 
 from QuoteEngine.ingestor import CSVIngestor, QuoteModel, PdfIngestor, DocxIngestor, TextIngestor
+from QuoteEngine.ingestor import Ingestor
 
 SOURSE_FOLDER = pathlib.Path(__file__).parent.resolve() / 'utils/'
 
@@ -93,3 +99,28 @@ class TestTxtIngestor(unittest.TestCase):
         with self.assertRaises(Exception) as ex:
             TextIngestor.parse('file.pdf')
         self.assertEqual("('Cannot ingest', 'file.pdf')", str(ex.exception))
+
+
+class TestStreaming(unittest.TestCase):
+    def test_iter_parse_is_lazy(self):
+        quotes = TextIngestor.iter_parse(str(SOURSE_FOLDER / 'quotesTXT.txt'))
+        self.assertIsInstance(quotes, types.GeneratorType)
+        self.assertEqual(next(quotes), QuoteModel('To bork or not to bork', 'Bork'))
+
+    def test_iter_batches(self):
+        batches = list(DocxIngestor.iter_batches(str(SOURSE_FOLDER / 'quotesDOCX.docx'), size=3))
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+
+    def test_flat_memory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'quotes.txt')
+            with open(path, 'w') as f:
+                for i in range(200000):
+                    f.write(f'Quote number {i} - Author {i}\n')
+            with patch.object(Ingestor, 'cache', None):
+                tracemalloc.start()
+                count = sum(1 for _ in Ingestor.iter_parse(path))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        self.assertEqual(count, 200000)
+        self.assertLess(peak, 1024 * 1024)
@@ -0,0 +1,26 @@
+import pathlib
+import unittest
+from unittest.mock import patch
+
+from QuoteEngine.models import PdfIngestor, QuoteModel
+from QuoteEngine.pdf_text import extract_text, Lexer, Ref, Name
+
+SOURSE_FOLDER = pathlib.Path(__file__).parent.resolve() / 'utils/'
+
+
+class TestPdfText(unittest.TestCase):
+    def test_extract_text(self):
+        text = extract_text(str(SOURSE_FOLDER / 'quotesPDF.pdf'))
+        self.assertEqual(text.splitlines()[0], '"Treat yo self" - Fluffles')
+        self.assertTrue(text.endswith('\f'))
+
+    def test_lexer(self):
+        obj = Lexer(b'<< /Kids [4 0 R 5 0 R] /Count 2 /Title (a \\(b\\)) /Id <4142> >>').parse_object()
+        self.assertEqual(obj, {'Kids': [Ref(4, 0), Ref(5, 0)], 'Count': 2, 'Title': b'a (b)', 'Id': b'AB'})
+        self.assertIsInstance(list(obj)[0], Name)
+
+    @patch('QuoteEngine.models.shutil.which', return_value=None)
+    def test_fallback_without_pdftotext(self, mock_which):
+        quotes = PdfIngestor.parse(str(SOURSE_FOLDER / 'quotesPDF.pdf'))
+        self.assertEqual(quotes[0], QuoteModel('Treat yo self', 'Fluffles'))
+        mock_which.assert_called_with('pdftotext')
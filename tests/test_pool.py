@@ -0,0 +1,85 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from MemeEngine.pool import PrerenderPool
+from QuoteEngine.models import QuoteModel
+from QuoteEngine.store import QuoteStore
+
+IMAGE_PATH = str(pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg')
+
+
+class TestPrerenderPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.quotes = QuoteStore(QuoteModel(f'body {i}', 'author') for i in range(5))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_renders_all_combinations(self):
+        pool = PrerenderPool(self.tmp.name, size=None, widths=(100,))
+        self.assertIsNone(pool.pick())
+        pool.refresh([IMAGE_PATH], self.quotes)
+        self.assertTrue(pool.wait(30))
+        pool.stop()
+        self.assertEqual(len(pool), 5)
+        self.assertTrue(os.path.exists(pool.pick()[100]))
+
+    def test_widths_and_codecs(self):
+        pool = PrerenderPool(self.tmp.name, size=1, widths=(50, 100), codecs=('webp', 'jpeg'))
+        pool.refresh([IMAGE_PATH], self.quotes)
+        self.assertTrue(pool.wait(30))
+        pool.stop()
+        webp, jpeg = pool.pick('webp'), pool.pick('jpeg')
+        self.assertEqual(list(webp), [50, 100])
+        self.assertTrue(all(path.endswith('.webp') and os.path.exists(path) for path in webp.values()))
+        self.assertTrue(all(path.endswith('.jpg') and os.path.exists(path) for path in jpeg.values()))
+        self.assertEqual(pool.pick(), webp)
+        self.assertIsNone(pool.pick('avif'))
+        self.assertEqual(len(os.listdir(self.tmp.name)), 4)
+
+    def test_size_limit(self):
+        pool = PrerenderPool(self.tmp.name, size=2, widths=(100,))
+        pool.refresh([IMAGE_PATH], self.quotes)
+        self.assertTrue(pool.wait(30))
+        pool.stop()
+        self.assertEqual(len(pool), 2)
+
+    def test_refill_on_change(self):
+        pool = PrerenderPool(self.tmp.name, size=None, widths=(100,))
+        pool.refresh([IMAGE_PATH], self.quotes)
+        pool.wait(30)
+        rendered = pool.rendered
+        quotes = QuoteStore(list(self.quotes)[1:] + [QuoteModel('new body', 'author')])
+        pool.refresh([IMAGE_PATH], quotes)
+        self.assertTrue(pool.wait(30))
+        pool.stop()
+        self.assertEqual(len(pool), 5)
+        self.assertEqual(pool.rendered, rendered + 1)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 5)
+
+    def test_image_modified_in_place(self):
+        image = os.path.join(self.tmp.name, 'source.jpg')
+        shutil.copy(IMAGE_PATH, image)
+        output = os.path.join(self.tmp.name, 'pool')
+        pool = PrerenderPool(output, size=None, widths=(100,))
+        pool.refresh([image], self.quotes)
+        self.assertTrue(pool.wait(30))
+        before = set(os.listdir(output))
+        stat = os.stat(image)
+        os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        pool.refresh([image], self.quotes)
+        self.assertTrue(pool.wait(30))
+        pool.stop()
+        self.assertEqual(len(pool), 5)
+        self.assertEqual(pool.rendered, 10)
+        after = set(os.listdir(output))
+        self.assertEqual(len(after), 5)
+        self.assertFalse(before & after)
+
+    def test_candidates(self):
+        for total in (1, 2, 3, 12, 97):
+            self.assertEqual(sorted(PrerenderPool._candidates(total)), list(range(total)))
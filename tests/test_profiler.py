@@ -0,0 +1,44 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from MemeEngine.executor import RenderExecutor, ThreadExecutor
+from MemeEngine.meme_engine import MemeEngine
+from profiler import SamplingProfiler
+
+
+def busy_wait(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    def test_samples_current_thread(self):
+        profiler = SamplingProfiler(interval=0.001)
+        profiler.begin()
+        busy_wait(0.1)
+        samples = profiler.end()
+        self.assertTrue(samples)
+        self.assertTrue(any('busy_wait' in stack for stack in samples))
+        self.assertEqual(profiler.end(), {})
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'profiles', 'slow.txt')
+            profiler.dump(samples, path)
+            with open(path) as f:
+                stack, count = f.readline().rsplit(' ', 1)
+            self.assertGreater(int(count), 0)
+
+    def test_render_thread_is_merged(self):
+        profiler = SamplingProfiler(interval=0.001)
+        with tempfile.TemporaryDirectory() as tmp:
+            executor = ThreadExecutor(MemeEngine(tmp), workers=1)
+            with patch.object(RenderExecutor, 'profiler', profiler), \
+                    patch.object(executor.engine, 'make_meme', side_effect=lambda *args: busy_wait(0.1)):
+                profiler.begin()
+                executor.render('image.jpg', 'body', 'author', timeout=10)
+                samples = profiler.end()
+            executor.shutdown()
+        self.assertTrue(any('busy_wait' in stack for stack in samples))
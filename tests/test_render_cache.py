@@ -0,0 +1,59 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from MemeEngine.meme_engine import MemeEngine
+from MemeEngine.render_cache import RenderCache
+
+IMAGE_PATH = pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg'
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(self.tmp.name, max_entries=2)
+        self.engine = MemeEngine(self.tmp.name, cache=self.cache)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_hit_skips_rendering(self):
+        path = self.engine.make_meme(IMAGE_PATH, 'Treat yo self', 'Fluffles')
+        with patch('PIL.Image.open') as mock_open:
+            self.assertEqual(self.engine.make_meme(IMAGE_PATH, 'Treat yo self', 'Fluffles'), path)
+            mock_open.assert_not_called()
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_key_depends_on_content(self):
+        keys = {self.cache.key(IMAGE_PATH, 'a', 'b', 500),
+                self.cache.key(IMAGE_PATH, 'a', 'c', 500),
+                self.cache.key(IMAGE_PATH, 'a', 'b', 400)}
+        self.assertEqual(len(keys), 3)
+
+    def test_evicts_least_recently_used(self):
+        first = self.engine.make_meme(IMAGE_PATH, 'one', 'a')
+        second = self.engine.make_meme(IMAGE_PATH, 'two', 'a')
+        self.engine.make_meme(IMAGE_PATH, 'one', 'a')
+        self.engine.make_meme(IMAGE_PATH, 'three', 'a')
+        self.assertTrue(os.path.exists(first))
+        self.assertFalse(os.path.exists(second))
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_adopts_existing_files(self):
+        path = self.engine.make_meme(IMAGE_PATH, 'one', 'a')
+        cache = RenderCache(self.tmp.name)
+        self.assertEqual(MemeEngine(self.tmp.name, cache=cache).make_meme(IMAGE_PATH, 'one', 'a'), path)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_extensions_share_directory(self):
+        key = self.cache.key(IMAGE_PATH, 'a', 'b', 500)
+        for extension in ('jpg', 'webp'):
+            with open(self.cache.path_for(key, extension), 'wb') as f:
+                f.write(b'x')
+            self.cache.put(key, extension)
+        self.assertTrue(self.cache.get(key, 'webp').endswith('.webp'))
+        self.assertTrue(self.cache.get(key).endswith('.jpg'))
+        self.assertEqual(RenderCache(self.tmp.name).stats()['entries'], 2)
@@ -0,0 +1,77 @@
+import random
+import unittest
+
+from QuoteEngine.models import QuoteModel
+from QuoteEngine.search import QuoteIndex, tokenize
+from QuoteEngine.store import QuoteStore
+
+
+class TestQuoteIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = QuoteIndex()
+        self.index.add(0, 'Treat yo self', 'Fluffles')
+        self.index.add(1, 'Life is better with a dog, treat him well', 'Bark Twain')
+        self.index.add(2, 'A dog is a friend', 'bark  TWAIN')
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Dog, dog and DOG!'), ['dog', 'and'])
+
+    def test_query(self):
+        self.assertEqual(list(self.index.query(['treat'])), [0, 1])
+        self.assertEqual(list(self.index.query(author='Bark Twain')), [1, 2])
+        self.assertEqual(list(self.index.query(['dog'], author='bark twain')), [1, 2])
+        self.assertEqual(list(self.index.query(['Treat dog'])), [1])
+        self.assertEqual(list(self.index.query('friend')), [2])
+        self.assertEqual(list(self.index.query(['cat'])), [])
+        self.assertEqual(list(self.index.query(['treat'], author='Nobody')), [])
+
+    def test_incremental(self):
+        self.assertEqual(list(self.index.query(['dog'], author='Fluffles')), [])
+        self.index.add(3, 'Every dog has its day', 'Fluffles')
+        self.assertEqual(list(self.index.query(['dog'], author='Fluffles')), [3])
+
+    def test_remove_and_move(self):
+        copy = self.index.copy()
+        copy.remove(0, 'Treat yo self', 'Fluffles')
+        copy.move(2, 0, 'A dog is a friend', 'bark  TWAIN')
+        self.assertEqual(list(copy.query(['treat'])), [1])
+        self.assertEqual(list(copy.query(['dog'], author='Bark Twain')), [0, 1])
+        self.assertEqual(list(copy.query(author='Fluffles')), [])
+        self.assertNotIn('fluffles', copy.authors())
+        self.assertEqual(list(self.index.query(['dog'])), [1, 2])
+
+
+class TestQuoteStoreFind(unittest.TestCase):
+    def test_find(self):
+        store = QuoteStore([QuoteModel('Treat yo self', 'Fluffles'),
+                            QuoteModel('Treat yo self', 'Fluffles'),
+                            QuoteModel('Bark at the moon', 'Rex')], indexed=True)
+        matches = store.find(['treat'])
+        self.assertEqual(list(matches), [QuoteModel('Treat yo self', 'Fluffles')])
+        self.assertEqual(random.choice(store.find(author='rex')), QuoteModel('Bark at the moon', 'Rex'))
+        self.assertEqual(len(store.find()), 2)
+        store.add(QuoteModel('Treat time', 'Rex'))
+        self.assertEqual(store.find(['treat'], 'Rex')[0], QuoteModel('Treat time', 'Rex'))
+
+    def test_find_empty_terms(self):
+        store = QuoteStore([QuoteModel('Treat yo self', 'Fluffles'), QuoteModel('Bark at the moon', 'Rex')],
+                           indexed=True)
+        self.assertEqual(len(store.find([''])), 2)
+        self.assertEqual(len(store.find(['  ', '!?'], author=' ')), 2)
+        self.assertEqual(list(store.find(['', 'moon'])), [QuoteModel('Bark at the moon', 'Rex')])
+
+    def test_remove(self):
+        store = QuoteStore([QuoteModel('Treat yo self', 'Fluffles'), QuoteModel('Bark at the moon', 'Rex'),
+                            QuoteModel('Treat time', 'Rex')], indexed=True)
+        copy = store.copy()
+        self.assertTrue(copy.remove(QuoteModel('Treat yo self', 'Fluffles')))
+        self.assertFalse(copy.remove(QuoteModel('Treat yo self', 'Fluffles')))
+        self.assertEqual(list(copy), [QuoteModel('Treat time', 'Rex'), QuoteModel('Bark at the moon', 'Rex')])
+        self.assertEqual(list(copy.find(['treat'])), [QuoteModel('Treat time', 'Rex')])
+        self.assertEqual(list(copy.find(author='rex')), list(copy))
+        self.assertEqual(len(store), 3)
+        self.assertEqual(len(store.find(['treat'])), 2)
+
+    def test_find_without_index(self):
+        with self.assertRaises(ValueError):
+            QuoteStore([QuoteModel('Treat yo self', 'Fluffles')]).find(['treat'])
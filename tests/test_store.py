@@ -0,0 +1,36 @@
+import random
+import sys
+import unittest
+
+from QuoteEngine.models import QuoteModel
+from QuoteEngine.store import QuoteStore
+
+
+class TestQuoteModel(unittest.TestCase):
+    def test_value_hash(self):
+        self.assertEqual(len({QuoteModel('Treat yo self', 'Fluffles'), QuoteModel('Treat yo self', 'Fluffles')}), 1)
+        self.assertNotEqual(QuoteModel('a', 'b'), 'a - b')
+
+    def test_slots(self):
+        quote = QuoteModel('a', 'b')
+        self.assertFalse(hasattr(quote, '__dict__'))
+
+
+class TestQuoteStore(unittest.TestCase):
+    def test_deduplicates(self):
+        store = QuoteStore([QuoteModel('a', 'x'), QuoteModel('a', 'x'), QuoteModel('a', 'y'), QuoteModel('b', 'x')])
+        self.assertEqual(len(store), 3)
+        self.assertEqual(list(store), [QuoteModel('a', 'x'), QuoteModel('a', 'y'), QuoteModel('b', 'x')])
+        self.assertEqual(store.add(QuoteModel('a', 'y')), 1)
+        self.assertEqual(store.extend([QuoteModel('a', 'x'), QuoteModel('c', 'z')]), 1)
+
+    def test_interns_authors(self):
+        store = QuoteStore([QuoteModel('c', ''.join(['Flu', 'ffles']))])
+        self.assertIs(store[0].author, sys.intern('Fluffles'))
+
+    def test_sequence(self):
+        store = QuoteStore(QuoteModel(f'body {i}', 'author') for i in range(10))
+        self.assertEqual(store[-1], QuoteModel('body 9', 'author'))
+        self.assertEqual(store[1:3], [QuoteModel('body 1', 'author'), QuoteModel('body 2', 'author')])
+        self.assertIn(random.choice(store), store)
+        self.assertNotIn(QuoteModel('body 1', 'other'), store)
@@ -0,0 +1,44 @@
+import unittest
+
+from warmup import Warmup
+
+
+class TestWarmup(unittest.TestCase):
+    def test_runs_steps_in_order(self):
+        calls = []
+        warmup = Warmup([('first', lambda: calls.append('first')), ('second', lambda: calls.append('second'))])
+        self.assertFalse(warmup.ready)
+        self.assertEqual(calls, [])
+        self.assertTrue(warmup.wait(5))
+        self.assertEqual(calls, ['first', 'second'])
+        status = warmup.status()
+        self.assertTrue(status['ready'])
+        self.assertEqual(list(status['steps']), ['first', 'second'])
+        self.assertEqual(status['errors'], {})
+
+    def test_failed_step(self):
+        def fail():
+            raise ValueError('broken')
+        calls = []
+        warmup = Warmup([('fail', fail), ('never', lambda: calls.append('never'))])
+        warmup.start()
+        self.assertFalse(warmup.wait(5))
+        self.assertEqual(calls, [])
+        self.assertFalse(warmup.ready)
+        self.assertEqual(warmup.status()['errors'], {'fail': 'ValueError: broken'})
+        self.assertFalse(warmup.wait(5, step='never'))
+
+    def test_failed_optional_step(self):
+        def fail():
+            raise ValueError('broken')
+        calls = []
+        warmup = Warmup([('content', lambda: calls.append('content')), ('fonts', fail),
+                         ('background', lambda: calls.append('background'))], required=['content'])
+        self.assertTrue(warmup.wait(5, step='content'))
+        self.assertTrue(warmup.wait(5))
+        self.assertFalse(warmup.wait(5, step='fonts'))
+        self.assertEqual(calls, ['content', 'background'])
+        status = warmup.status()
+        self.assertTrue(status['ready'])
+        self.assertEqual(list(status['steps']), ['content', 'background'])
+        self.assertEqual(status['errors'], {'fonts': 'ValueError: broken'})
@@ -0,0 +1,123 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from QuoteEngine import search
+from QuoteEngine.ingestor import Ingestor
+from QuoteEngine.models import QuoteModel
+from watcher import ContentWatcher
+
+IMAGE_PATH = str(pathlib.Path(__file__).parent.resolve() / 'utils/' / 'test_image.jpg')
+
+
+class TestContentWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.images = os.path.join(self.tmp.name, 'images')
+        os.makedirs(os.path.join(self.images, 'nested'))
+        shutil.copy(IMAGE_PATH, os.path.join(self.images, 'a.jpg'))
+        shutil.copy(IMAGE_PATH, os.path.join(self.images, 'nested', 'b.jpg'))
+        self.txt = os.path.join(self.tmp.name, 'quotes.txt')
+        self.csv = os.path.join(self.tmp.name, 'quotes.csv')
+        self.write(self.txt, 'first - author\n')
+        self.write(self.csv, 'body,author\nsecond,author\n')
+        self.watcher = ContentWatcher([self.txt, self.csv], self.images)
+        self.watcher.load()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    @staticmethod
+    def write(path, text):
+        with open(path, 'w') as f:
+            f.write(text)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    def test_load(self):
+        content = self.watcher.content
+        self.assertEqual(len(content.quotes), 2)
+        self.assertEqual(sorted(content.image_names), ['a.jpg', os.path.join('nested', 'b.jpg')])
+        self.assertFalse(self.watcher.poll())
+
+    def test_reload_changed_file_only(self):
+        previous = self.watcher.content
+        self.write(self.txt, 'first - author\nthird - author\n')
+        parsed = []
+        original = Ingestor.parse
+        Ingestor.parse = lambda path: parsed.append(path) or original(path)
+        try:
+            self.assertTrue(self.watcher.poll())
+        finally:
+            Ingestor.parse = original
+        self.assertEqual(parsed, [self.txt])
+        self.assertEqual(len(self.watcher.content.quotes), 3)
+        self.assertEqual(len(previous.quotes), 2)
+        self.assertEqual(self.watcher.stats()['files_reloaded'], 3)
+
+    def test_index_updated_incrementally(self):
+        self.write(self.csv, 'body,author\nsecond,author\nfourth,author\nfifth,author\n')
+        watcher = ContentWatcher([self.txt, self.csv], self.images, indexed=True)
+        watcher.load()
+        previous = watcher.content
+        self.write(self.txt, 'third - author\nsecond - author\n')
+        with patch.object(search, 'tokenize', wraps=search.tokenize) as tokenize:
+            self.assertTrue(watcher.poll())
+        self.assertEqual(sorted(call.args[0] for call in tokenize.call_args_list), ['fifth', 'first', 'third'])
+        quotes = watcher.content.quotes
+        self.assertEqual(sorted(quote.body for quote in quotes), ['fifth', 'fourth', 'second', 'third'])
+        self.assertEqual(list(quotes.find(['third'])), [QuoteModel('third', 'author')])
+        self.assertEqual(list(quotes.find(['first'])), [])
+        self.assertEqual(list(previous.quotes.find(['first'])), [QuoteModel('first', 'author')])
+        self.write(self.csv, 'body,author\n')
+        self.assertTrue(watcher.poll())
+        self.assertEqual(len(watcher.content.quotes.find(['second'])), 1)
+
+    def test_images_and_listeners(self):
+        seen = []
+        self.watcher.listeners.append(seen.append)
+        os.remove(os.path.join(self.images, 'a.jpg'))
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(list(self.watcher.content.image_names), [os.path.join('nested', 'b.jpg')])
+        self.assertEqual(seen, [self.watcher.content])
+
+    def test_image_modified_in_place(self):
+        seen = []
+        self.watcher.listeners.append(seen.append)
+        path = os.path.join(self.images, 'a.jpg')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(seen, [self.watcher.content])
+        self.assertFalse(self.watcher.poll())
+
+    def test_failure_keeps_quotes(self):
+        self.write(self.csv, 'wrong,header\nx,y\n')
+        self.watcher.poll()
+        self.assertEqual(self.watcher.stats()['failures'], 1)
+        self.assertEqual(len(self.watcher.content.quotes), 2)
+        self.assertFalse(self.watcher.poll())
+        self.assertEqual(self.watcher.stats()['failures'], 2)
+        self.write(self.csv, 'body,author\nsecond,author\nfourth,author\n')
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(len(self.watcher.content.quotes), 3)
+
+    def test_change_during_parse(self):
+        self.write(self.txt, 'first - author\nthird - author\n')
+        original = Ingestor.parse
+
+        def parse(path):
+            quotes = original(path)
+            self.write(path, 'first - author\nthird - author\nfifth - author\n')
+            return quotes
+        Ingestor.parse = parse
+        try:
+            self.assertTrue(self.watcher.poll())
+        finally:
+            Ingestor.parse = original
+        self.assertEqual(len(self.watcher.content.quotes), 3)
+        self.assertTrue(self.watcher.poll())
+        self.assertEqual(len(self.watcher.content.quotes), 4)
@@ -0,0 +1,85 @@
+"""Provide background warm-up of the application resources.
+
+Importing the application only wires the objects together. Parsing the
+quotes, scanning the images and loading the fonts run as named steps on a
+background thread, or on the first request that needs them, and every
+step's duration is kept for the readiness endpoint. Only a failed required
+step stops the warm-up; the others are logged, reported and skipped, so
+callers can wait for the one step they depend on.
+"""
+import logging
+import threading
+import time
+
+
+class Warmup:
+    """Run named initialization steps once, in order, on a background thread."""
+
+    def __init__(self, steps, required=None):
+        """Construct a new `Warmup`, nothing runs until `start` or `wait`.
+
+        :param steps: the (name, callable) pairs to run.
+        :param required: the names of the steps whose failure stops the warm-up, all of them by default.
+        """
+        self.steps = list(steps)
+        self.required = set(name for name, _ in self.steps) if required is None else set(required)
+        self.durations = {}
+        self.errors = {}
+        self.started = None
+        self.finished = None
+        self._done = threading.Event()
+        self._step_done = {name: threading.Event() for name, _ in self.steps}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        """Start the steps on a background thread unless they are started already."""
+        with self._lock:
+            if self._thread is None:
+                self.started = time.perf_counter()
+                self._thread = threading.Thread(target=self._run, name='warmup', daemon=True)
+                self._thread.start()
+
+    def wait(self, timeout=None, step=None) -> bool:
+        """Start the steps if needed and wait for them, or for one of them, to finish.
+
+        :param timeout: the seconds to wait, None waits until done.
+        :param step: the name of the step to wait for, all of them by default.
+        :return: True if the step, or every required step, succeeded.
+        """
+        self.start()
+        if step is not None:
+            return self._step_done[step].wait(timeout) and step in self.durations
+        return self._done.wait(timeout) and self.ready
+
+    @property
+    def ready(self) -> bool:
+        """Tell if every step ran and the required ones succeeded."""
+        return self._done.is_set() and not self.required & set(self.errors)
+
+    def status(self) -> dict:
+        """Return the readiness, the finished step durations and the errors of the failed steps."""
+        return {'ready': self.ready,
+                'steps': dict(self.durations),
+                'elapsed': None if self.finished is None else self.finished - self.started,
+                'errors': dict(self.errors)}
+
+    def _run(self):
+        try:
+            for name, step in self.steps:
+                started = time.perf_counter()
+                try:
+                    step()
+                    self.durations[name] = time.perf_counter() - started
+                except Exception as ex:
+                    logging.error(f'Warm-up step {name} failed: {ex}')
+                    self.errors[name] = f'{type(ex).__name__}: {ex}'
+                finally:
+                    self._step_done[name].set()
+                if name in self.errors and name in self.required:
+                    break
+        finally:
+            self.finished = time.perf_counter()
+            for done in self._step_done.values():
+                done.set()
+            self._done.set()
@@ -0,0 +1,194 @@
+"""Provide hot-reload of the quote files and the source image directory.
+
+`ContentWatcher` polls the modification time and size of every quote file
+and updates the `ImageCatalog` of the image directory; an image modified in
+place publishes new content like an added or removed one. Only the quote files
+that changed are parsed again through `Ingestor`, the quotes of the others
+are reused, and a copy of the current `QuoteStore` is updated with the quotes
+that were removed and added, so only those are indexed again.
+The new quotes and images are published as one immutable `Content`
+snapshot by a single attribute assignment, so requests keep reading the
+previous snapshot while a reload is in progress and never see a mix of both.
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from MemeEngine.catalog import ImageCatalog
+from QuoteEngine.ingestor import Ingestor
+from QuoteEngine.store import QuoteStore
+
+Content = namedtuple('Content', ['quotes', 'images', 'image_names'])
+
+
+class ContentWatcher:
+    """Poll quote files and an image directory and swap in the changed content."""
+
+    def __init__(self, quote_files, image_dir, interval=2.0, catalog=None, indexed=False):
+        """Construct a new `ContentWatcher`, `load` reads the content the first time.
+
+        :param quote_files: the quote file paths.
+        :param image_dir: the directory of the source images.
+        :param interval: the seconds between two polls of the background thread.
+        :param catalog: the `ImageCatalog` of the image directory, an in-memory one by default.
+        :param indexed: build the word and author index of the quotes.
+        """
+        self.quote_files = list(quote_files)
+        self.image_dir = image_dir
+        self.catalog = catalog or ImageCatalog(image_dir)
+        self.interval = interval
+        self.indexed = indexed
+        self.content = Content(QuoteStore(indexed=indexed), [], {})
+        self.listeners = []
+        self.reloads = 0
+        self.files_reloaded = 0
+        self.failures = 0
+        self.last_duration = 0.0
+        self.total_duration = 0.0
+        self._signatures = {}
+        self._image_stamps = []
+        self._quotes = {}
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def load(self) -> Content:
+        """Read all the content, the same as a poll that finds every file changed."""
+        self.poll()
+        return self.content
+
+    def poll(self) -> bool:
+        """Reload the changed quote files and images and publish them.
+
+        :return: True if the content changed.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            signatures = {path: self._signature(path) for path in self.quote_files}
+            changed = {path: signature for path, signature in signatures.items()
+                       if signature != self._signatures.get(path, False)}
+            images = self.catalog.scan()
+            image_stamps = [self._image_stamp(path) for path in images]
+            previous = {path: self._quotes.get(path, []) for path in changed}
+            if changed:
+                changed = self._reload_quotes(changed)
+            if not changed and image_stamps == self._image_stamps:
+                return False
+            self._image_stamps = image_stamps
+            quotes = self.content.quotes
+            if changed:
+                quotes = self._update_quotes(quotes, {path: previous[path] for path in changed})
+            self.content = Content(quotes, images,
+                                   {os.path.relpath(path, self.image_dir): path for path in images})
+            duration = time.perf_counter() - start
+            self.reloads += 1
+            self.files_reloaded += len(changed)
+            self.last_duration = duration
+            self.total_duration += duration
+            logging.info(f'Reloaded {len(changed)} quote files and {len(images)} images in {duration:.3f}s')
+            content = self.content
+        for listener in self.listeners:
+            try:
+                listener(content)
+            except Exception as ex:
+                logging.error(f'Content listener failed: {ex}')
+        return True
+
+    def start(self):
+        """Poll in a background thread every `interval` seconds."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='content-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background thread."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def stats(self) -> dict:
+        """Return the reload counters and durations."""
+        return {'reloads': self.reloads,
+                'files_reloaded': self.files_reloaded,
+                'failures': self.failures,
+                'last_duration': self.last_duration,
+                'total_duration': self.total_duration,
+                'quotes': len(self.content.quotes),
+                'images': len(self.content.images)}
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as ex:
+                logging.error(f'Cannot reload content: {ex}')
+
+    def _reload_quotes(self, signatures):
+        """Parse the files concurrently, a file that fails keeps its previous quotes.
+
+        The signature taken before the parse is stored only when the parse succeeded, so a file
+        saved again while it was parsed, or one that failed, is parsed again by the next poll.
+
+        :param signatures: the (mtime, size) of the changed files by path.
+        :return: the paths that were reloaded.
+        """
+        reloaded = []
+        with ThreadPoolExecutor(max_workers=len(signatures)) as executor:
+            results = [(path, executor.submit(self._parse, path)) for path in signatures]
+            for path, future in results:
+                try:
+                    self._quotes[path] = future.result()
+                except Exception as ex:
+                    logging.error(f'Cannot reload {path}: {ex}')
+                    self.failures += 1
+                    continue
+                self._signatures[path] = signatures[path]
+                reloaded.append(path)
+        return reloaded
+
+    def _update_quotes(self, quotes, previous):
+        """Return a copy of the store with the previous quotes of the reloaded files replaced by the new ones.
+
+        A quote is removed only when no file holds it any more, counted across all the files.
+
+        :param quotes: the current quote store, left as it is.
+        :param previous: the quotes the reloaded files held before, by path.
+        """
+        gone = set()
+        for path, old in previous.items():
+            for quote in old:
+                self._counts[quote] -= 1
+                if self._counts[quote] <= 0:
+                    gone.add(quote)
+            self._counts.update(self._quotes[path])
+        quotes = quotes.copy()
+        for quote in gone:
+            if self._counts[quote] <= 0:
+                del self._counts[quote]
+                quotes.remove(quote)
+        for path in previous:
+            quotes.extend(self._quotes[path])
+        return quotes
+
+    @staticmethod
+    def _parse(path):
+        if not os.path.exists(path):
+            return []
+        return Ingestor.parse(path)
+
+    def _image_stamp(self, path):
+        entry = self.catalog.get(path)
+        return path, entry.size, entry.mtime_ns
+
+    @staticmethod
+    def _signature(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size